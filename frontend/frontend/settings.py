@@ -119,3 +119,16 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Shared Crawlee docs index
+# The index is opened once when the app starts and served on a unix socket to
+# the generation subprocesses (see src/retrieval_service.py).
+
+RETRIEVAL_SERVICE = True
+RETRIEVAL_CLIENT_TYPE = 'local_db'
+RETRIEVAL_SOCKET = str(BASE_DIR.parent / '.retrieval.sock')
+# Let the clients of the socket build and refresh the index; when False it is
+# served read-only, and the app builds it at startup (and re-syncs it every
+# "refresh_interval" of NODE_DEFAULTS["rag"]) with the OPENAI_API_KEY of .env.
+RETRIEVAL_SOCKET_WRITES = False
@@ -1,6 +1,70 @@
+import os
+import sys
+
 from django.apps import AppConfig
 
 
 class ScraperConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scraper'
+
+    def ready(self):
+        from django.conf import settings
+
+        if not getattr(settings, 'RETRIEVAL_SERVICE', False):
+            return
+        # Only serve from the web process: not from other management commands,
+        # and with runserver only from the reloaded child that handles requests.
+        command = sys.argv[1] if len(sys.argv) > 1 and sys.argv[0].endswith('manage.py') else None
+        if command not in (None, 'runserver'):
+            return
+        if command == 'runserver' and os.environ.get('RUN_MAIN') != 'true':
+            return
+
+        from django.core.exceptions import ImproperlyConfigured
+        from dotenv import load_dotenv
+
+        from nodes.crawlee_rag_node import keep_index_current
+        from src.defaults import NODE_DEFAULTS
+        from src.embedding_cache import cached_embedder
+        from src.retrieval_service import shared_service, start_service
+        from src.vector_index import index_path
+
+        client_type = getattr(settings, 'RETRIEVAL_CLIENT_TYPE', 'local_db')
+        # Generation scripts run from the repository root, where the index paths are relative to.
+        path = os.path.join(settings.BASE_DIR.parent, index_path(client_type, {}))
+
+        # The jobs can't build the index through a read-only socket, so it is built
+        # (or synced) here, through the same in-process service the socket serves.
+        load_dotenv(settings.BASE_DIR.parent / '.env')
+        try:
+            from langchain_openai import OpenAIEmbeddings
+
+            embedder = cached_embedder(OpenAIEmbeddings())
+        except Exception:
+            # Without OPENAI_API_KEY an index built earlier is still served as is.
+            embedder = None
+        service = shared_service(client_type, path, {'retrieval_socket': None})
+        try:
+            keep_index_current(
+                service,
+                {
+                    'llm_model': None,
+                    'embedder_model': embedder,
+                    'client_type': client_type,
+                    'client_path': path,
+                    'numpy_path': path,
+                },
+                interval=NODE_DEFAULTS['rag']['refresh_interval'],
+            )
+        except RuntimeError as e:
+            raise ImproperlyConfigured(
+                f'{e}. Set OPENAI_API_KEY in .env or build it with scripts/build_docs_index.py.'
+            ) from e
+
+        start_service(
+            client_type,
+            path,
+            socket_path=getattr(settings, 'RETRIEVAL_SOCKET', None),
+            allow_writes=getattr(settings, 'RETRIEVAL_SOCKET_WRITES', False),
+        )
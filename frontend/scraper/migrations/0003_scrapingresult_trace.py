@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0002_fieldspecification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapingresult',
+            name='trace',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -67,6 +67,7 @@ class ScrapingResult(models.Model):
                                      ('failed', 'Failed')],
                              default='running')
     log_output = models.TextField(blank=True)
+    trace = models.TextField(blank=True)  # JSON lines, one span per line (src/tracing.py)
     
     def __str__(self):
         return f"Result for {self.project.name} - {self.created_at}"
\ No newline at end of file
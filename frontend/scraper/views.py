@@ -312,10 +312,11 @@ def containerize_script(script_path, output_dir=None, image_name=None):
             'error': str(e)
         }
 
-def generate_python_script_template(project):
+def generate_python_script_template(project, trace_path=None):
     """
     Generate a Python script that uses CodeGeneratorGraph to produce
     scraping code based on project settings and field specifications.
+    If trace_path is given, the spans of the generation are written there.
     """
     from .models import APIKey
     import json
@@ -356,6 +357,7 @@ def generate_python_script_template(project):
 
     # Template for the script
     template = f'''\
+import asyncio
 import os
 os.environ["OPENAI_API_KEY"] = "{api_key}"
 from pydantic import BaseModel, Field
@@ -372,6 +374,7 @@ graph_config = {{
 "headless": False,
 "output_file_name": "extracted_data.py",
 "force": {True},
+"tracing": {{"path": {trace_path!r}}},
 }}  
 
 class Record(BaseModel):
@@ -387,7 +390,7 @@ if __name__ == "__main__":
         config=graph_config,
         schema=RecordList
     )
-result = graph.run()
+result = asyncio.run(graph.arun())
 print("Code generated successfully")
 '''
     return template
@@ -406,8 +409,9 @@ def process_script_generation(result, project, api_key):
         pass
     update_log(result.id, "Generating Python script based on project specifications...\n")
 
+    trace_path = os.path.join(tempfile.gettempdir(), f"ds490-trace-{result.id}.jsonl")
     try:
-        script_content = generate_python_script_template(project)
+        script_content = generate_python_script_template(project, trace_path)
         update_log(result.id, "Script generated successfully.\n")
     except Exception as e:
         update_log(result.id, f"Error generating script: {e}\n")
@@ -459,6 +463,13 @@ def process_script_generation(result, project, api_key):
             pass
          
     update_log(result.id, f"Script execution completed with exit code {exit_code}.\n")
+    # Attach the spans of the generation (also written when it failed)
+    try:
+        with open(trace_path, 'r') as f:
+            result.trace = f.read()
+        os.remove(trace_path)
+    except OSError:
+        pass
     if exit_code == 0:
         output_file = os.path.join(project_root, "extracted_data.py")
         try:
@@ -0,0 +1,201 @@
+"""
+Batch generation: many (prompt, source, schema) jobs sharing one set of resources.
+
+A CodeGeneratorGraph built on its own creates its LLM client, its embedder and
+rate limiter, opens the docs index and launches browsers without bound, and
+onboarding dozens of sites at once spends most of its time on that setup.
+BatchSession creates them once and hands them to every job's graph: the LLM
+(through scrapegraphai's `model_instance`), the cached embedder, the
+embedding rate limiter, the docs index (synced once before the jobs start;
+RetrievalService and the execution pool are already shared per process) and a
+semaphore bounding the browsers FetchNode launches. Jobs run on a thread pool
+of `max_concurrency` workers; each one's code, error and trace are returned in
+job order, and a failed job does not stop the others.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Type
+
+from langchain_openai import OpenAIEmbeddings
+from pydantic import BaseModel
+
+from graphs.code_generator_graph import CodeGeneratorGraph
+from nodes.crawlee_rag_node import RAGNode
+from src.batch_embedding import create_rate_limiter
+from src.defaults import NODE_DEFAULTS
+from src.embedding_cache import cached_embedder
+
+logger = logging.getLogger(__name__)
+
+
+class Job(NamedTuple):
+    """
+    One generation of a batch.
+
+    Attributes:
+        prompt (str): The user prompt.
+        source (str): The URL (or local directory) to scrape.
+        schema (Type[BaseModel]): The output schema.
+        config (dict): Overrides of the session config for this job only.
+    """
+    prompt: str
+    source: str
+    schema: Type[BaseModel]
+    config: Optional[dict] = None
+
+
+class JobResult(NamedTuple):
+    """
+    The outcome of a job.
+
+    Attributes:
+        index (int): The position of the job in the batch.
+        job (Job): The job.
+        code (str): The generated code, None if the job failed.
+        filename (str): Where the code was saved.
+        error (str): The exception that ended the job, None if it succeeded.
+        seconds (float): How long the job ran.
+        trace (str): The spans of the job as JSON lines, None if tracing is disabled.
+    """
+    index: int
+    job: Job
+    code: Optional[str]
+    filename: str
+    error: Optional[str]
+    seconds: float
+    trace: Optional[str]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:40] or "job"
+
+
+class BatchSession:
+    """
+    Runs CodeGeneratorGraph jobs concurrently on shared resources.
+
+    Args:
+        config (dict): The graph config shared by every job, with the `batch`
+            overrides of NODE_DEFAULTS["batch"].
+
+    Example:
+        >>> with BatchSession({"llm": {"model": "openai/gpt-4o-mini"}}) as session:
+        ...     results = session.run_many([Job(prompt, url, RecordList) for url in urls])
+    """
+
+    def __init__(self, config: dict):
+        self.batch = {**NODE_DEFAULTS["batch"], **(config.get("batch") or {})}
+        self.config = dict(config)
+        self.config["embedder_model"] = cached_embedder(
+            config.get("embedder_model") or OpenAIEmbeddings(),
+            config.get("embedding_cache"),
+        )
+        self.config["rate_limiter"] = config.get("rate_limiter") or create_rate_limiter(
+            config.get("embed_requests_per_second", NODE_DEFAULTS["rag"]["embed_requests_per_second"])
+        )
+        self.config["browser_slots"] = threading.BoundedSemaphore(self.batch["browser_slots"])
+        self._shared_llm: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        # Held while the index syncs, which takes long: jobs keep building their graphs meanwhile.
+        self._index_lock = threading.Lock()
+        self._index_ready = threading.Event()
+
+    def __enter__(self) -> "BatchSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Forgets the shared LLM; the process-wide index and execution pool stay open.
+        """
+        self._shared_llm = None
+
+    def graph(self, job: Job, index: int) -> CodeGeneratorGraph:
+        """
+        Builds the graph of a job on the shared resources; the first graph
+        creates the LLM client that the others reuse.
+        """
+        config = {**self.config, **(job.config or {})}
+        config.setdefault(
+            "filename",
+            os.path.join(self.batch["output_dir"], f"{index:03d}-{_slug(job.prompt)}.py"),
+        )
+        with self._lock:
+            if self._shared_llm is not None and "llm" not in (job.config or {}):
+                config["llm"] = {**(config.get("llm") or {}), **self._shared_llm}
+            graph = CodeGeneratorGraph(job.prompt, job.source, config, job.schema)
+            if self._shared_llm is None and "llm" not in (job.config or {}):
+                self._shared_llm = {"model_instance": graph.llm_model, "model_tokens": graph.model_token}
+        return graph
+
+    def prepare_index(self, graph: CodeGeneratorGraph) -> None:
+        """
+        Opens and syncs the docs index once, so that the jobs' RAGNodes find it
+        current; the other jobs wait for it. If it fails, the next job tries again.
+        """
+        if self._index_ready.is_set():
+            return
+        with self._index_lock:
+            if self._index_ready.is_set():
+                return
+            rag_node = next(node for node in graph.graph.nodes if isinstance(node, RAGNode))
+            rag_node.execute({})
+            self._index_ready.set()
+
+    def run_job(self, job: Job, index: int) -> JobResult:
+        """
+        Runs one job; its exception, if any, is returned in the result.
+        """
+        start = time.perf_counter()
+        graph = None
+        filename = None
+        try:
+            graph = self.graph(job, index)
+            filename = graph.config.get("filename")
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.prepare_index(graph)
+            code = graph.run()
+            error = None
+        except Exception as e:
+            logger.error(f"Job {index} ({job.source}) failed: {e}")
+            code, error = None, f"{type(e).__name__}: {e}"
+        trace = graph.trace.to_jsonl() if graph is not None and graph.trace is not None else None
+        return JobResult(index, job, code, filename, error, time.perf_counter() - start, trace)
+
+    def run_many(self, jobs: Iterable[Job]) -> List[JobResult]:
+        """
+        Runs the jobs, at most `max_concurrency` at a time.
+
+        Args:
+            jobs (Iterable[Job]): The jobs.
+
+        Returns:
+            List[JobResult]: The result of every job, in job order.
+        """
+        jobs = list(jobs)
+        with ThreadPoolExecutor(max_workers=self.batch["max_concurrency"], thread_name_prefix="batch-job") as pool:
+            results = list(pool.map(self.run_job, jobs, range(len(jobs))))
+        failed = sum(1 for result in results if not result.ok)
+        logger.info(f"Batch of {len(jobs)} jobs done: {len(jobs) - failed} succeeded, {failed} failed")
+        return results
+
+
+def run_many(jobs: Iterable[Job], config: dict) -> List[JobResult]:
+    """
+    Runs jobs in a BatchSession built from `config`.
+    """
+    with BatchSession(config) as session:
+        return session.run_many(jobs)
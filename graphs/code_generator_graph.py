@@ -2,6 +2,9 @@
 SmartScraperGraph Module
 """
 
+import asyncio
+import contextlib
+import logging
 from typing import Optional, Type
 
 from pydantic import BaseModel
@@ -23,6 +26,13 @@ from scrapegraphai.graphs.base_graph import BaseGraph
 
 from langchain_openai import OpenAIEmbeddings
 from src.defaults import NODE_DEFAULTS
+from src.embedding_cache import cached_embedder
+from src.node_cache import create_node_cache
+from src.scheduler import GraphScheduler
+from src.tracing import create_tracer, span, trace_llm
+
+logger = logging.getLogger(__name__)
+
 
 class CodeGeneratorGraph(AbstractGraph):
     """
@@ -43,6 +53,10 @@ class CodeGeneratorGraph(AbstractGraph):
         verbose (bool): A flag indicating whether to show print statements during execution.
         headless (bool): A flag indicating whether to run the graph in headless mode.
         library (str): The library used for web scraping (beautiful soup).
+        schedule_report (ScheduleReport): Timing of the upstream nodes of the last
+        run, with its critical path and the nodes read from the node cache.
+        trace (Tracer): Spans of the last run (nodes, iterations, LLM calls,
+        searches, executions), None if tracing is disabled.
 
     Args:
         prompt (str): The prompt for the graph.
@@ -70,6 +84,8 @@ class CodeGeneratorGraph(AbstractGraph):
         super().__init__(prompt, config, source, schema)
 
         self.input_key = "url" if source.startswith("http") else "local_dir"
+        self.schedule_report = None
+        self.trace = None
 
     def _create_graph(self) -> BaseGraph:
         """
@@ -82,6 +98,14 @@ class CodeGeneratorGraph(AbstractGraph):
         if self.schema is None:
             raise KeyError("The schema is required for CodeGeneratorGraph")
 
+        # Every LLM call of the nodes is recorded in the trace of the run
+        trace_llm(self.llm_model)
+
+        embedder_model = cached_embedder(
+            self.config.get("embedder_model") or OpenAIEmbeddings(),
+            self.config.get("embedding_cache"),
+        )
+
         fetch_node = FetchNode(
             input="url| local_dir",
             output=["doc"],
@@ -137,8 +161,12 @@ class CodeGeneratorGraph(AbstractGraph):
             output=["vectorial_db"],
             node_config={
             "llm_model":    self.llm_model,
-            "embedder_model": self.config.get("embedder_model", OpenAIEmbeddings()),
-            "client_type":  "local_db",
+            "embedder_model": embedder_model,
+            "client_type":  self.config.get("client_type", "local_db"),
+            **{key: self.config.get(key, default) for key, default in NODE_DEFAULTS["rag"].items()},
+            "snapshot_base_url": self.config.get("snapshot_base_url"),
+            "rate_limiter": self.config.get("rate_limiter"),
+            "retrieval_cache": self.config.get("retrieval_cache"),
             "verbose":      self.config.get("verbose", False),
             },
         )
@@ -156,7 +184,20 @@ class CodeGeneratorGraph(AbstractGraph):
                 "max_iterations": max_iter,
                 "additional_info": self.config.get("additional_info"),
                 "schema": self.schema,
-                "embedder_model": self.config.get("embedder_model", OpenAIEmbeddings()),
+                "embedder_model": embedder_model,
+                "speculative": self.config.get("speculative"),
+                # The shared browser of the pool runs headed when the graph does.
+                "execution_pool": {
+                    "headless": self.config.get("headless", True),
+                    **(self.config.get("execution_pool") or {}),
+                },
+                "page_fixtures": self.config.get("page_fixtures"),
+                "api_check": self.config.get("api_check"),
+                "execution_monitor": self.config.get("execution_monitor"),
+                "run_storage": self.config.get("run_storage"),
+                "schema_validation": self.config.get("schema_validation"),
+                "prompt_budget": self.config.get("prompt_budget"),
+                "llm_cache": self.config.get("llm_cache"),
             },
         )
 
@@ -208,72 +249,78 @@ class CodeGeneratorGraph(AbstractGraph):
         return generated_code
         '''
         
-        import os, json, hashlib
-        from langchain_core.documents import Document
-
-        # 1) prepare cache directory & key
-        cache_dir = self.config.get("node_cache_dir", ".node_cache")
-        os.makedirs(cache_dir, exist_ok=True)
-        key_source = f"{self.prompt}||{self.source}"
-        cache_key = hashlib.sha256(key_source.encode("utf-8")).hexdigest()
-        cache_file = os.path.join(cache_dir, cache_key + ".json")
-        use_cache = os.path.isfile(cache_file) and not self.config.get("force", False)
-
-        if use_cache:
-            # Load cached state (excluding vector DB) and rehydrate
-            with open(cache_file, "r") as f:
-                cached = json.load(f)
-            original_html = [
-                Document(page_content=d["page_content"], metadata=d["metadata"])
-                for d in cached.get("original_html", [])
-            ]
-            state = {
-                "user_prompt":    self.prompt,
-                self.input_key:   self.source,
-                "original_html":  original_html,
-                "refined_prompt": cached.get("refined_prompt"),
-                "html_info":      cached.get("html_info"),
-                "reduced_html":   cached.get("reduced_html"),
-                "answer":         cached.get("answer"),
-            }
-            # Restore vector DB client from persistent store
-            try:
-                from qdrant_client import QdrantClient
-            except ImportError:
-                raise ImportError("qdrant_client is required to restore vector DB. Install via 'pip install qdrant-client'.")
-            state["vectorial_db"] = QdrantClient(path=self.config.get("client_path", "databases/crawlee_db"))
+        with self._tracing():
+            state = self._upstream_state()
+            gen_node = next(
+                n for n in self.graph.nodes if isinstance(n, GenerateCodeNode)
+            )
+            with span(gen_node.node_name, "node"):
+                final_state = gen_node.execute(state)
+        return self._save_generated_code(final_state)
+
+    async def arun(self) -> str:
+        """
+        Async version of `run`: the upstream nodes run in a worker thread and
+        GenerateCodeNode overlaps the independent LLM and retrieval calls of
+        its repair iterations.
 
-        else:
-            # First run: execute all upstream nodes and cache intermediate results
-            state = {"user_prompt": self.prompt, self.input_key: self.source}
-            upstream_nodes = self.graph.nodes[:-1]
-            for node in upstream_nodes:
-                state = node.execute(state)
-
-            # Serialize original HTML docs and other serializable state
-            orig = state.get("original_html", [])
-            serialized = [
-                {"page_content": doc.page_content, "metadata": doc.metadata}
-                for doc in orig
-            ]
-            to_cache = {
-                "original_html":  serialized,
-                "refined_prompt": state.get("refined_prompt"),
-                "html_info":      state.get("html_info"),
-                "reduced_html":   state.get("reduced_html"),
-                "answer":         state.get("answer"),
-            }
-            # Write cache (exclude non-serializable vector DB client)
-            with open(cache_file, "w") as f:
-                json.dump(to_cache, f)
-
-        # 3) run only GenerateCodeNode
-        gen_node = next(
-            n for n in self.graph.nodes if isinstance(n, GenerateCodeNode)
+        Returns:
+            str: The generated code.
+        """
+        with self._tracing():
+            state = await asyncio.to_thread(self._upstream_state)
+            gen_node = next(
+                n for n in self.graph.nodes if isinstance(n, GenerateCodeNode)
+            )
+            with span(gen_node.node_name, "node"):
+                final_state = await gen_node.aexecute(state)
+        return self._save_generated_code(final_state)
+
+    @contextlib.contextmanager
+    def _tracing(self):
+        """
+        Records the spans of a run in `self.trace`, under a root span, and
+        exports them as JSON lines to the `tracing` path once the run ends.
+        """
+        config = {**NODE_DEFAULTS["tracing"], **(self.config.get("tracing") or {})}
+        self.trace = create_tracer(config)
+        if self.trace is None:
+            yield
+            return
+        try:
+            with self.trace.activate(), span(self.__class__.__name__, "graph", source=self.source):
+                yield
+        finally:
+            logger.info(self.trace.describe())
+            if config["path"]:
+                logger.info(f"Trace written to {self.trace.export(config['path'])}")
+
+    def _upstream_state(self) -> dict:
+        """
+        Returns the state GenerateCodeNode runs on: the results of the upstream
+        nodes, each read from the node cache when its inputs and configuration
+        are unchanged, and the docs index.
+        """
+        node_cache = self.config.get("node_cache") or {}
+        if self.config.get("node_cache_dir"):
+            node_cache = {"dir": self.config["node_cache_dir"], **node_cache}
+        cache = create_node_cache(node_cache, refresh=self.config.get("force", False))
+
+        # Each node runs as soon as its inputs are ready, unless its output is cached
+        state = {"user_prompt": self.prompt, self.input_key: self.source}
+        upstream_nodes = self.graph.nodes[:-1]
+        scheduler = GraphScheduler.from_config(
+            upstream_nodes, self.config.get("scheduler"),
+            side_outputs={"original_html": FetchNode}, cache=cache,
+            throttles={FetchNode: self.config.get("browser_slots")},
         )
-        final_state = gen_node.execute(state)
+        state, self.schedule_report = scheduler.run(state)
+        return state
 
-        # 4) persist generated code as before
+    def _save_generated_code(self, final_state: dict) -> str:
+        """
+        Persists the generated code to the configured file and returns it.
+        """
         generated_code = final_state.get("generated_code", "No code created.")
         if self.config.get("filename") is None:
             filename = "extracted_data.py"
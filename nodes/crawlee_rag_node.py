@@ -2,11 +2,35 @@
 RAGNode Module
 """
 
-from typing import List, Optional
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 
 from scrapegraphai.nodes.base_node import BaseNode
 
 from langchain_community.document_loaders import DocusaurusLoader
+from src.batch_embedding import create_rate_limiter, embed_in_batches
+from src.chunking import chunk_page
+from src.defaults import NODE_DEFAULTS
+from src.docs_index import (
+    content_hash,
+    diff_pages,
+    empty_manifest,
+    installed_crawlee_version,
+    is_fresh,
+    load_manifest,
+    load_snapshot_pages,
+    page_id,
+    save_manifest,
+    snapshot_fingerprint,
+)
+from src.embedding_cache import embedder_model_name
+from src.retrieval_service import shared_service
+from src.tracing import span
+from src.vector_index import create_client, index_path
+
+logger = logging.getLogger(__name__)
 
 class RAGNode(BaseNode):
     """
@@ -42,54 +66,332 @@ class RAGNode(BaseNode):
         )
         self.input = input
 
+        defaults = NODE_DEFAULTS["rag"]
+        self.crawlee_version = node_config.get("crawlee_version") or installed_crawlee_version()
+        self.client_type = node_config.get("client_type")
+        self.client_path = index_path(self.client_type, node_config, self.crawlee_version)
+        self.collection_name = node_config.get("collection_name", defaults["collection_name"])
+        self.index_mode = node_config.get("index_mode", defaults["index_mode"])
+        self.refresh_interval = node_config.get("refresh_interval", defaults["refresh_interval"])
+        self.refresh = node_config.get("refresh", defaults["refresh"])
+        self.docs_source = node_config.get("docs_source", defaults["docs_source"])
+        self.snapshot_prefix = node_config.get("snapshot_prefix", defaults["snapshot_prefix"])
+        self.snapshot_base_url = node_config.get("snapshot_base_url")
+        self.chunk_tokens = node_config.get("chunk_tokens", defaults["chunk_tokens"])
+        self.chunk_overlap = node_config.get("chunk_overlap", defaults["chunk_overlap"])
+        self.embed_batch_size = node_config.get("embed_batch_size", defaults["embed_batch_size"])
+        self.embed_concurrency = node_config.get("embed_concurrency", defaults["embed_concurrency"])
+        self.embed_max_retries = node_config.get("embed_max_retries", defaults["embed_max_retries"])
+        self.rate_limiter = node_config.get("rate_limiter") or create_rate_limiter(
+            node_config.get("embed_requests_per_second", defaults["embed_requests_per_second"])
+        )
+        self.persistent = self.client_type not in ["memory", None]
+        # A client or service opened by the caller, used instead of the shared one.
+        self.index_client = node_config.get("index_client")
+
     def execute(self, state: dict) -> dict:
         self.logger.info(f"--- Executing {self.node_name} Node ---")
 
-        try:
-            from qdrant_client import QdrantClient
-            from qdrant_client.models import Distance, PointStruct, VectorParams
-        except ImportError:
-            raise ImportError(
-                "qdrant_client is not installed. Please install it using 'pip install qdrant-client'."
-            )
+        # Persistent indexes are opened once per process (or served over a socket)
+        # so that concurrent jobs share them instead of fighting over the Qdrant lock.
+        if self.index_client is not None:
+            client = self.index_client
+        elif self.persistent:
+            client = shared_service(self.client_type, self.client_path, self.node_config)
+        else:
+            client = create_client(self.client_type, self.client_path, self.node_config)
 
-        if self.node_config.get("client_type") in ["memory", None]:
-            client = QdrantClient(":memory:")
-        elif self.node_config.get("client_type") == "local_db":
-            client = QdrantClient(path="databases/crawlee_db")
-        elif self.node_config.get("client_type") == "image":
-            client = QdrantClient(url="http://localhost:6333")
+        if self.index_mode not in ("incremental", "rebuild"):
+            raise ValueError("index_mode provided not correct")
+
+        if not getattr(client, "writable", True):
+            self.use_read_only(client)
+        # An in-memory collection starts empty on every run, so there is nothing to sync against.
+        elif self.index_mode == "incremental" and self.persistent:
+            self.sync_index(client)
         else:
-            raise ValueError("client_type provided not correct")
-        
+            self.rebuild_index(client)
+
+        state["vectorial_db"] = client
+        return state
+
+    def use_read_only(self, client) -> None:
+        """
+        Uses an index served read-only as is: it can be neither built nor refreshed from here.
+        """
+        if self.index_mode == "rebuild" or self.refresh or not client.collection_exists(self.collection_name):
+            raise ValueError(
+                f"The docs index at {self.client_path} is served read-only on "
+                f"{getattr(client, 'socket_path', 'a socket')}: build or refresh it with "
+                "scripts/build_docs_index.py while it is not served, or serve it with writes allowed"
+            )
+        self.logger.info("--- (Docs index is served read-only, skipping sync) ---")
+
+    def load_api_docs(self) -> Dict[str, str]:
+        """
+        Loads the Crawlee API reference pages, either by crawling the live
+        documentation or from the local snapshot given as `docs_source`.
+
+        Returns:
+            Dict[str, str]: Mapping of page source url to page content.
+        """
+        if self.docs_source != "live":
+            return load_snapshot_pages(
+                self.docs_source, self.snapshot_prefix, self.snapshot_base_url
+            )
+
         loader = DocusaurusLoader("https://crawlee.dev/python/")
         all_docs = loader.load()
 
-        api_docs = []
+        api_docs = {}
         for doc in all_docs:
             src = getattr(doc, "source", None) or (doc.metadata.get("source") if hasattr(doc, "metadata") else None)
             if isinstance(src, str) and src.startswith("https://crawlee.dev/python/api"):
                 content = getattr(doc, "page_content", None)
                 if content:
-                    api_docs.append(content)
-        
+                    api_docs[src] = content
+        return api_docs
+
+    def rebuild_index(self, client) -> None:
+        """
+        Loads, chunks and embeds every page, replacing the whole collection.
+        """
+        from qdrant_client.models import Distance, VectorParams
+
+        api_docs = self.load_api_docs()
+        points, page_ids = self.build_points(api_docs)
+        self.require_points(points)
+
+        if client.collection_exists(self.collection_name):
+            client.delete_collection(self.collection_name)
+        client.create_collection(
+            self.collection_name,
+            vectors_config=VectorParams(size=len(points[0].vector), distance=Distance.COSINE),
+        )
+        client.upsert(collection_name=self.collection_name, points=points)
+
+        if self.persistent:
+            manifest = empty_manifest()
+            manifest["pages"] = {
+                src: {"hash": content_hash(doc), "ids": page_ids[src]}
+                for src, doc in api_docs.items()
+            }
+            manifest.update(self.source_info())
+            save_manifest(self.client_path, manifest)
+
+    def sync_index(self, client) -> None:
+        """
+        Brings the persisted collection up to date with the documentation.
+
+        Pages are hashed and only new or changed ones are chunked, embedded and
+        upserted under stable ids derived from their url; chunks of pages that
+        changed or disappeared are deleted.
+        If the index is already current (same snapshot, or a live crawl synced
+        less than `refresh_interval` seconds ago) loading is skipped altogether.
+        """
+        from qdrant_client.models import Distance, VectorParams
+
+        manifest = load_manifest(self.client_path)
+        has_collection = client.collection_exists(self.collection_name)
+
+        if has_collection and not manifest["pages"]:
+            # Collection built before manifests existed: its point ids are not stable.
+            self.logger.info("--- (Docs index has no manifest, rebuilding it) ---")
+            self.rebuild_index(client)
+            return
+
+        if has_collection and not self.same_embedding(manifest):
+            # Unchanged pages would keep vectors chunked or embedded differently.
+            self.logger.info("--- (Docs chunking or embedder changed, rebuilding the index) ---")
+            self.rebuild_index(client)
+            return
+
+        if not has_collection:
+            manifest = empty_manifest()
+        elif not self.refresh and self.is_current(manifest):
+            self.logger.info("--- (Docs index is up to date, skipping crawl) ---")
+            return
+
+        api_docs = self.load_api_docs()
+        changed, removed = diff_pages(api_docs, manifest)
+        self.logger.info(
+            f"--- (Docs index: {len(changed)} new or changed pages, {len(removed)} removed) ---"
+        )
+
+        page_ids: Dict[str, List[str]] = {}
+        if changed:
+            points, page_ids = self.build_points(changed)
+            if not has_collection:
+                self.require_points(points)
+                client.create_collection(
+                    self.collection_name,
+                    vectors_config=VectorParams(size=len(points[0].vector), distance=Distance.COSINE),
+                )
+            client.upsert(collection_name=self.collection_name, points=points)
+        elif not has_collection:
+            self.require_points([])
+
+        fresh_ids = {point_id for ids in page_ids.values() for point_id in ids}
+        stale_ids = [
+            point_id
+            for src in list(changed) + removed
+            for point_id in manifest["pages"].get(src, {}).get("ids", [])
+            if point_id not in fresh_ids
+        ]
+        if stale_ids:
+            client.delete(collection_name=self.collection_name, points_selector=stale_ids)
+
+        for src in removed:
+            del manifest["pages"][src]
+        for src, doc in changed.items():
+            manifest["pages"][src] = {"hash": content_hash(doc), "ids": page_ids[src]}
+        manifest.update(self.source_info())
+        save_manifest(self.client_path, manifest)
+
+    def build_points(self, pages: Dict[str, str]) -> Tuple[list, Dict[str, List[str]]]:
+        """
+        Splits pages into token-bounded chunks and embeds them.
+
+        Args:
+            pages (Dict[str, str]): Mapping of page source to page content.
+
+        Returns:
+            tuple: The points to upsert and, for every page, the ids of its chunks.
+        """
+        from qdrant_client.models import PointStruct
+
+        chunks = [
+            chunk
+            for src, doc in pages.items()
+            for chunk in chunk_page(src, doc, self.chunk_tokens, self.chunk_overlap)
+        ]
+        vectors = self._embed([chunk["text"] for chunk in chunks])
+
+        points, page_ids = [], {src: [] for src in pages}
+        for chunk, vector in zip(chunks, vectors):
+            point_id = page_id(f"{chunk['source']}#{chunk['chunk']}")
+            page_ids[chunk["source"]].append(point_id)
+            points.append(PointStruct(id=point_id, vector=vector, payload=chunk))
+        return points, page_ids
+
+    def require_points(self, points: list) -> None:
+        """
+        Raises if no chunk was produced, so that an empty crawl or snapshot is
+        reported rather than failing on the size of the first vector.
+        """
+        if not points:
+            raise ValueError(
+                f"No Crawlee docs were loaded from '{self.docs_source}'"
+                + (f" under '{self.snapshot_prefix}'" if self.docs_source != "live" else "")
+                + ": check docs_source and snapshot_prefix, or the network for a live crawl"
+            )
+
+    def source_info(self) -> dict:
+        """
+        Describes where the indexed pages come from and how they were embedded,
+        as stored in the manifest.
+        """
+        return {
+            "synced_at": time.time(),
+            "crawlee_version": self.crawlee_version,
+            "docs_source": self.docs_source,
+            "snapshot": (
+                snapshot_fingerprint(self.docs_source) if self.docs_source != "live" else None
+            ),
+            **self.embedding_info(),
+        }
+
+    def embedding_info(self) -> dict:
+        """
+        The chunking parameters and embedder model the vectors of the index depend on.
+        """
+        return {
+            "chunk_tokens": self.chunk_tokens,
+            "chunk_overlap": self.chunk_overlap,
+            "embedder_model": (
+                embedder_model_name(self.embedder_model) if self.embedder_model is not None else None
+            ),
+        }
+
+    def same_embedding(self, manifest: dict) -> bool:
+        """
+        Tells whether the index was chunked and embedded the way this node would do it.
+        """
+        return all(manifest.get(key) == value for key, value in self.embedding_info().items())
+
+    def is_current(self, manifest: dict) -> bool:
+        """
+        Tells whether the index described by the manifest can be used without reloading the docs.
+        """
+        if manifest.get("crawlee_version") != self.crawlee_version:
+            return False
+        if manifest.get("docs_source") != self.docs_source:
+            return False
+        if not self.same_embedding(manifest):
+            return False
+        if self.docs_source != "live":
+            return bool(manifest["pages"]) and manifest.get("snapshot") == snapshot_fingerprint(
+                self.docs_source
+            )
+        return is_fresh(manifest, self.refresh_interval)
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
         embedder = self.embedder_model
         if embedder is None:
             raise ValueError("No embedder_model provided for RAGNode.")
-        vectors = embedder.embed_documents(api_docs)
+        with span("embed_docs", "embedding", texts=len(texts), batch_size=self.embed_batch_size):
+            return embed_in_batches(
+                embedder,
+                texts,
+                batch_size=self.embed_batch_size,
+                max_concurrency=self.embed_concurrency,
+                rate_limiter=self.rate_limiter,
+                max_retries=self.embed_max_retries,
+            )
 
-        points = [
-            PointStruct(id=i, vector=vec, payload={"text": doc})
-            for i, (vec, doc) in enumerate(zip(vectors, api_docs), start=1)
-        ]
-        collection_name = "vectorial_collection"
-        
-        client.recreate_collection(
-            collection_name,
-            vectors_config=VectorParams(size=len(vectors[0]), distance=Distance.COSINE),
-        )
-        
-        client.upsert(collection_name=collection_name, points=points)
 
-        state["vectorial_db"] = client
-        return state
+def keep_index_current(client, node_config: dict, interval: Optional[float] = None) -> RAGNode:
+    """
+    Builds or syncs the docs index through a writable client before it is
+    served read-only, and optionally re-syncs it in the background.
+
+    A failed sync is only logged while the collection exists, so that an index
+    built earlier is still served when the docs or the embedder are unreachable.
+
+    Args:
+        client: The writable index client or service, e.g. the shared service of the app.
+        node_config (dict): Configuration of the RAGNode running the sync.
+        interval (float): Seconds between background syncs, None to sync only once.
+
+    Returns:
+        RAGNode: The node used to sync the index.
+
+    Raises:
+        RuntimeError: If the index does not exist and could not be built.
+    """
+    node = RAGNode(
+        input=None,
+        output=["vectorial_db"],
+        node_config={**node_config, "index_mode": "incremental", "index_client": client},
+    )
+
+    def sync() -> None:
+        try:
+            node.execute({})
+        except Exception as e:
+            if not client.collection_exists(node.collection_name):
+                raise RuntimeError(f"The docs index at {node.client_path} could not be built: {e}") from e
+            logger.warning(f"Could not sync the docs index at {node.client_path}, serving it as is: {e}")
+
+    sync()
+    if interval:
+        def refresh() -> None:
+            while True:
+                time.sleep(interval)
+                try:
+                    sync()
+                except Exception:
+                    logger.exception(f"Could not sync the docs index at {node.client_path}")
+
+        threading.Thread(target=refresh, name="docs-index-refresh", daemon=True).start()
+    return node
@@ -3,22 +3,33 @@ GenerateCodeNode Module
 """
 
 import ast
+import asyncio
 import json
 import re
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import StringIO
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from bs4 import BeautifulSoup
-from jsonschema import ValidationError as JSONSchemaValidationError
-from jsonschema import validate
 from langchain.output_parsers import ResponseSchema, StructuredOutputParser
 from langchain.prompts import PromptTemplate
 from langchain_community.chat_models import ChatOllama
 from langchain_core.output_parsers import StrOutputParser
 
 from langchain_openai import OpenAIEmbeddings
+from src.api_checker import check_api
 from src.defaults import NODE_DEFAULTS
+from src.execution_monitor import ExecutionFailure, ExecutionMonitor, ExecutionResult, kill_tree
+from src.execution_pool import run_candidate, shared_pool
+from src.llm_cache import create_completion_cache, use_completion_cache
+from src.page_fixtures import PageFixtures
+from src.prompt_budget import Section, collapse_html_siblings, create_budgeter, drop_repeated_paragraphs
+from src.query_builder import build_query, schema_fields
+from src.retrieval import HybridRetriever
+from src.schema_validation import SchemaValidator, ValidationReport
+from src.tracing import in_context, span
 
 from scrapegraphai.prompts import TEMPLATE_SEMANTIC_COMPARISON
 from prompts.crawlee_prompt import DEFAULT_CRAWLEE_TEMPLATE
@@ -36,7 +47,7 @@ from scrapegraphai.utils import (
     validation_focused_code_generation,
 )
 from scrapegraphai.nodes.base_node import BaseNode
-import tempfile, subprocess, os, sys
+import tempfile, subprocess, os, shutil, sys
 
 class GenerateCodeNode(BaseNode):
     """
@@ -63,8 +74,11 @@ class GenerateCodeNode(BaseNode):
     ):
         super().__init__(node_name, "node", input, output, 2, node_config)
 
-        self.llm_model = node_config.get("llm_model")
-        
+        # A copy of the model, which the other nodes and the jobs of a batch share:
+        # the sampling parameters and the completion cache set below apply to this node only.
+        llm_model = node_config.get("llm_model")
+        self.llm_model = llm_model.model_copy() if hasattr(llm_model, "model_copy") else llm_model
+
         for _param in ("temperature", "top_p", "max_tokens", "seed"):
             if _param in node_config and hasattr(self.llm_model, _param):
                 setattr(self.llm_model, _param, node_config[_param])
@@ -72,6 +86,10 @@ class GenerateCodeNode(BaseNode):
         if isinstance(node_config["llm_model"], ChatOllama):
             self.llm_model.format = "json"
 
+        # Replays the completions of deterministic models (temperature 0 or a seed) from disk.
+        self.completion_cache = create_completion_cache(node_config.get("llm_cache"))
+        use_completion_cache(self.llm_model, self.completion_cache)
+
         self.verbose = (
             True if node_config is None else node_config.get("verbose", False)
         )
@@ -90,9 +108,22 @@ class GenerateCodeNode(BaseNode):
         self.initial_k = retrieval_cfg.get("initial_k", defaults["retrieval"]["initial_k"])
         self.execution_k = retrieval_cfg.get("execution_k", defaults["retrieval"]["execution_k"])
         self.validation_k = retrieval_cfg.get("validation_k", defaults["retrieval"]["validation_k"])
+        self.retrieval_cfg = retrieval_cfg
+        self.query_rewrite = retrieval_cfg.get("query_rewrite", defaults["retrieval"]["query_rewrite"])
+        if self.query_rewrite not in ("auto", "local", "llm"):
+            raise ValueError("query_rewrite provided not correct")
         self.max_iterations = node_config.get("max_iterations", defaults["max_iterations"])
 
         self.output_schema = node_config.get("schema")
+        self.execution_pool_cfg = node_config.get("execution_pool")
+        self.speculative = {**defaults["speculative"], **(node_config.get("speculative") or {})}
+        self.page_fixtures_cfg = {**defaults["page_fixtures"], **(node_config.get("page_fixtures") or {})}
+        self.api_check = {**defaults["api_check"], **(node_config.get("api_check") or {})}
+        self.execution_monitor = ExecutionMonitor.from_config(node_config.get("execution_monitor"))
+        self.run_storage = {**defaults["run_storage"], **(node_config.get("run_storage") or {})}
+        self.schema_validation_cfg = node_config.get("schema_validation")
+        self.prompt_budget = {**defaults["prompt_budget"], **(node_config.get("prompt_budget") or {})}
+        self.budgeter = create_budgeter(self.prompt_budget)
         self.embedder = node_config.get("embedder_model")
 
     def execute(self, state: dict) -> dict:
@@ -113,6 +144,46 @@ class GenerateCodeNode(BaseNode):
             reached without obtaining the desired code.
         """
 
+        reasoning_state = self.prepare(state)
+        try:
+            final_state = self.overall_reasoning_loop(reasoning_state)
+        finally:
+            self.cleanup()
+
+        state.update({self.output[0]: final_state["generated_code"]})
+        return state
+
+    async def aexecute(self, state: dict) -> dict:
+        """
+        Async version of `execute`. Within each repair iteration, the docs
+        retrieval and the error analysis run concurrently, so an iteration
+        lasts as long as its longest call rather than the sum of them.
+
+        Args:
+            state (dict): The current state of the graph.
+
+        Returns:
+            dict: The updated state with the output key containing the generated answer.
+        """
+        reasoning_state = await asyncio.to_thread(self.prepare, state)
+        try:
+            final_state = await self.aoverall_reasoning_loop(reasoning_state)
+        finally:
+            self.cleanup()
+
+        state.update({self.output[0]: final_state["generated_code"]})
+        return state
+
+    def prepare(self, state: dict) -> dict:
+        """
+        Sets up the retriever, execution pool and page fixtures of a run.
+
+        Args:
+            state (dict): The current state of the graph.
+
+        Returns:
+            dict: The initial state of the reasoning process.
+        """
         self.logger.info(f"--- Executing {self.node_name} Node ---")
 
         user_prompt = state.get("user_prompt")
@@ -122,8 +193,19 @@ class GenerateCodeNode(BaseNode):
         vectorial_db = state.get("vectorial_db")
         answer = state.get("answer")
         self.raw_html = state.get("original_html", [None])[0].page_content if state.get("original_html") else None
+        self.retriever = HybridRetriever(
+            vectorial_db,
+            self.node_config.get("embedder_model") or OpenAIEmbeddings(),
+            self.retrieval_cfg,
+        )
+
+        self.execution_pool = shared_pool(self.execution_pool_cfg)
 
         simplefied_schema = str(transform_schema(self.output_schema.schema()))
+        self.schema_fields = schema_fields(self.output_schema.schema())
+        self.schema_validator = SchemaValidator.from_config(
+            self.output_schema.schema(), self.schema_validation_cfg
+        )
 
         reasoning_state = {
             "user_input":       user_prompt,
@@ -134,15 +216,43 @@ class GenerateCodeNode(BaseNode):
             "vectorial_db":     vectorial_db,
             "generated_code":   "",
             "execution_result": None,
+            "execution_failure": None,
+            # (code, ExecutionResult) of a run the execution loop starts from instead of running the code again
+            "recorded_execution": None,
+            "execution_items":  [],
+            "validation_report": None,
             "reference_answer": answer,
             "errors":           {"syntax": [], "execution": [], "validation": [], "semantic": []},
             "iteration":        0,
         }
 
-        final_state = self.overall_reasoning_loop(reasoning_state)
+        self.page_fixtures = (
+            PageFixtures(
+                self.page_fixtures_cfg["path"],
+                state.get("url") or state.get("local_dir"),
+                self.page_fixtures_cfg["ttl"],
+            )
+            if self.page_fixtures_cfg["enabled"]
+            else None
+        )
+        return reasoning_state
 
-        state.update({self.output[0]: final_state["generated_code"]})
-        return state
+    def cleanup(self) -> None:
+        """
+        Releases the page fixtures of a run and reports its retrieval and completion cache usage.
+        """
+        if self.page_fixtures is not None:
+            self.page_fixtures.close()
+        if self.retriever.cache is not None:
+            self.logger.info(
+                f"--- (Retrieval cache: {self.retriever.cache_hits} hits, "
+                f"{self.retriever.cache_misses} misses) ---"
+            )
+        if self.completion_cache is not None and self.llm_model.cache is self.completion_cache:
+            self.logger.info(
+                f"--- (Completion cache: {self.completion_cache.hits} hits, "
+                f"{self.completion_cache.misses} misses) ---"
+            )
 
     def overall_reasoning_loop(self, state: dict) -> dict:
         """
@@ -159,37 +269,104 @@ class GenerateCodeNode(BaseNode):
             is reached without obtaining the desired code.
         """
         self.logger.info("--- (Generating Code) ---")
-        state["generated_code"] = self.generate_initial_code(state)
-        state["generated_code"] = extract_code(state["generated_code"])
+        if self.speculative["enabled"]:
+            state = self.speculative_generation(state)
+            if state["execution_result"] is not None and not state["errors"]["execution"]:
+                self.logger.info("--- (Validate the Code Output Schema) ---")
+                state = self.validation_reasoning_loop(state)
+                if not state["errors"]["execution"] and not state["errors"]["validation"]:
+                    self.logger.info("--- (Code Generated Correctly) ---")
+                    return state
+        else:
+            state["generated_code"] = self.generate_initial_code(state)
+            state["generated_code"] = extract_code(state["generated_code"])
 
         while state["iteration"] < self.max_iterations["overall"]:
             state["iteration"] += 1
-            if self.verbose:
-                self.logger.info(f"--- Iteration {state['iteration']} ---")
-
-            self.logger.info("--- (Checking Code Syntax) ---")
-            state = self.syntax_reasoning_loop(state)
-            if state["errors"]["syntax"]:
-                continue
-
-            self.logger.info("--- (Executing the Generated Code) ---")
-            state = self.execution_reasoning_loop(state)
-            if state["errors"]["execution"]:
-                continue
-
-            # self.logger.info("--- (Validate the Code Output Schema) ---")
-            # state = self.validation_reasoning_loop(state)
-            # if state["errors"]["validation"]:
-            #     continue
-
-            # self.logger.info(
-            #     """--- (Checking if the informations exctrcated are the ones Requested) ---"""
-            # )
-            # state = self.semantic_comparison_loop(state)
-            # if state["errors"]["semantic"]:
-            #     continue
-            break
+            with span(f"iteration {state['iteration']}", "iteration", iteration=state["iteration"]):
+                if self.verbose:
+                    self.logger.info(f"--- Iteration {state['iteration']} ---")
+
+                self.logger.info("--- (Checking Code Syntax) ---")
+                state = self.syntax_reasoning_loop(state)
+                if state["errors"]["syntax"]:
+                    continue
+
+                self.logger.info("--- (Executing the Generated Code) ---")
+                state = self.execution_reasoning_loop(state)
+                if state["errors"]["execution"]:
+                    continue
+
+                self.logger.info("--- (Validate the Code Output Schema) ---")
+                state = self.validation_reasoning_loop(state)
+                if state["errors"]["execution"] or state["errors"]["validation"]:
+                    continue
+
+                # self.logger.info(
+                #     """--- (Checking if the informations exctrcated are the ones Requested) ---"""
+                # )
+                # state = self.semantic_comparison_loop(state)
+                # if state["errors"]["semantic"]:
+                #     continue
+                break
+
+        self.check_completed(state)
+        self.logger.info("--- (Code Generated Correctly) ---")
+
+        return state
+
+    async def aoverall_reasoning_loop(self, state: dict) -> dict:
+        """
+        Async version of `overall_reasoning_loop`.
+        """
+        self.logger.info("--- (Generating Code) ---")
+        if self.speculative["enabled"]:
+            state = await asyncio.to_thread(self.speculative_generation, state)
+            if state["execution_result"] is not None and not state["errors"]["execution"]:
+                self.logger.info("--- (Validate the Code Output Schema) ---")
+                state = await asyncio.to_thread(self.validation_reasoning_loop, state)
+                if not state["errors"]["execution"] and not state["errors"]["validation"]:
+                    self.logger.info("--- (Code Generated Correctly) ---")
+                    return state
+        else:
+            state["generated_code"] = await self.agenerate_initial_code(state)
+            state["generated_code"] = extract_code(state["generated_code"])
+
+        while state["iteration"] < self.max_iterations["overall"]:
+            state["iteration"] += 1
+            with span(f"iteration {state['iteration']}", "iteration", iteration=state["iteration"]):
+                if self.verbose:
+                    self.logger.info(f"--- Iteration {state['iteration']} ---")
+
+                self.logger.info("--- (Checking Code Syntax) ---")
+                state = await asyncio.to_thread(self.syntax_reasoning_loop, state)
+                if state["errors"]["syntax"]:
+                    continue
+
+                self.logger.info("--- (Executing the Generated Code) ---")
+                state = await self.aexecution_reasoning_loop(state)
+                if state["errors"]["execution"]:
+                    continue
+
+                self.logger.info("--- (Validate the Code Output Schema) ---")
+                state = await asyncio.to_thread(self.validation_reasoning_loop, state)
+                if state["errors"]["execution"] or state["errors"]["validation"]:
+                    continue
+                break
+
+        self.check_completed(state)
+        self.logger.info("--- (Code Generated Correctly) ---")
+
+        return state
+
+    def check_completed(self, state: dict) -> None:
+        """
+        Raises if the iterations ran out while errors remain.
 
+        Raises:
+            RuntimeError: If the maximum number of iterations
+            is reached without obtaining the desired code.
+        """
         if state["iteration"] == self.max_iterations["overall"] and (
             state["errors"]["syntax"]
             or state["errors"]["execution"]
@@ -200,9 +377,108 @@ class GenerateCodeNode(BaseNode):
                 "Max iterations reached without obtaining the desired code."
             )
 
-        self.logger.info("--- (Code Generated Correctly) ---")
+    def speculative_generation(self, state: dict) -> dict:
+        """
+        Generates `speculative["candidates"]` diverse candidates concurrently,
+        checks and runs each as soon as it is written, and keeps the first one
+        that executes successfully; the other candidates are cancelled and their
+        processes killed.
 
-        return state
+        If none succeeds, the state holds the first candidate that got furthest
+        (executed with an error, else failed the syntax check) with its error,
+        for the repair loop to continue from; the execution loop starts from
+        its recorded run instead of running it again.
+
+        Args:
+            state (dict): The current state of the reasoning process.
+
+        Returns:
+            dict: The updated state.
+        """
+        prompt = self.initial_code_prompt(state)
+        count = self.speculative["candidates"]
+        cancelled = threading.Event()
+        running: List[subprocess.Popen] = []
+        lock = threading.Lock()
+
+        def on_start(proc):
+            with lock:
+                if cancelled.is_set():
+                    kill_tree(proc)
+                else:
+                    running.append(proc)
+
+        def attempt(index):
+            with span("candidate", "candidate", index=index) as candidate:
+                chain = prompt | self.candidate_model(index) | StrOutputParser()
+                code = extract_code(chain.invoke({}))
+                valid, message = self.syntax_check(code)
+                if not valid:
+                    candidate.set(status="syntax")
+                    return code, "syntax", message
+                if cancelled.is_set():
+                    candidate.set(status="cancelled")
+                    return code, "cancelled", None
+                result = self.run_code(code, on_start)
+                candidate.set(status=result.status)
+                return code, result.status, result
+
+        self.logger.info(f"--- (Generating {count} Candidates in Parallel) ---")
+        executor = ThreadPoolExecutor(max_workers=count)
+        futures = [executor.submit(in_context(attempt), index) for index in range(count)]
+        results = []
+        try:
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as exc:
+                    self.logger.info(f"--- (Candidate Generation Failed: {exc}) ---")
+                    continue
+                if results[-1][1] == "ok":
+                    break
+        finally:
+            with lock:
+                cancelled.set()
+                for proc in running:
+                    if proc.poll() is None:
+                        kill_tree(proc)
+            # LLM calls still in flight cannot be interrupted: their threads finish
+            # in the background and any candidate they start is killed at once.
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.collect_page_fixtures()
+
+        for status in ("ok", "error", "timeout", "syntax"):
+            best = next((result for result in results if result[1] == status), None)
+            if best is not None:
+                break
+        else:
+            state["generated_code"] = extract_code(self.generate_initial_code(state))
+            return state
+
+        code, status, outcome = best
+        state["generated_code"] = code
+        if status == "syntax":
+            state["errors"]["syntax"] = [outcome]
+            return state
+        if status == "ok":
+            self.logger.info("--- (Candidate Executed Successfully) ---")
+        else:
+            state["recorded_execution"] = (code, outcome)
+        return self.record_execution(state, outcome)
+
+    def candidate_model(self, index: int):
+        """
+        Returns a copy of the LLM with the temperature (and seed, if one is set)
+        of the candidate `index`, so that speculative candidates differ.
+        """
+        temperatures = self.speculative["temperatures"]
+        updates = {"temperature": temperatures[index % len(temperatures)]}
+        if getattr(self.llm_model, "seed", None) is not None:
+            updates["seed"] = self.llm_model.seed + index
+        updates = {key: value for key, value in updates.items() if hasattr(self.llm_model, key)}
+        if not updates or not hasattr(self.llm_model, "model_copy"):
+            return self.llm_model
+        return use_completion_cache(self.llm_model.model_copy(update=updates), self.completion_cache)
 
     def syntax_reasoning_loop(self, state: dict) -> dict:
         """
@@ -214,226 +490,303 @@ class GenerateCodeNode(BaseNode):
         Returns:
             dict: The updated state after the syntax reasoning loop.
         """
-        for _ in range(self.max_iterations["syntax"]):
-            syntax_valid, syntax_message = self.syntax_check(state["generated_code"])
-            if syntax_valid:
-                state["errors"]["syntax"] = []
-                return state
-
-            state["errors"]["syntax"] = [syntax_message]
-            self.logger.info(f"--- (Synax Error Found: {syntax_message}) ---")
-            analysis = syntax_focused_analysis(state, self.llm_model)
-            self.logger.info(
-                """--- (Regenerating Code
-                             to fix the Error) ---"""
-            )
-            state["generated_code"] = syntax_focused_code_generation(
-                state, analysis, self.llm_model
-            )
-            state["generated_code"] = extract_code(state["generated_code"])
+        for attempt in range(self.max_iterations["syntax"]):
+            with span("syntax_repair", "iteration", attempt=attempt + 1):
+                syntax_valid, syntax_message = self.syntax_check(state["generated_code"])
+                if syntax_valid:
+                    state["errors"]["syntax"] = []
+                    return state
+
+                state["errors"]["syntax"] = [syntax_message]
+                self.logger.info(f"--- (Synax Error Found: {syntax_message}) ---")
+                analysis = syntax_focused_analysis(state, self.llm_model)
+                self.logger.info(
+                    """--- (Regenerating Code
+                                 to fix the Error) ---"""
+                )
+                state["generated_code"] = syntax_focused_code_generation(
+                    state, analysis, self.llm_model
+                )
+                state["generated_code"] = extract_code(state["generated_code"])
         return state
 
     def execution_reasoning_loop(self, state: dict) -> dict:
         """
         Executes the execution reasoning loop to ensure the generated code runs without errors.
         """
-        for _ in range(self.max_iterations["execution"]):
-            code = state["generated_code"]
-            
+        for attempt in range(self.max_iterations["execution"]):
+            with span("execution_repair", "iteration", attempt=attempt + 1):
+                result = self.recorded_execution(state)
+                if result is None:
+                    result = self.run_code(state["generated_code"])
+                    self.collect_page_fixtures()
+                    # A timeout may be transient: the same code is run once more.
+                    if result.status == "timeout":
+                        state = self.record_execution(state, result)
+                        continue
+
+                state = self.record_execution(state, result)
+                if result.status == "ok":
+                    return state  # SUCCESS
+
+                execution_error_text = "\n".join(state["errors"]["execution"])
+
+                vector_query = self.search_query(
+                    state,
+                    self.error_query_prompt(state, "execution", execution_error_text),
+                    error=execution_error_text,
+                    code=state["generated_code"],
+                )
+
+                crawlee_snippet = self.retrieve_snippets(
+                    vector_query, self.execution_k, context=execution_error_text
+                )
+
+                analysis_text = execution_focused_analysis(state, self.llm_model)
+                analysis = f"{crawlee_snippet}\n\n{analysis_text}"
+
+                self.logger.info("--- (Regenerating Code to fix the Error) ---")
+                state["generated_code"] = execution_focused_code_generation(state, analysis, self.llm_model)
+                state["generated_code"] = extract_code(state["generated_code"])
+
+        return state
+
+
+    async def aexecution_reasoning_loop(self, state: dict) -> dict:
+        """
+        Async version of `execution_reasoning_loop`: the docs retrieval and the
+        error analysis, which does not depend on it, run concurrently.
+        """
+        for attempt in range(self.max_iterations["execution"]):
+            with span("execution_repair", "iteration", attempt=attempt + 1):
+                result = self.recorded_execution(state)
+                if result is None:
+                    result = await asyncio.to_thread(self.run_code, state["generated_code"])
+                    self.collect_page_fixtures()
+                    # A timeout may be transient: the same code is run once more.
+                    if result.status == "timeout":
+                        state = self.record_execution(state, result)
+                        continue
+
+                state = self.record_execution(state, result)
+                if result.status == "ok":
+                    return state  # SUCCESS
+
+                execution_error_text = "\n".join(state["errors"]["execution"])
+
+                async def retrieve() -> str:
+                    vector_query = await self.asearch_query(
+                        state,
+                        self.error_query_prompt(state, "execution", execution_error_text),
+                        error=execution_error_text,
+                        code=state["generated_code"],
+                    )
+                    return await self.aretrieve_snippets(
+                        vector_query, self.execution_k, context=execution_error_text
+                    )
+
+                crawlee_snippet, analysis_text = await asyncio.gather(
+                    retrieve(),
+                    asyncio.to_thread(execution_focused_analysis, state, self.llm_model),
+                )
+                analysis = f"{crawlee_snippet}\n\n{analysis_text}"
+
+                self.logger.info("--- (Regenerating Code to fix the Error) ---")
+                state["generated_code"] = await asyncio.to_thread(
+                    execution_focused_code_generation, state, analysis, self.llm_model
+                )
+                state["generated_code"] = extract_code(state["generated_code"])
+
+        return state
+
+    def recorded_execution(self, state: dict) -> Optional[ExecutionResult]:
+        """
+        Takes the run recorded by `speculative_generation`, if it ran the current
+        code. It is used once: a timed-out candidate goes straight to the repair,
+        since running the same code again would most likely time out as well.
+        """
+        recorded, state["recorded_execution"] = state.get("recorded_execution"), None
+        if recorded is not None and recorded[0] == state["generated_code"]:
+            return recorded[1]
+        return None
+
+    def run_code(
+        self, code: str, on_start: Optional[Callable[[subprocess.Popen], None]] = None
+    ) -> ExecutionResult:
+        """
+        Runs a candidate script under the execution monitor, which stops it at
+        the first fatal error, on a stall or on timeout. Each run gets its own
+        crawlee storage, removed afterwards; the items it pushes are streamed
+        back with the result, already validated against the output schema.
+
+        Args:
+            code (str): The candidate script.
+            on_start (Callable): Called with the process once started, so that
+                another thread can kill it.
+
+        Returns:
+            ExecutionResult: The status ("ok", "error" or "timeout"), the capped
+            output of the run, the structured failure if it failed, and the
+            pushed items.
+        """
+        with span("run_code", "execution") as execution:
+            tmp_path = storage_dir = None
             try:
                 with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as tmp:
                     tmp.write(code)
                     tmp_path = tmp.name
 
-                proc = subprocess.Popen(
-                    [sys.executable, tmp_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    bufsize=1
+                storage_dir = tempfile.mkdtemp(prefix="ds490-storage-")
+                proc = self.start_candidate(tmp_path, storage_dir)
+                if on_start is not None:
+                    on_start(proc)
+                execution.set(pid=proc.pid)
+
+                validation = self.schema_validator.stream()
+                result = self.execution_monitor.watch(proc, tmp_path, on_item=validation.feed)
+                result = result._replace(validation=validation.report())
+                execution.set(
+                    status=result.status,
+                    failure=result.failure.kind if result.failure is not None else None,
+                    items=result.validation.total,
                 )
-
-                try:
-                    output_lines = []
-                    for line in proc.stdout:
-                        output_lines.append(line)
-                    
-                    proc.wait(timeout=60)
-
-                except subprocess.TimeoutExpired:
-                    proc.kill()
-                    state["errors"]["execution"] = ["Execution timed out."]
+                if result.status == "timeout":
                     self.logger.info("--- (Code Execution Error: Execution timed out) ---")
-                    continue
-
-                full_output = ''.join(output_lines)
-
-                if proc.returncode == 0:
-                    if "ERROR" in full_output:
-                        err = full_output.strip()
-                        state["errors"]["execution"] = [err]
-                        self.logger.info(f"--- (Code Execution Error) ---")
-                    else:
-                        state["execution_result"] = full_output.strip()
-                        state["errors"]["execution"] = []
-                        return state  # SUCCESS
-                else:
-                    err = full_output.strip()
-                    state["errors"]["execution"] = [err]
-                    self.logger.info(f"--- (Code Execution Error) ---")
+                elif result.status == "error":
+                    self.logger.info(f"--- (Code Execution Error: {result.failure.kind}) ---")
+                return result
 
             except Exception as exc:
-                err = str(exc)
-                state["errors"]["execution"] = [err]
                 self.logger.info(f"--- (Code Execution Exception) ---")
+                failure = ExecutionFailure("exit", type(exc).__name__, str(exc), None, None, "", "")
+                execution.set(status="error", failure=failure.kind)
+                return ExecutionResult("error", str(exc), failure)
 
             finally:
                 try:
                     os.remove(tmp_path)
                 except Exception:
                     pass
+                if storage_dir is not None:
+                    shutil.rmtree(storage_dir, ignore_errors=True)
 
-            execution_error_text = "\n".join(state["errors"]["execution"])
-
-            query_rewrite_prompt = PromptTemplate(
-                template=(
-                    '''
-                    Given the following context:\n\n
-                    - html analysis: \n{html_analysis}\n
-                    - execution error: \n{execution_error}\n\n
-                    Write a concise technical query (max 1-2 sentences) that retrieves relevant documentation or code examples \
-                    from a vector database that stores Python web scraping library (Crawlee) documentation. This will be used to help a LLM resolve an error that occured during execution. \
-                    The query must be Only return the prompt as it will be directly used as a query for the database.
-                    '''
-                ),
-                partial_variables={
-                    "html_analysis": state["html_analysis"],
-                    "execution_error": execution_error_text,
-                },
-            )
-
-            chain = query_rewrite_prompt | self.llm_model | StrOutputParser()
-            vector_query = chain.invoke({})
-
-            embedder = self.node_config.get("embedder_model") or OpenAIEmbeddings()
-            query_vector = embedder.embed_query(vector_query)
-            client = state["vectorial_db"]
-            hits = client.search(
-                collection_name="vectorial_collection",
-                query_vector=query_vector,
-                limit=self.execution_k,
-            )
-            snippets = [h.payload.get("text", "") for h in hits]
-
-            crawlee_snippet = (
-                f"\n\n*HITS FROM VECTOR DATABASE (QUERY: '{vector_query}')*:\n"
-                + "\n\n".join(snippets)
-            )
+    def record_execution(self, state: dict, result: ExecutionResult) -> dict:
+        """
+        Stores the outcome of a run in the state: its output on success, else
+        the failure, described for the repair prompts.
+        """
+        if result.status == "ok":
+            state["execution_result"] = result.output
+            state["execution_items"] = result.items or []
+            state["validation_report"] = result.validation
+            state["execution_failure"] = None
+            state["errors"]["execution"] = []
+        else:
+            state["execution_failure"] = result.failure._asdict()
+            state["errors"]["execution"] = [result.failure.describe()]
+        return state
 
-            analysis_text = execution_focused_analysis(state, self.llm_model)
-            analysis = f"{crawlee_snippet}\n\n{analysis_text}"
+    def collect_page_fixtures(self) -> None:
+        """
+        Archives the pages recorded by the runs that just finished.
+        """
+        if self.page_fixtures is not None:
+            recorded = self.page_fixtures.collect()
+            if recorded:
+                self.logger.info(f"--- (Recorded {recorded} responses for the next attempts) ---")
 
-            self.logger.info("--- (Regenerating Code to fix the Error) ---")
-            state["generated_code"] = execution_focused_code_generation(state, analysis, self.llm_model)
-            state["generated_code"] = extract_code(state["generated_code"])
+    def start_candidate(self, path: str, storage_dir: str) -> subprocess.Popen:
+        """
+        Starts a candidate script, in a pre-warmed worker when the execution pool is enabled.
+        The first run records the pages it fetches, later runs replay them.
 
-        return state
+        Args:
+            path (str): The script to run.
+            storage_dir (str): The crawlee storage directory of this run.
 
+        Returns:
+            subprocess.Popen: The running process, its combined output readable
+            from `stdout` and its pushed items from `results`.
+        """
+        env = {
+            "CRAWLEE_STORAGE_DIR": storage_dir,
+            "CRAWLEE_PURGE_ON_START": "true",
+            # In memory unless configured otherwise: the items come back through `results`.
+            "CRAWLEE_PERSIST_STORAGE": "true" if self.run_storage["persist"] else "false",
+        }
+        if self.page_fixtures is not None:
+            env.update(self.page_fixtures.env())
+        if self.execution_pool is not None:
+            return self.execution_pool.run(path, env=env)
+        return run_candidate(path, env=env)
 
     def validation_reasoning_loop(self, state: dict) -> dict:
         """
         Executes the validation reasoning loop to ensure the
         generated code's output matches the desired schema.
+
+        The items are the ones the last successful run pushed to its datasets,
+        streamed back by the execution (see `run_code`). Every repaired script
+        is run again and its own items validated; if it no longer executes, the
+        loop stops with the execution error for the overall loop to repair.
         """
-        storage_dir = os.path.join(os.getcwd(), "storage", "datasets", "default")
-        try:
-            files = [
-                f for f in os.listdir(storage_dir)
-                if f.endswith(".json") and f != "__metadata__.json"
-            ]
-        except Exception as e:
-            state["errors"]["validation"] = [f"Failed to list output files: {e}"]
-            return state
+        report = self.output_report(state)
+        for attempt in range(self.max_iterations["validation"]):
+            with span("validation_repair", "iteration", attempt=attempt + 1):
+                if report.valid:
+                    state["errors"]["validation"] = []
+                    return state
+
+                state["errors"]["validation"] = report.describe()
+                self.logger.info(
+                    "--- (Code Output not compliant to the desired Output Schema) ---"
+                )
 
-        if not files:
-            state["errors"]["validation"] = ["No output files found in dataset"]
-            return state
+                validation_error_text = "\n".join(state["errors"]["validation"])
 
-        data_items: List[Any] = []
-        for fname in files:
-            try:
-                with open(os.path.join(storage_dir, fname), "r") as f:
-                    data_items.append(json.load(f))
-            except Exception as e:
-                state["errors"]["validation"] = [f"Failed to load '{fname}': {e}"]
-                return state
-
-        result_data = data_items[0] if len(data_items) == 1 else data_items
-        state["execution_result"] = result_data
-
-        for _ in range(self.max_iterations["validation"]):
-            validation, errors = self.validate_dict(
-                state["execution_result"], self.output_schema.schema()
-            )
-            if validation:
-                state["errors"]["validation"] = []
-                return state
+                vector_query = self.search_query(
+                    state,
+                    self.error_query_prompt(state, "validation", validation_error_text),
+                    error=validation_error_text,
+                    code=state["generated_code"],
+                )
 
-            state["errors"]["validation"] = errors
-            self.logger.info(
-                "--- (Code Output not compliant to the desired Output Schema) ---"
-            )
-            
-            validation_error_text = "\n".join(state["errors"]["validation"])
-
-            query_rewrite_prompt = PromptTemplate(
-                template=(
-                    '''
-                    Given the following context:\n\n
-                    - html analysis: \n{html_analysis}\n
-                    - validation error: \n{validation_error}\n\n
-                    Write a concise technical query (max 1-2 sentences) that retrieves relevant documentation or code examples \
-                    from a vector database that stores Python web scraping library (Crawlee) documentation. This will be used to help a LLM resolve an error that occured during execution. \
-                    The query must be Only return the prompt as it will be directly used as a query for the database.
-                    '''
-                ),
-                partial_variables={
-                    "html_analysis": state["html_analysis"],
-                    "validation_error": validation_error_text,
-                },
-            )
-            
-            chain = query_rewrite_prompt | self.llm_model | StrOutputParser()
-            vector_query = chain.invoke({})
-
-            embedder = self.node_config.get("embedder_model") or OpenAIEmbeddings()
-            query_vector = embedder.embed_query(vector_query)
-            client = state["vectorial_db"]
-            hits = client.search(
-                collection_name="vectorial_collection",
-                query_vector=query_vector,
-                limit=self.validation_k,
-            )
-            snippets = [h.payload.get("text", "") for h in hits]
+                crawlee_snippet = self.retrieve_snippets(
+                    vector_query, self.validation_k, context=validation_error_text
+                )
 
-            crawlee_snippet = (
-                f"\n\n*HITS FROM VECTOR DATABASE (QUERY: '{vector_query}')*:\n"
-                + "\n\n".join(snippets)
-            )
-            
-            analysis = validation_focused_analysis(state, self.llm_model)
-            # analysis = f"{crawlee_snippet}\n\n{analysis_text}"
+                analysis_text = validation_focused_analysis(state, self.llm_model)
+                analysis = f"{crawlee_snippet}\n\n{analysis_text}"
 
-            self.logger.info(
-                "--- (Regenerating Code to make the Output compliant) ---"
-            )
-            state["generated_code"] = validation_focused_code_generation(
-                state, analysis, self.llm_model
-            )
-            state["generated_code"] = extract_code(state["generated_code"])
+                self.logger.info(
+                    "--- (Regenerating Code to make the Output compliant) ---"
+                )
+                state["generated_code"] = validation_focused_code_generation(
+                    state, analysis, self.llm_model
+                )
+                state["generated_code"] = extract_code(state["generated_code"])
 
+                result = self.run_code(state["generated_code"])
+                self.collect_page_fixtures()
+                state = self.record_execution(state, result)
+                if result.status != "ok":
+                    return state
+                report = self.output_report(state)
+
+        state["errors"]["validation"] = [] if report.valid else report.describe()
         return state
 
+    def output_report(self, state: dict) -> ValidationReport:
+        """
+        Returns the validation report of the items of the last successful run,
+        and sets them as the execution result (the item itself if there is one).
+        """
+        data_items: List[Any] = state.get("execution_items") or []
+        if data_items:
+            state["execution_result"] = data_items[0] if len(data_items) == 1 else data_items
+        # The items were validated while they streamed in; all violations are reported at once.
+        return state.get("validation_report") or self.schema_validator.validate(data_items)
+
     def semantic_comparison_loop(self, state: dict) -> dict:
         """
         Executes the semantic comparison loop to ensure the generated code's
@@ -445,38 +798,68 @@ class GenerateCodeNode(BaseNode):
         Returns:
             dict: The updated state after the semantic comparison loop.
         """
-        for _ in range(self.max_iterations["semantic"]):
-            comparison_result = self.semantic_comparison(
-                state["execution_result"], state["reference_answer"]
-            )
-            if comparison_result["are_semantically_equivalent"]:
-                state["errors"]["semantic"] = []
-                return state
-
-            state["errors"]["semantic"] = comparison_result["differences"]
-            self.logger.info(
-                """--- (The informations exctrcated
-                             are not the all ones requested) ---"""
-            )
-            analysis = semantic_focused_analysis(
-                state, comparison_result, self.llm_model
-            )
-            self.logger.info(
-                """--- (Regenerating Code to
-                                obtain all the infromation requested) ---"""
-            )
-            state["generated_code"] = semantic_focused_code_generation(
-                state, analysis, self.llm_model
-            )
-            state["generated_code"] = extract_code(state["generated_code"])
+        for attempt in range(self.max_iterations["semantic"]):
+            with span("semantic_repair", "iteration", attempt=attempt + 1):
+                comparison_result = self.semantic_comparison(
+                    state["execution_result"], state["reference_answer"]
+                )
+                if comparison_result["are_semantically_equivalent"]:
+                    state["errors"]["semantic"] = []
+                    return state
+
+                state["errors"]["semantic"] = comparison_result["differences"]
+                self.logger.info(
+                    """--- (The informations exctrcated
+                                 are not the all ones requested) ---"""
+                )
+                analysis = semantic_focused_analysis(
+                    state, comparison_result, self.llm_model
+                )
+                self.logger.info(
+                    """--- (Regenerating Code to
+                                    obtain all the infromation requested) ---"""
+                )
+                state["generated_code"] = semantic_focused_code_generation(
+                    state, analysis, self.llm_model
+                )
+                state["generated_code"] = extract_code(state["generated_code"])
         return state
 
     def generate_initial_code(self, state: dict) -> str:
         """
-        Generates the initial code based on the provided state, using LLM-assisted query rewriting for vector search.
+        Generates the initial code based on the provided state, grounded in the Crawlee docs retrieved for it.
+        """
+        chain = self.initial_code_prompt(state) | self.llm_model | StrOutputParser()
+        return chain.invoke({})
+
+    async def agenerate_initial_code(self, state: dict) -> str:
+        """
+        Async version of `generate_initial_code`.
+        """
+        chain = await self.ainitial_code_prompt(state) | self.llm_model | StrOutputParser()
+        return await chain.ainvoke({})
+
+    def initial_code_prompt(self, state: dict) -> PromptTemplate:
+        """
+        Builds the prompt for the initial code, retrieving the Crawlee docs it is grounded in.
+        """
+        vector_query = self.search_query(state, self.initial_query_prompt(state))
+        crawlee_snippet = self.retrieve_snippets(vector_query, self.initial_k)
+        return self.initial_code_template(state, crawlee_snippet)
+
+    async def ainitial_code_prompt(self, state: dict) -> PromptTemplate:
+        """
+        Async version of `initial_code_prompt`.
         """
+        vector_query = await self.asearch_query(state, self.initial_query_prompt(state))
+        crawlee_snippet = await self.aretrieve_snippets(vector_query, self.initial_k)
+        return self.initial_code_template(state, crawlee_snippet)
 
-        query_rewrite_prompt = PromptTemplate(
+    def initial_query_prompt(self, state: dict) -> PromptTemplate:
+        """
+        Builds the prompt asking the LLM for the docs search query of the initial code.
+        """
+        return PromptTemplate(
             template=(
                 '''
                 Given the following:\n\n
@@ -494,43 +877,147 @@ class GenerateCodeNode(BaseNode):
                 "json_schema"       : state["json_schema"]
                 },
         )
-        
-        output_parser = StrOutputParser()
-        chain = query_rewrite_prompt | self.llm_model | output_parser
-        vector_query = chain.invoke({})
-        
-        embedder = self.node_config.get("embedder_model") or OpenAIEmbeddings()
-        query_vector = embedder.embed_query(vector_query)
-        client = state["vectorial_db"]
-        hits = client.search(
-            collection_name="vectorial_collection",
-            query_vector=query_vector,
-            limit=self.initial_k,
-        )
-        snippets = [h.payload.get("text", "") for h in hits]
-
-        crawlee_snippet = (
-            "\n\n*HITS FROM VECTOR DATABASE (QUERY: '{}')*:\n".format(vector_query)
-            + "\n\n".join(snippets)
-        )
 
-        prompt = PromptTemplate(
-            template=DEFAULT_CRAWLEE_TEMPLATE,
+    def error_query_prompt(self, state: dict, kind: str, error_text: str) -> PromptTemplate:
+        """
+        Builds the prompt asking the LLM for the docs search query to fix an
+        "execution" or "validation" error.
+        """
+        return PromptTemplate(
+            template=(
+                '''
+                Given the following context:\n\n
+                - html analysis: \n{html_analysis}\n
+                - {kind} error: \n{error}\n\n
+                Write a concise technical query (max 1-2 sentences) that retrieves relevant documentation or code examples \
+                from a vector database that stores Python web scraping library (Crawlee) documentation. This will be used to help a LLM resolve an error that occured during execution. \
+                The query must be Only return the prompt as it will be directly used as a query for the database.
+                '''
+            ),
             partial_variables={
-                "user_input":       state["user_input"],
-                "json_schema":      state["json_schema"],
-                "initial_analysis": state["initial_analysis"],
-                "html_code":        state["html_code"],
-                "html_analysis":    state["html_analysis"],
-                "crawlee_snippet":  crawlee_snippet,
+                "html_analysis": state["html_analysis"],
+                "kind": kind,
+                "error": error_text,
             },
         )
-        output_parser = StrOutputParser()
-        chain = prompt | self.llm_model | output_parser
-        generated_code = chain.invoke({})
 
-        return generated_code
+    def initial_code_template(self, state: dict, crawlee_snippet: str) -> PromptTemplate:
+        """
+        Builds the prompt filling the backbone script, given the retrieved docs.
+        If the prompt budget is enabled, the HTML, then the docs, then the
+        analyses are reduced until the prompt fits it.
+        """
+        variables = {
+            "user_input":       state["user_input"],
+            "json_schema":      state["json_schema"],
+            "initial_analysis": state["initial_analysis"],
+            "html_code":        state["html_code"],
+            "html_analysis":    state["html_analysis"],
+            "crawlee_snippet":  crawlee_snippet,
+        }
+        if self.budgeter is not None:
+            keep = self.prompt_budget["html_keep_siblings"]
+            variables = self.budgeter.fit(
+                DEFAULT_CRAWLEE_TEMPLATE,
+                [
+                    Section("user_input", str(variables["user_input"] or ""), 0, fixed=True),
+                    Section("json_schema", str(variables["json_schema"] or ""), 0, fixed=True),
+                    Section("initial_analysis", str(variables["initial_analysis"] or ""), 1),
+                    Section("html_analysis", str(variables["html_analysis"] or ""), 1),
+                    Section("crawlee_snippet", variables["crawlee_snippet"] or "", 2,
+                            (lambda text, _: drop_repeated_paragraphs(text),)),
+                    Section("html_code", str(variables["html_code"] or ""), 3,
+                            (lambda text, _: collapse_html_siblings(text, keep),)),
+                ],
+            )
+        return PromptTemplate(template=DEFAULT_CRAWLEE_TEMPLATE, partial_variables=variables)
+
+    def search_query(
+        self,
+        state: dict,
+        rewrite_prompt: PromptTemplate,
+        error: Optional[str] = None,
+        code: Optional[str] = None,
+    ) -> str:
+        """
+        Returns the docs search query, built locally unless the LLM rewrite is
+        required by `query_rewrite` or the local query has nothing to anchor on.
+
+        Args:
+            state (dict): The current state of the reasoning process.
+            rewrite_prompt (PromptTemplate): The prompt asking the LLM for a query.
+            error (str): The execution or validation error being fixed.
+            code (str): The generated code.
+
+        Returns:
+            str: The search query.
+        """
+        query = self.local_query(state, error, code)
+        if query is not None:
+            return query
+
+        chain = rewrite_prompt | self.llm_model | StrOutputParser()
+        return chain.invoke({})
+
+    async def asearch_query(
+        self,
+        state: dict,
+        rewrite_prompt: PromptTemplate,
+        error: Optional[str] = None,
+        code: Optional[str] = None,
+    ) -> str:
+        """
+        Async version of `search_query`.
+        """
+        query = self.local_query(state, error, code)
+        if query is not None:
+            return query
 
+        chain = rewrite_prompt | self.llm_model | StrOutputParser()
+        return await chain.ainvoke({})
+
+    def local_query(self, state: dict, error: Optional[str], code: Optional[str]) -> Optional[str]:
+        """
+        Returns the locally built search query, or None if `query_rewrite` requires the LLM.
+        """
+        query = build_query(state["user_input"], self.schema_fields, error, code)
+        if self.query_rewrite == "local" or (self.query_rewrite == "auto" and query.anchored):
+            return query.text
+        return None
+
+    def retrieve_snippets(self, vector_query: str, k: int, context: Optional[str] = None) -> str:
+        """
+        Retrieves Crawlee doc snippets and formats them for the prompts.
+
+        Args:
+            vector_query (str): The search query.
+            k (int): Number of snippets to retrieve.
+            context (str): Error text used for the lexical and symbol lookups.
+
+        Returns:
+            str: The snippets, preceded by a header naming the query.
+        """
+        with span("retrieve_snippets", "search", query=vector_query, k=k) as search:
+            hits = self.retriever.search(vector_query, k, context=context)
+            search.set(hits=len(hits))
+        return self.format_snippets(vector_query, hits)
+
+    async def aretrieve_snippets(self, vector_query: str, k: int, context: Optional[str] = None) -> str:
+        """
+        Async version of `retrieve_snippets`.
+        """
+        with span("retrieve_snippets", "search", query=vector_query, k=k) as search:
+            hits = await self.retriever.asearch(vector_query, k, context=context)
+            search.set(hits=len(hits))
+        return self.format_snippets(vector_query, hits)
+
+    @staticmethod
+    def format_snippets(vector_query: str, hits: List[dict]) -> str:
+        snippets = [hit.get("text", "") for hit in hits]
+        return (
+            f"\n\n*HITS FROM VECTOR DATABASE (QUERY: '{vector_query}')*:\n"
+            + "\n\n".join(snippets)
+        )
 
     def semantic_comparison(
         self, generated_result: Any, reference_result: Any
@@ -591,7 +1078,8 @@ class GenerateCodeNode(BaseNode):
 
     def syntax_check(self, code):
         """
-        Checks the syntax of the provided code.
+        Checks the syntax of the provided code and, if enabled, its use of the
+        installed crawlee and playwright APIs (imports, attributes, call signatures).
 
         Args:
             code (str): The code to be checked for syntax errors.
@@ -601,9 +1089,13 @@ class GenerateCodeNode(BaseNode):
         """
         try:
             ast.parse(code)
-            return True, "Syntax is correct."
         except SyntaxError as e:
             return False, f"Syntax error: {str(e)}"
+        if self.api_check["enabled"]:
+            api_errors = check_api(code, self.api_check["packages"])
+            if api_errors:
+                return False, "API errors (the code would fail when run):\n" + "\n".join(api_errors)
+        return True, "Syntax is correct."
 
     def create_sandbox_and_execute(self, function_code):
         """
@@ -647,16 +1139,17 @@ class GenerateCodeNode(BaseNode):
         Validates the provided data against the given schema.
 
         Args:
-            data (dict): The data to be validated.
+            data (dict): The data to be validated, one item or a list of items.
             schema (dict): The schema against which the data is validated.
 
         Returns:
             tuple: A tuple containing a boolean indicating
             if the validation was successful and a list of errors if any.
         """
-        try:
-            validate(instance=data, schema=schema)
+        validator = self.schema_validator if schema == self.schema_validator.compiled.schema \
+            else SchemaValidator.from_config(schema, self.schema_validation_cfg)
+        items = data if isinstance(data, list) and not validator.collection else [data]
+        report = validator.validate(items)
+        if report.valid:
             return True, None
-        except JSONSchemaValidationError as e:
-            errors = [e.message]
-            return False, errors
+        return False, report.describe()
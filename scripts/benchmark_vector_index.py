@@ -0,0 +1,129 @@
+"""Benchmark compact representations of the Crawlee docs index.
+
+To run:
+
+python3 -m scripts.benchmark_vector_index
+python3 -m scripts.benchmark_vector_index --backend local_db -k 5 --queries 500
+
+Every variant (int8, binary, truncated and PCA-reduced dimensions, with and without
+full-precision rerank) is built from the vectors of an existing index and compared
+to exact full-precision search. Queries are stored vectors perturbed with gaussian
+noise, so the benchmark runs offline without calling the embedding API.
+
+Reports, per variant: size of the scanned codes, time to open the index and answer
+the first query, mean query latency and recall@k against the full-precision index.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from src.defaults import NODE_DEFAULTS
+from src.quantization import compact_size
+from src.vector_index import NumpyVectorIndex, create_client, index_path
+
+VARIANTS = [
+    # (quantization, dimensions, reduction, rerank_factor)
+    (None, None, "truncate", 0),
+    ("int8", None, "truncate", 0),
+    ("int8", None, "truncate", 4),
+    ("binary", None, "truncate", 0),
+    ("binary", None, "truncate", 4),
+    ("binary", None, "truncate", 10),
+    (None, 512, "truncate", 4),
+    (None, 256, "pca", 4),
+    ("int8", 256, "pca", 4),
+    ("binary", 512, "pca", 10),
+]
+
+
+def load_points(backend, path, collection_name):
+    """Read every point (id, vector, payload) of an existing index."""
+    client = create_client(backend, path)
+    if not client.collection_exists(collection_name):
+        raise SystemExit(f"No collection {collection_name} in {path}. Build it first with scripts/build_docs_index.py")
+    if backend == "numpy":
+        return client.points(collection_name)
+
+    points, offset = [], None
+    while True:
+        batch, offset = client.scroll(collection_name, limit=256, offset=offset,
+                                      with_payload=True, with_vectors=True)
+        points.extend({"id": p.id, "vector": p.vector, "payload": p.payload} for p in batch)
+        if offset is None:
+            break
+    client.close()
+    return points
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure recall@k, size and latency of compact docs indexes.")
+
+    parser.add_argument("-b", "--backend", choices=["local_db", "numpy"], default="numpy",
+                        help="Backend of the full-precision index to read the vectors from")
+    parser.add_argument("-i", "--index-path",
+                        help="Index directory (default: the configured path for the backend)")
+    parser.add_argument("-k", type=int, default=NODE_DEFAULTS["retrieval"]["execution_k"],
+                        help="Number of hits per query (default: %(default)s)")
+    parser.add_argument("-q", "--queries", type=int, default=200,
+                        help="Number of noisy queries (default: %(default)s)")
+    parser.add_argument("-n", "--noise", type=float, default=0.5,
+                        help="Norm of the gaussian noise added to each query, relative to the vector (default: %(default)s)")
+
+    args = parser.parse_args()
+    collection_name = NODE_DEFAULTS["rag"]["collection_name"]
+    path = args.index_path or index_path(args.backend, {})
+
+    points = load_points(args.backend, path, collection_name)
+    vectors = np.asarray([p["vector"] for p in points], dtype=np.float32)
+    count, dim = vectors.shape
+    print(f"Loaded {count} vectors of {dim} dimensions from {path}\n")
+
+    rng = np.random.default_rng(0)
+    rows = rng.choice(count, size=min(args.queries, count), replace=False)
+    base = vectors[rows] / np.linalg.norm(vectors[rows], axis=1, keepdims=True)
+    noise = rng.normal(size=base.shape)
+    noise *= args.noise / np.linalg.norm(noise, axis=1, keepdims=True)
+    queries = base + noise
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        truth = None
+        print(f"{'variant':<32}{'codes':>10}{'ratio':>8}{'open ms':>10}{'query ms':>10}{'recall@' + str(args.k):>11}")
+        for quantization, dimensions, reduction, rerank_factor in VARIANTS:
+            variant_dir = os.path.join(work_dir, f"{quantization}-{dimensions}-{reduction}")
+            writer = NumpyVectorIndex(variant_dir, quantization, dimensions, reduction)
+            if not writer.collection_exists(collection_name):
+                writer.create_collection(collection_name)
+                writer.upsert(collection_name, points)
+
+            started = time.perf_counter()
+            index = NumpyVectorIndex(variant_dir, quantization, dimensions, reduction, rerank_factor)
+            index.search(collection_name, queries[0], args.k)
+            open_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            results = [{hit.id for hit in index.search(collection_name, q, args.k)} for q in queries]
+            query_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+            if truth is None:
+                truth = results
+            recall = np.mean([len(r & t) / len(t) for r, t in zip(results, truth)])
+            size = compact_size(count, min(dimensions or dim, dim), quantization)
+            name = " ".join(filter(None, [
+                quantization or "float32",
+                f"d={min(dimensions or dim, dim)}",
+                reduction if dimensions else None,
+                f"rerank={rerank_factor}",
+            ]))
+            print(f"{name:<32}{size / 1024:>9.0f}K{count * dim * 4 / size:>7.1f}x"
+                  f"{open_ms:>10.2f}{query_ms:>10.3f}{recall:>11.3f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Build or refresh the Crawlee docs index used by RAGNode.
+
+To run:
+
+python3 -m scripts.build_docs_index build --snapshot crawlee-docs-0.6.8.tar.gz
+python3 -m scripts.build_docs_index refresh --snapshot crawlee-docs/
+python3 -m scripts.build_docs_index refresh            # live crawl of crawlee.dev
+
+`build` re-embeds every page, `refresh` only embeds pages that are new or changed
+since the last build. The index is written to databases/crawlee_<version> by default,
+where <version> is the installed crawlee version, so that generated code is grounded
+in the same API version that runs it.
+"""
+import argparse
+import contextlib
+
+from dotenv import load_dotenv
+
+from nodes.crawlee_rag_node import RAGNode
+from src.defaults import NODE_DEFAULTS
+from src.docs_index import installed_crawlee_version, load_manifest
+from src.embedding_cache import cached_embedder
+from src.retrieval_service import open_service
+from src.vector_index import index_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the Crawlee docs vector index.")
+
+    parser.add_argument("command", choices=["build", "refresh"],
+                        help="'build' re-embeds every page, 'refresh' only new or changed pages")
+    parser.add_argument("-s", "--snapshot",
+                        help="Local docs snapshot (directory or archive). Crawls the live docs if omitted")
+    parser.add_argument("-p", "--prefix", default=NODE_DEFAULTS["rag"]["snapshot_prefix"],
+                        help="Only index snapshot pages under this relative path (default: %(default)s)")
+    parser.add_argument("-u", "--base-url",
+                        help="Base url used as page source for snapshot pages (e.g. https://crawlee.dev/python/)")
+    parser.add_argument("-b", "--backend", choices=["local_db", "numpy"], default="local_db",
+                        help="'local_db' for a local qdrant collection, 'numpy' for a memory-mapped index")
+    parser.add_argument("-i", "--index-path",
+                        help="Index directory, may contain {crawlee_version} "
+                             f"(default: {NODE_DEFAULTS['rag']['client_path']} or {NODE_DEFAULTS['rag']['numpy_path']})")
+    parser.add_argument("-v", "--crawlee-version", default=installed_crawlee_version(),
+                        help="Crawlee version the index is built for (default: installed version)")
+
+    args = parser.parse_args()
+    load_dotenv()
+
+    from langchain_openai import OpenAIEmbeddings
+
+    paths = {"client_path": args.index_path, "numpy_path": args.index_path}
+    path = index_path(args.backend, paths, args.crawlee_version)
+
+    # A private handle: the process-wide shared service must stay open for its other users.
+    with contextlib.closing(open_service(args.backend, path)) as client:
+        rag_node = RAGNode(
+            input=None,
+            output=["vectorial_db"],
+            node_config={
+                "llm_model": None,
+                "embedder_model": cached_embedder(OpenAIEmbeddings()),
+                "client_type": args.backend,
+                **paths,
+                "crawlee_version": args.crawlee_version,
+                "index_mode": "rebuild" if args.command == "build" else "incremental",
+                "docs_source": args.snapshot or "live",
+                "snapshot_prefix": args.prefix,
+                "snapshot_base_url": args.base_url,
+                "refresh": True,
+                "index_client": client,
+            },
+        )
+        rag_node.execute({})
+
+    manifest = load_manifest(rag_node.client_path)
+    print(f"\nIndexed {len(manifest['pages'])} pages for crawlee {args.crawlee_version} "
+          f"into {rag_node.client_path}")
+
+
+if __name__ == '__main__':
+    main()
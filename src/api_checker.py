@@ -0,0 +1,606 @@
+"""
+Static check of generated scrapers against the installed crawlee and playwright APIs.
+
+`ast.parse` accepts a scraper that imports a name crawlee does not export,
+misspells a context method or passes a keyword a crawler does not take; those
+only show up after a full run in a browser, and then cost another repair
+round-trip. `check_api` finds them in milliseconds: it resolves the imports,
+follows attribute chains on the imported objects and on annotated variables
+(`context: PlaywrightCrawlingContext`, then `context.page` typed as a playwright
+`Page`, ...) through a symbol table introspected from the installed packages,
+and binds the arguments of every resolved call to its signature.
+
+Anything it cannot resolve (untyped names, dynamic attributes, unions) is left
+alone, so every reported error is one the interpreter would raise as well.
+"""
+
+import ast
+import collections.abc
+import dataclasses
+import difflib
+import importlib
+import importlib.util
+import inspect
+import re
+import sys
+import types
+import typing
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+CHECKED_PACKAGES = ("crawlee", "playwright")
+# Public API modules whose names resolve string annotations that the packages
+# only import under TYPE_CHECKING (e.g. crawlee's `page: Page`).
+NAMESPACE_MODULES = ("crawlee", "crawlee.crawlers", "crawlee.storages", "playwright.async_api")
+MAX_ERRORS = 10
+
+_SELF_ATTRIBUTE_RE = re.compile(r"\bself\.(\w+)\s*(?::[^=\n]+)?=(?!=)")
+_UNEXPECTED_KEYWORD_RE = re.compile(r"unexpected keyword argument '(\w+)'")
+
+
+class _Ref(NamedTuple):
+    """
+    What an expression resolves to: a module, a class, an instance of a class,
+    a function or a method (a function taking `self` first).
+    """
+    kind: str
+    obj: Any
+    name: str
+
+
+def _top_package(name: str) -> str:
+    return name.split(".", 1)[0]
+
+
+@lru_cache(maxsize=None)
+def _import(module: str):
+    """
+    Imports a module, returning None if it does not exist.
+    """
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        return None
+
+
+def _module_attribute(module, name: str):
+    """
+    Returns an attribute of a module, or None if it is missing or is an optional
+    dependency that is not installed (crawlee raises ImportError on access to those).
+    """
+    try:
+        return getattr(module, name, None)
+    except ImportError:
+        return None
+
+
+def _import_error(module, name: str) -> Optional[str]:
+    """
+    Returns the error raised when importing `name` from a module, if it is an
+    optional dependency that is not installed.
+    """
+    try:
+        getattr(module, name, None)
+    except ImportError as e:
+        return str(e)
+    return None
+
+
+@lru_cache(maxsize=None)
+def _installed(package: str) -> bool:
+    return importlib.util.find_spec(package) is not None and _import(package) is not None
+
+
+@lru_cache(maxsize=None)
+def _fallback_namespace() -> Dict[str, Any]:
+    namespace: Dict[str, Any] = {}
+    for module_name in NAMESPACE_MODULES:
+        module = _import(module_name) if _installed(_top_package(module_name)) else None
+        if module is not None:
+            namespace.update({k: v for k, v in vars(module).items() if inspect.isclass(v)})
+    return namespace
+
+
+@lru_cache(maxsize=None)
+def _namespace(module_name: str) -> Dict[str, Any]:
+    """
+    Returns the names available to the annotations of a module, including the
+    ones it imports only under `if TYPE_CHECKING:`.
+    """
+    module = sys.modules.get(module_name)
+    namespace = dict(_fallback_namespace())
+    if module is None:
+        return namespace
+    try:
+        tree = ast.parse(inspect.getsource(module))
+    except (OSError, TypeError, SyntaxError):
+        tree = ast.Module(body=[], type_ignores=[])
+    for node in tree.body:
+        test = getattr(node, "test", None) if isinstance(node, ast.If) else None
+        if getattr(test, "id", getattr(test, "attr", None)) != "TYPE_CHECKING":
+            continue
+        for statement in ast.walk(node):
+            if not isinstance(statement, ast.ImportFrom):
+                continue
+            source = statement.module or ""
+            if statement.level:
+                package = module.__name__ if hasattr(module, "__path__") else module.__package__ or ""
+                base = package.rsplit(".", statement.level - 1)[0] if statement.level > 1 else package
+                source = f"{base}.{source}" if source else base
+            imported = _import(source)
+            for alias in statement.names:
+                value = _module_attribute(imported, alias.name) if imported is not None else None
+                if value is not None:
+                    namespace[alias.asname or alias.name] = value
+    namespace.update(vars(module))
+    return namespace
+
+
+@lru_cache(maxsize=None)
+def _hints(obj) -> Dict[str, Any]:
+    """
+    Returns the evaluated annotations of a class (across its MRO) or function,
+    skipping the ones that cannot be evaluated.
+    """
+    owners = [c for c in reversed(obj.__mro__)] if inspect.isclass(obj) else [obj]
+    hints: Dict[str, Any] = {}
+    for owner in owners:
+        annotations = getattr(owner, "__dict__", {}).get("__annotations__", {}) if inspect.isclass(owner) \
+            else getattr(owner, "__annotations__", {})
+        namespace = _namespace(getattr(owner, "__module__", None) or "")
+        for name, annotation in dict(annotations).items():
+            if isinstance(annotation, str):
+                try:
+                    annotation = eval(annotation, namespace)
+                except Exception:
+                    continue
+            hints[name] = annotation
+    return hints
+
+
+@lru_cache(maxsize=None)
+def _members(cls) -> frozenset:
+    """
+    Returns the attribute names available on instances of a class: class
+    attributes, annotated and dataclass or pydantic fields, slots and the
+    attributes assigned to `self` in the methods.
+    """
+    names = set(dir(cls))
+    for owner in cls.__mro__:
+        names.update(owner.__dict__.get("__annotations__", {}))
+        slots = owner.__dict__.get("__slots__", ())
+        names.update([slots] if isinstance(slots, str) else slots)
+        for value in owner.__dict__.values():
+            if inspect.isfunction(value):
+                try:
+                    names.update(_SELF_ATTRIBUTE_RE.findall(inspect.getsource(value)))
+                except (OSError, TypeError):
+                    pass
+    if dataclasses.is_dataclass(cls):
+        names.update(field.name for field in dataclasses.fields(cls))
+    names.update(getattr(cls, "model_fields", None) or {})
+    return frozenset(names)
+
+
+def _dynamic(cls) -> bool:
+    """
+    Whether instances of a class resolve attributes dynamically.
+    """
+    return any("__getattr__" in owner.__dict__ for owner in cls.__mro__ if owner is not object)
+
+
+def _suggestion(name: str, candidates: Iterable[str]) -> str:
+    public = [c for c in candidates if not c.startswith("_")]
+    matches = difflib.get_close_matches(name, public, n=1)
+    return f" (did you mean '{matches[0]}'?)" if matches else ""
+
+
+class ApiChecker(ast.NodeVisitor):
+    """
+    Resolves the crawlee and playwright symbols used by a script and records the errors.
+
+    Args:
+        packages (Iterable[str]): Top-level packages whose API is checked.
+    """
+
+    def __init__(self, packages: Iterable[str] = CHECKED_PACKAGES):
+        self.packages = tuple(p for p in packages if _installed(p))
+        self.names: Dict[str, _Ref] = {}
+        self.errors: List[str] = []
+
+    def check(self, code: str) -> List[str]:
+        """
+        Checks a script, returning its API errors as "line N: ..." messages.
+        """
+        if not self.packages:
+            return []
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return []
+        self.visit(tree)
+        return list(dict.fromkeys(self.errors))[:MAX_ERRORS]
+
+    def checked(self, obj) -> bool:
+        module = getattr(obj, "__module__", None) or getattr(obj, "__name__", "")
+        return _top_package(module) in self.packages
+
+    def error(self, node: ast.AST, message: str) -> None:
+        self.errors.append(f"line {node.lineno}: {message}")
+
+    # Imports
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            if _top_package(alias.name) not in self.packages:
+                self.unbind(alias.asname or _top_package(alias.name))
+                continue
+            module = _import(alias.name)
+            if module is None:
+                self.error(node, f"No module named '{alias.name}'")
+                self.unbind(alias.asname or _top_package(alias.name))
+            elif alias.asname:
+                self.bind(alias.asname, _Ref("module", module, alias.name))
+            else:
+                top = _top_package(alias.name)
+                self.bind(top, _Ref("module", _import(top), top))
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        if node.level or not node.module or _top_package(node.module) not in self.packages:
+            for alias in node.names:
+                self.unbind(alias.asname or alias.name)
+            return
+        module = _import(node.module)
+        if module is None:
+            self.error(node, f"No module named '{node.module}'")
+            for alias in node.names:
+                self.unbind(alias.asname or alias.name)
+            return
+        for alias in node.names:
+            if alias.name == "*":
+                continue
+            missing = _import_error(module, alias.name)
+            if missing:
+                self.error(node, f"cannot import name '{alias.name}' from '{node.module}': {missing}")
+                self.unbind(alias.asname or alias.name)
+                continue
+            ref = self.member(_Ref("module", module, node.module), alias.name)
+            if ref is None:
+                self.error(
+                    node,
+                    f"cannot import name '{alias.name}' from '{node.module}'"
+                    + _suggestion(alias.name, dir(module)),
+                )
+            self.bind(alias.asname or alias.name, ref or None)
+
+    # Bindings
+
+    def bind(self, name: str, ref: Optional[_Ref]) -> None:
+        if ref is None or ref.obj is None:
+            self.unbind(name)
+        else:
+            self.names[name] = ref
+
+    def unbind(self, name: str) -> None:
+        self.names.pop(name, None)
+
+    def bind_target(self, target: ast.AST, ref: Optional[_Ref]) -> None:
+        if isinstance(target, ast.Name):
+            self.bind(target.id, ref)
+        else:
+            for child in ast.walk(target):
+                if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+                    self.unbind(child.id)
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        self.visit(node.value)
+        ref = self.resolve(node.value)
+        for target in node.targets:
+            self.visit(target)
+            self.bind_target(target, ref)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> None:
+        if node.value is not None:
+            self.visit(node.value)
+        self.visit(node.target)
+        self.bind_target(node.target, self.annotation(node.annotation))
+
+    def visit_AugAssign(self, node: ast.AugAssign) -> None:
+        self.generic_visit(node)
+        self.bind_target(node.target, None)
+
+    def visit_NamedExpr(self, node: ast.NamedExpr) -> None:
+        self.visit(node.value)
+        self.bind_target(node.target, self.resolve(node.value))
+
+    def visit_For(self, node: ast.For) -> None:
+        self.visit(node.iter)
+        self.bind_target(node.target, None)
+        for statement in node.body + node.orelse:
+            self.visit(statement)
+
+    visit_AsyncFor = visit_For
+
+    def visit_With(self, node: ast.With) -> None:
+        for item in node.items:
+            self.visit(item.context_expr)
+            if item.optional_vars is not None:
+                self.bind_target(item.optional_vars, None)
+        for statement in node.body:
+            self.visit(statement)
+
+    visit_AsyncWith = visit_With
+
+    def visit_comprehension(self, node: ast.comprehension) -> None:
+        self.visit(node.iter)
+        self.bind_target(node.target, None)
+        for condition in node.ifs:
+            self.visit(condition)
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        if node.type is not None:
+            self.visit(node.type)
+        if node.name:
+            self.unbind(node.name)
+        for statement in node.body:
+            self.visit(statement)
+
+    def visit_FunctionDef(self, node) -> None:
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            self.visit(default)
+        outer = dict(self.names)
+        arguments = node.args.posonlyargs + node.args.args + node.args.kwonlyargs
+        for arg in arguments + [a for a in (node.args.vararg, node.args.kwarg) if a]:
+            ref = self.annotation(arg.annotation) if arg in arguments and arg.annotation else None
+            self.bind(arg.arg, ref)
+        for statement in node.body:
+            self.visit(statement)
+        self.names = outer
+        self.unbind(node.name)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        outer = dict(self.names)
+        for arg in node.args.posonlyargs + node.args.args + node.args.kwonlyargs:
+            self.unbind(arg.arg)
+        self.visit(node.body)
+        self.names = outer
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        for expr in node.decorator_list + node.bases:
+            self.visit(expr)
+        outer = dict(self.names)
+        for statement in node.body:
+            self.visit(statement)
+        self.names = outer
+        self.unbind(node.name)
+
+    # Checks
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        self.generic_visit(node)
+        if not isinstance(node.ctx, ast.Load):
+            return
+        base = self.resolve(node.value)
+        if base is None or base.kind in ("function", "method"):
+            return
+        if self.member(base, node.attr) is None and not self.dynamic(base, node.attr):
+            owner = base.name if base.kind != "module" else f"module '{base.name}'"
+            candidates = dir(base.obj) if base.kind == "module" else _members(base.obj)
+            self.error(
+                node,
+                f"{owner} has no attribute '{node.attr}'" + _suggestion(node.attr, candidates),
+            )
+
+    def visit_Call(self, node: ast.Call) -> None:
+        self.generic_visit(node)
+        if any(isinstance(arg, ast.Starred) for arg in node.args) or any(kw.arg is None for kw in node.keywords):
+            return
+        ref = self.resolve(node.func)
+        target = self.callable(ref)
+        if target is None:
+            return
+        function, skip_self = target
+        message = self.bind_arguments(function, skip_self, node)
+        if message:
+            self.error(node, f"{ast.unparse(node.func)}() {message}")
+
+    def bind_arguments(self, function, skip_self: bool, node: ast.Call) -> Optional[str]:
+        """
+        Binds the arguments of a call to the signatures (overloads included) of
+        `function`, returning the error of the first if none accepts them.
+        """
+        overloads = []
+        if hasattr(typing, "get_overloads"):
+            overloads = list(typing.get_overloads(function))
+        errors = []
+        for candidate in overloads or [function]:
+            try:
+                signature = inspect.signature(candidate)
+            except (TypeError, ValueError):
+                return None
+            args = [None] * (len(node.args) + (1 if skip_self else 0))
+            kwargs = {kw.arg: None for kw in node.keywords}
+            try:
+                signature.bind(*args, **kwargs)
+            except TypeError as e:
+                message = str(e)
+                match = _UNEXPECTED_KEYWORD_RE.search(message)
+                if match:
+                    message += _suggestion(match.group(1), signature.parameters)
+                errors.append(message)
+                continue
+            message = self.unpacked_keywords(candidate, signature, kwargs)
+            if message is None:
+                return None
+            errors.append(message)
+        return errors[0] if errors else None
+
+    def unpacked_keywords(self, function, signature: inspect.Signature, kwargs: dict) -> Optional[str]:
+        """
+        Checks the keywords collected by `**kwargs: Unpack[SomeTypedDict]` against the TypedDict keys.
+        """
+        var_keyword = next((p for p in signature.parameters.values() if p.kind is p.VAR_KEYWORD), None)
+        if var_keyword is None:
+            return None
+        annotation = _hints(function).get(var_keyword.name)
+        if getattr(typing.get_origin(annotation), "_name", None) != "Unpack" \
+                and "Unpack" not in str(typing.get_origin(annotation)):
+            return None
+        typed_dict = typing.get_args(annotation)[0]
+        typed_dict = typing.get_origin(typed_dict) or typed_dict
+        if not hasattr(typed_dict, "__required_keys__"):
+            return None
+        keys = typed_dict.__required_keys__ | typed_dict.__optional_keys__
+        for keyword in kwargs:
+            if keyword not in signature.parameters and keyword not in keys:
+                return f"got an unexpected keyword argument '{keyword}'" + _suggestion(
+                    keyword, [*signature.parameters, *keys]
+                )
+        return None
+
+    # Resolution
+
+    def callable(self, ref: Optional[_Ref]):
+        """
+        Returns (function, whether it takes self) for a resolved callee.
+        """
+        if ref is None:
+            return None
+        if ref.kind == "class":
+            init = inspect.getattr_static(ref.obj, "__init__", None)
+            if not inspect.isfunction(init) or not self.checked(init):
+                return None
+            return init, True
+        if ref.kind == "function" and self.checked(ref.obj):
+            return ref.obj, False
+        if ref.kind == "method" and self.checked(ref.obj):
+            return ref.obj, True
+        if ref.kind == "instance":
+            call = inspect.getattr_static(ref.obj, "__call__", None)
+            if inspect.isfunction(call) and self.checked(call):
+                return call, True
+        return None
+
+    def dynamic(self, base: _Ref, attr: str) -> bool:
+        if base.kind == "module":
+            return _import(f"{base.name}.{attr}") is not None or "__getattr__" in vars(base.obj)
+        return _dynamic(base.obj)
+
+    def member(self, base: _Ref, attr: str) -> Optional[_Ref]:
+        """
+        Resolves `base.attr`, returning None if it does not exist or cannot be typed.
+        """
+        name = f"{base.name}.{attr}"
+        if base.kind == "module":
+            if _import_error(base.obj, attr):
+                return _Ref("unknown", None, name)
+            if hasattr(base.obj, attr):
+                return self.value(getattr(base.obj, attr), attr)
+            submodule = _import(name)
+            return _Ref("module", submodule, name) if submodule is not None else None
+
+        cls = base.obj
+        if attr not in _members(cls):
+            return None
+        try:
+            value = inspect.getattr_static(cls, attr)
+        except AttributeError:
+            value = None
+        unknown = _Ref("unknown", None, name)
+        if isinstance(value, property):
+            return (self.instance(_hints(value.fget).get("return")) if value.fget else None) or unknown
+        if isinstance(value, staticmethod):
+            return _Ref("function", value.__func__, name)
+        if isinstance(value, classmethod):
+            return _Ref("method", value.__func__, name)
+        if inspect.isfunction(value):
+            return _Ref("method", value, name) if base.kind == "instance" else _Ref("function", value, name)
+        if inspect.isclass(value):
+            return _Ref("class", value, value.__name__)
+        return self.instance(_hints(cls).get(attr)) or unknown
+
+    def value(self, obj, name: str) -> Optional[_Ref]:
+        if inspect.ismodule(obj):
+            return _Ref("module", obj, obj.__name__)
+        if inspect.isclass(obj):
+            return _Ref("class", obj, obj.__name__)
+        if inspect.isfunction(obj):
+            return _Ref("function", obj, name)
+        return _Ref("unknown", None, name)
+
+    def instance(self, annotation) -> Optional[_Ref]:
+        """
+        Returns an instance reference for a type annotation that names a single checked class.
+        """
+        if isinstance(annotation, typing.ForwardRef):
+            annotation = _fallback_namespace().get(annotation.__forward_arg__)
+        origin = typing.get_origin(annotation)
+        if origin in (typing.Union, getattr(types, "UnionType", typing.Union)):
+            members = [a for a in typing.get_args(annotation) if a is not type(None)]
+            return self.instance(members[0]) if len(members) == 1 else None
+        if origin in (collections.abc.Awaitable, collections.abc.Coroutine):
+            return self.instance(typing.get_args(annotation)[-1])
+        cls = origin if inspect.isclass(origin) else annotation
+        if inspect.isclass(cls) and self.checked(cls) and not issubclass(cls, type):
+            return _Ref("instance", cls, cls.__name__)
+        return None
+
+    def annotation(self, node: Optional[ast.AST]) -> Optional[_Ref]:
+        """
+        Resolves an annotation expression of the script to an instance reference.
+        """
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            try:
+                node = ast.parse(node.value, mode="eval").body
+            except SyntaxError:
+                return None
+        if isinstance(node, ast.Subscript):
+            node = node.value
+        ref = self.resolve(node) if node is not None else None
+        if ref is None or ref.kind != "class":
+            return None
+        return _Ref("instance", ref.obj, ref.name)
+
+    def resolve(self, node: ast.AST) -> Optional[_Ref]:
+        """
+        Resolves an expression to a module, class, function or typed instance, or None.
+        """
+        if isinstance(node, ast.Name):
+            return self.names.get(node.id)
+        if isinstance(node, ast.Attribute):
+            base = self.resolve(node.value)
+            if base is None or base.kind not in ("module", "class", "instance"):
+                return None
+            ref = self.member(base, node.attr)
+            return ref if ref is not None and ref.obj is not None else None
+        if isinstance(node, ast.Await):
+            return self.resolve(node.value)
+        if isinstance(node, ast.Call):
+            ref = self.resolve(node.func)
+            if ref is None:
+                return None
+            if ref.kind == "class":
+                return _Ref("instance", ref.obj, ref.name)
+            target = self.callable(ref)
+            if target is None:
+                return None
+            return self.instance(_hints(target[0]).get("return"))
+        return None
+
+
+def check_api(code: str, packages: Iterable[str] = CHECKED_PACKAGES) -> List[str]:
+    """
+    Checks a script against the installed APIs of `packages`.
+
+    Args:
+        code (str): The script source.
+        packages (Iterable[str]): Top-level packages to check; those not installed are skipped.
+
+    Returns:
+        List[str]: The errors found, as "line N: ..." messages; empty if none.
+    """
+    return ApiChecker(tuple(packages)).check(code)
@@ -0,0 +1,91 @@
+"""
+Concurrent, rate-limited batch embedding.
+Texts are sent to the embedder in fixed-size batches from a thread pool, every
+request waits for the shared rate limiter, and failed batches are retried with
+exponential backoff, so build time scales with the allowed concurrency.
+"""
+
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.rate_limiters import BaseRateLimiter, InMemoryRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def create_rate_limiter(requests_per_second: Optional[float]) -> Optional[BaseRateLimiter]:
+    """
+    Returns a token-bucket rate limiter, or None when no limit is configured.
+    """
+    if not requests_per_second:
+        return None
+    return InMemoryRateLimiter(
+        requests_per_second=requests_per_second,
+        check_every_n_seconds=0.05,
+        max_bucket_size=max(1, requests_per_second),
+    )
+
+
+def _embed_batch(
+    embedder: Embeddings,
+    batch: List[str],
+    rate_limiter: Optional[BaseRateLimiter],
+    max_retries: int,
+    backoff: float,
+) -> List[List[float]]:
+    for attempt in range(max_retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire(blocking=True)
+        try:
+            return embedder.embed_documents(batch)
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = backoff * (2 ** attempt) * (1 + random.random())
+            logger.warning(
+                f"Embedding batch of {len(batch)} texts failed ({e}), retrying in {delay:.1f}s"
+            )
+            time.sleep(delay)
+
+
+def embed_in_batches(
+    embedder: Embeddings,
+    texts: List[str],
+    batch_size: int = 64,
+    max_concurrency: int = 4,
+    rate_limiter: Optional[BaseRateLimiter] = None,
+    max_retries: int = 5,
+    backoff: float = 1.0,
+) -> List[List[float]]:
+    """
+    Embeds texts in concurrent batches.
+
+    Args:
+        embedder (Embeddings): Any LangChain embedder.
+        texts (List[str]): The texts to embed.
+        batch_size (int): Number of texts per embedding request.
+        max_concurrency (int): Number of requests in flight at once.
+        rate_limiter (BaseRateLimiter): Limits the request rate, shared across threads.
+        max_retries (int): Retries of a failed batch before giving up.
+        backoff (float): Base delay in seconds, doubled after every failed attempt.
+
+    Returns:
+        List[List[float]]: One vector per text, in the order of `texts`.
+    """
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    if len(batches) <= 1 or max_concurrency <= 1:
+        results = [
+            _embed_batch(embedder, batch, rate_limiter, max_retries, backoff)
+            for batch in batches
+        ]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(batches))) as pool:
+            results = list(pool.map(
+                lambda batch: _embed_batch(embedder, batch, rate_limiter, max_retries, backoff),
+                batches,
+            ))
+    return [vector for batch_vectors in results for vector in batch_vectors]
@@ -0,0 +1,291 @@
+"""
+A compressed, content-addressed store of JSON entries shared by worker processes.
+
+Node cache entries hold whole pages (`original_html`, `doc`, `parsed_doc`), and
+the same page is cached once per prompt and node. BlobStore keeps every large
+string of an entry as a zstd-compressed blob named by the hash of its content,
+so a page shared by many entries is stored once, and keeps the rest of the
+entry, with the blob references, in a small JSON index. The index and the
+blobs are written atomically (temporary file, then rename) under a file lock,
+and least recently used entries are evicted once the compressed size exceeds
+`max_bytes`; blobs no longer referenced are deleted with them. Reads do not
+rewrite the index: the time of every read is kept in a small SQLite table, like
+DiskLRUCache, and only consulted to pick the entries to evict.
+
+Layout of the directory:
+
+    index.json          {"entries": {key: {"value", "blobs", "size", "accessed"}}, "blobs": {hash: size}}
+    index.lock
+    access.sqlite       the last read of every entry read since it was stored
+    blobs/ab/abcd....zst
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_BLOB = "__blob__"
+
+
+class BlobStore:
+    """
+    JSON entries with their large strings kept as deduplicated, compressed blobs.
+
+    Attributes:
+        directory (str): The store directory.
+        max_bytes (int): Cap on the compressed size of the blobs and entries, None for no cap.
+
+    Args:
+        directory (str): The store directory, created if missing.
+        max_bytes (int): Cap on the compressed size of the blobs and entries.
+        min_blob_bytes (int): Strings at least this long (in UTF-8) are stored as blobs.
+        level (int): zstd compression level.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: Optional[int] = None,
+        min_blob_bytes: int = 1024,
+        level: int = 3,
+    ):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard is not installed. Please install it using 'pip install zstandard'.")
+        try:
+            from filelock import FileLock
+        except ImportError:
+            raise ImportError("filelock is not installed. Please install it using 'pip install filelock'.")
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_blob_bytes = min_blob_bytes
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._index_path = os.path.join(directory, "index.json")
+        self._file_lock = FileLock(os.path.join(directory, "index.lock"))
+        self._lock = threading.Lock()
+        self._index: Optional[dict] = None
+        self._index_stamp = None
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        self._access = sqlite3.connect(os.path.join(directory, "access.sqlite"), timeout=30, check_same_thread=False)
+        with self._lock, self._access:
+            self._access.execute("PRAGMA journal_mode=WAL")
+            self._access.execute("CREATE TABLE IF NOT EXISTS access (key TEXT PRIMARY KEY, accessed REAL NOT NULL)")
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Returns the entry stored under `key` and marks it as recently used, or None.
+        """
+        with self._locked() as index:
+            entry = index["entries"].get(key)
+            if entry is None:
+                return None
+            try:
+                blobs = {digest: self._read_blob(digest) for digest in entry["blobs"]}
+            except OSError:
+                logger.warning(f"Blob store {self.directory}: missing blob of '{key}', dropping it")
+                self._drop(index, key)
+                self._save(index)
+                return None
+            with self._access:
+                self._access.execute(
+                    "INSERT OR REPLACE INTO access (key, accessed) VALUES (?, ?)", (key, time.time())
+                )
+            value = entry["value"]
+        return self._inflate(value, {digest: self._decompressor.decompress(data) for digest, data in blobs.items()})
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Stores a JSON value under `key`, replacing any previous entry, then evicts
+        the least recently used entries over `max_bytes`.
+        """
+        self.put_many({key: value})
+
+    def put_many(self, items: Dict[str, Any]) -> None:
+        """
+        Stores several JSON values, rewriting the index once.
+        """
+        if not items:
+            return
+        deflated = {}
+        for key, value in items.items():
+            blobs: Dict[str, bytes] = {}
+            skeleton = self._deflate(value, blobs)
+            deflated[key] = skeleton, {digest: self._compressor.compress(data) for digest, data in blobs.items()}
+        with self._locked() as index:
+            now = time.time()
+            for key, (skeleton, compressed) in deflated.items():
+                for digest, data in compressed.items():
+                    if digest not in index["blobs"] or not os.path.exists(self._blob_path(digest)):
+                        self._write_atomic(self._blob_path(digest), data)
+                        index["blobs"][digest] = len(data)
+                previous = index["entries"].pop(key, None)
+                index["entries"][key] = {
+                    "value": skeleton,
+                    "blobs": sorted(compressed),
+                    "size": len(json.dumps(skeleton)),
+                    # Reads after this one are recorded in the access table.
+                    "accessed": now,
+                }
+                if previous is not None:
+                    self._release(index, previous["blobs"])
+            self._forget(deflated)
+            self._evict(index)
+            self._save(index)
+
+    def delete(self, key: str) -> None:
+        with self._locked() as index:
+            if key in index["entries"]:
+                self._drop(index, key)
+                self._save(index)
+
+    def size(self) -> int:
+        """
+        The compressed size of the stored blobs and entries.
+        """
+        with self._locked() as index:
+            return self._size(index)
+
+    def _deflate(self, value: Any, blobs: Dict[str, bytes]) -> Any:
+        if isinstance(value, str):
+            data = value.encode("utf-8")
+            if len(data) < self.min_blob_bytes:
+                return value
+            digest = hashlib.sha256(data).hexdigest()
+            blobs[digest] = data
+            return {_BLOB: digest}
+        if isinstance(value, list):
+            return [self._deflate(item, blobs) for item in value]
+        if isinstance(value, dict):
+            return {key: self._deflate(item, blobs) for key, item in value.items()}
+        return value
+
+    def _inflate(self, value: Any, blobs: Dict[str, bytes]) -> Any:
+        if isinstance(value, list):
+            return [self._inflate(item, blobs) for item in value]
+        if isinstance(value, dict):
+            if set(value) == {_BLOB}:
+                return blobs[value[_BLOB]].decode("utf-8")
+            return {key: self._inflate(item, blobs) for key, item in value.items()}
+        return value
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # Threads of this process and other processes both go through the file lock.
+        with self._lock, self._file_lock:
+            try:
+                yield self._load()
+            except BaseException:
+                # The index may have been changed without being saved: reload it next time.
+                self._index = None
+                raise
+
+    def _load(self) -> dict:
+        # The parsed index is reused until another process rewrites the file.
+        try:
+            stat = os.stat(self._index_path)
+            stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except OSError:
+            stamp = None
+        if self._index is None or stamp != self._index_stamp:
+            index = None
+            if stamp is not None:
+                try:
+                    with open(self._index_path, "r") as f:
+                        index = json.load(f)
+                except ValueError:
+                    logger.warning(f"Blob store {self.directory}: unreadable index, starting empty")
+            self._index = index or {"entries": {}, "blobs": {}}
+            self._index_stamp = stamp
+        return self._index
+
+    def _save(self, index: dict) -> None:
+        self._write_atomic(self._index_path, json.dumps(index).encode("utf-8"))
+        stat = os.stat(self._index_path)
+        self._index_stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _drop(self, index: dict, key: str) -> int:
+        """
+        Removes an entry and the blobs only it referenced; returns the bytes freed.
+        """
+        entry = index["entries"].pop(key, None)
+        if entry is None:
+            return 0
+        self._forget([key])
+        return entry["size"] + self._release(index, entry["blobs"])
+
+    def _forget(self, keys: Iterable[str]) -> None:
+        """
+        Removes the recorded reads of entries stored again or dropped.
+        """
+        with self._access:
+            self._access.executemany("DELETE FROM access WHERE key = ?", [(key,) for key in keys])
+
+    def _release(self, index: dict, digests: Iterable[str]) -> int:
+        """
+        Deletes the blobs among `digests` that no entry references; returns the bytes freed.
+        """
+        freed = 0
+        referenced: Set[str] = {digest for other in index["entries"].values() for digest in other["blobs"]}
+        for digest in digests:
+            if digest in referenced or digest not in index["blobs"]:
+                continue
+            freed += index["blobs"].pop(digest)
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+        return freed
+
+    def _size(self, index: dict) -> int:
+        return sum(index["blobs"].values()) + sum(entry["size"] for entry in index["entries"].values())
+
+    def _evict(self, index: dict) -> None:
+        if self.max_bytes is None:
+            return
+        size = self._size(index)
+        if size <= self.max_bytes:
+            return
+        read = dict(self._access.execute("SELECT key, accessed FROM access"))
+        by_age = sorted(
+            index["entries"],
+            key=lambda key: max(index["entries"][key]["accessed"], read.get(key, 0.0)),
+        )
+        evicted = 0
+        # The newest entry is kept even if it alone exceeds the cap.
+        for key in by_age[:-1]:
+            if size <= self.max_bytes:
+                break
+            size -= self._drop(index, key)
+            evicted += 1
+        if evicted:
+            logger.info(f"Blob store {self.directory}: evicted {evicted} entries, {size} bytes left")
+
+    def close(self) -> None:
+        with self._lock:
+            self._access.close()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest[:2], digest + ".zst")
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _read_blob(self, digest: str) -> bytes:
+        with open(self._blob_path(digest), "rb") as f:
+            return f.read()
@@ -0,0 +1,219 @@
+"""
+Bootstrap of the pre-warmed workers of ExecutionPool.
+
+A worker imports the heavy libraries used by candidate scrapers (crawlee,
+playwright, pydantic) as soon as it starts, then waits on stdin for one job:
+a JSON line {"path": ..., "env": {...}, "cwd": ...}. It runs that script as
+`python <path>` would, with its output going to the worker's stdout, and exits.
+
+If DS490_BROWSER_ENDPOINT is set, Chromium launches are replaced by a CDP
+connection to the browser the pool keeps running: each run still gets fresh
+browser contexts, without paying for a browser start.
+
+If DS490_RESULT_FD is set, every item pushed to a crawlee Dataset is also
+written to that file descriptor as one JSON line, so the node receives the
+scraped items directly instead of reading them back from the storage directory.
+
+If the job sets DS490_HAR_MODE ("record" or "replay") and DS490_HAR_DIR, every
+Playwright browser context records its responses in that directory, one HAR
+entry per line written as each response arrives (so a run killed on timeout
+still leaves the pages it fetched), or is served from the archive merged there
+by src/page_fixtures.py. Requests of the HTTP crawlers (BeautifulSoupCrawler,
+ParselCrawler) do not go through a browser and are neither recorded nor replayed.
+
+This file is run as a script and must not import the repository packages.
+"""
+
+import base64
+import itertools
+import json
+import os
+import runpy
+import sys
+import traceback
+from datetime import datetime, timezone
+
+BROWSER_ENDPOINT_ENV = "DS490_BROWSER_ENDPOINT"
+RESULT_FD_ENV = "DS490_RESULT_FD"
+HAR_MODE_ENV = "DS490_HAR_MODE"
+HAR_DIR_ENV = "DS490_HAR_DIR"
+ARCHIVE_NAME = "archive.har"
+PRELOAD = ("pydantic", "crawlee", "crawlee.crawlers", "playwright.async_api")
+
+
+def preload() -> None:
+    for module in PRELOAD:
+        try:
+            __import__(module)
+        except Exception:
+            pass
+
+
+def use_shared_browser(endpoint: str) -> None:
+    """
+    Makes `chromium.launch()` connect to the running browser at `endpoint` instead of starting one.
+    """
+    from playwright.async_api import BrowserType
+
+    launch = BrowserType.launch
+
+    async def connect_or_launch(self, *args, **kwargs):
+        if self.name != "chromium":
+            return await launch(self, *args, **kwargs)
+        return await self.connect_over_cdp(endpoint)
+
+    BrowserType.launch = connect_or_launch
+
+
+def use_result_channel(fd: int) -> None:
+    """
+    Makes every item pushed to a dataset also be written to `fd` as a JSON line.
+    """
+    from crawlee.storages import Dataset
+
+    channel = os.fdopen(fd, "w", buffering=1, encoding="utf-8")
+    push_data = Dataset.push_data
+
+    async def push_data_and_send(self, data, *args, **kwargs):
+        await push_data(self, data, *args, **kwargs)
+        for item in data if isinstance(data, list) else [data]:
+            channel.write(json.dumps(item, default=str) + "\n")
+
+    Dataset.push_data = push_data_and_send
+
+
+async def har_entry(response) -> dict:
+    """
+    Describes a Playwright response as a HAR entry, with its body embedded.
+    """
+    request = response.request
+    try:
+        body = await response.body()
+    except Exception:
+        # Redirects and aborted responses have no body.
+        body = b""
+    headers = await response.headers_array()
+    header_values = {header["name"].lower(): header["value"] for header in headers}
+    entry_request = {
+        "method": request.method,
+        "url": request.url,
+        "httpVersion": "HTTP/1.1",
+        "cookies": [],
+        "headers": await request.headers_array(),
+        "queryString": [],
+        "headersSize": -1,
+        "bodySize": -1,
+    }
+    if request.post_data_buffer:
+        entry_request["postData"] = {
+            "mimeType": header_values.get("content-type", ""),
+            "text": base64.b64encode(request.post_data_buffer).decode("ascii"),
+            "encoding": "base64",
+        }
+    return {
+        "startedDateTime": datetime.now(timezone.utc).isoformat(),
+        "time": -1,
+        "request": entry_request,
+        "response": {
+            "status": response.status,
+            "statusText": response.status_text,
+            "httpVersion": "HTTP/1.1",
+            "cookies": [],
+            "headers": headers,
+            "content": {
+                "size": len(body),
+                "mimeType": header_values.get("content-type", "x-unknown"),
+                "text": base64.b64encode(body).decode("ascii"),
+                "encoding": "base64",
+            },
+            "redirectURL": header_values.get("location", ""),
+            "headersSize": -1,
+            "bodySize": len(body),
+        },
+        "cache": {},
+        "timings": {"send": -1, "wait": -1, "receive": -1},
+    }
+
+
+def use_page_fixtures(mode: str, directory: str) -> None:
+    """
+    Makes every new browser context record its responses or replay them from the archive.
+    """
+    from playwright.async_api import Browser
+
+    new_context = Browser.new_context
+    counter = itertools.count()
+
+    async def new_context_with_har(self, *args, **kwargs):
+        context = await new_context(self, *args, **kwargs)
+        if mode == "record":
+            # Line buffered: every entry reaches the file as soon as its response arrives.
+            path = os.path.join(directory, f"record-{os.getpid()}-{next(counter)}.jsonl")
+            recording = open(path, "a", encoding="utf-8", buffering=1)
+
+            async def record(response):
+                try:
+                    entry = await har_entry(response)
+                except Exception:
+                    return
+                if not recording.closed:
+                    recording.write(json.dumps(entry) + "\n")
+
+            context.on("response", record)
+            context.on("close", lambda *_: recording.close())
+        else:
+            await context.route_from_har(os.path.join(directory, ARCHIVE_NAME), not_found="fallback")
+        return context
+
+    Browser.new_context = new_context_with_har
+
+
+def main() -> None:
+    preload()
+    endpoint = os.environ.get(BROWSER_ENDPOINT_ENV)
+    if endpoint:
+        try:
+            use_shared_browser(endpoint)
+        except ImportError:
+            pass
+
+    result_fd = os.environ.pop(RESULT_FD_ENV, None)
+    if result_fd:
+        try:
+            use_result_channel(int(result_fd))
+        except ImportError:
+            pass
+
+    line = sys.stdin.readline()
+    if not line:
+        return
+    job = json.loads(line)
+    sys.stdin = open(os.devnull)
+
+    os.environ.update(job.get("env") or {})
+    har_mode, har_dir = os.environ.get(HAR_MODE_ENV), os.environ.get(HAR_DIR_ENV)
+    if har_mode in ("record", "replay") and har_dir:
+        try:
+            use_page_fixtures(har_mode, har_dir)
+        except ImportError:
+            pass
+    if job.get("cwd"):
+        os.chdir(job["cwd"])
+    path = job["path"]
+    sys.argv = [path]
+    sys.path[0] = os.path.dirname(os.path.abspath(path))
+    try:
+        runpy.run_path(path, run_name="__main__")
+    except (SystemExit, KeyboardInterrupt):
+        raise
+    except BaseException:
+        # Report the error as `python <path>` would, without the frames of this bootstrap.
+        exc_type, exc, tb = sys.exc_info()
+        while tb is not None and tb.tb_frame.f_code.co_filename != path:
+            tb = tb.tb_next
+        traceback.print_exception(exc_type, exc, tb)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
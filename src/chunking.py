@@ -0,0 +1,128 @@
+"""
+Token-aware chunking of documentation pages.
+Pages are split along their section headings and paragraphs, and packed into
+chunks that never exceed a token budget, so that long API pages are embedded as
+several focused vectors instead of one truncated or blurred one.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+HEADING_RE = re.compile(r"^\s{0,3}(#{1,6})\s+(.+?)\s*#*\s*$")
+
+
+@lru_cache(maxsize=None)
+def _encoding(encoding_name: str):
+    try:
+        import tiktoken
+    except ImportError:
+        raise ImportError(
+            "tiktoken is not installed. Please install it using 'pip install tiktoken'."
+        )
+    return tiktoken.get_encoding(encoding_name)
+
+
+def count_tokens(text: str, encoding_name: str = "cl100k_base") -> int:
+    return len(_encoding(encoding_name).encode(text, disallowed_special=()))
+
+
+def split_sections(text: str) -> List[Tuple[Optional[str], str]]:
+    """
+    Splits a page into (heading, body) sections along its Markdown headings.
+
+    Pages without Markdown headings (e.g. text extracted from HTML) become a
+    single section titled by their first line.
+    """
+    sections: List[Tuple[Optional[str], List[str]]] = []
+    heading, lines = None, []
+    for line in text.splitlines():
+        match = HEADING_RE.match(line)
+        if match:
+            if any(l.strip() for l in lines):
+                sections.append((heading, lines))
+            heading, lines = match.group(2), [line]
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((heading, lines))
+
+    if len(sections) == 1 and sections[0][0] is None:
+        first_line = next((l.strip() for l in sections[0][1] if l.strip()), None)
+        sections = [(first_line, sections[0][1])]
+    return [(heading, "\n".join(lines).strip()) for heading, lines in sections]
+
+
+def _split_long(text: str, max_tokens: int, overlap_tokens: int, encoding_name: str) -> List[str]:
+    """
+    Cuts a single oversized paragraph into overlapping token windows.
+    """
+    encoding = _encoding(encoding_name)
+    tokens = encoding.encode(text, disallowed_special=())
+    step = max(1, max_tokens - overlap_tokens)
+    return [
+        encoding.decode(tokens[start:start + max_tokens])
+        for start in range(0, len(tokens), step)
+        if start == 0 or start + overlap_tokens < len(tokens)
+    ]
+
+
+def chunk_page(
+    source: str,
+    text: str,
+    max_tokens: int = 512,
+    overlap_tokens: int = 64,
+    encoding_name: str = "cl100k_base",
+) -> List[Dict]:
+    """
+    Splits a documentation page into token-bounded chunks.
+
+    Paragraphs of the same section are packed together until `max_tokens` is
+    reached; a chunk never spans two sections. Paragraphs longer than the budget
+    are cut into windows overlapping by `overlap_tokens`.
+
+    Args:
+        source (str): The page url or path, copied into every chunk.
+        text (str): The page content.
+        max_tokens (int): Maximum number of tokens of a chunk.
+        overlap_tokens (int): Tokens repeated between windows of an oversized paragraph.
+        encoding_name (str): The tiktoken encoding used to count tokens.
+
+    Returns:
+        List[Dict]: Chunks with the keys `text`, `source`, `section` and `chunk`
+        (position of the chunk within the page).
+    """
+    chunks = []
+    for section, body in split_sections(text):
+        current: List[str] = []
+        current_tokens = 0
+        for paragraph in re.split(r"\n\s*\n", body):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            tokens = count_tokens(paragraph, encoding_name)
+            if tokens > max_tokens:
+                # A short lead-in (typically the heading line) stays glued to the first window.
+                carry = current if current_tokens <= overlap_tokens else []
+                if current and not carry:
+                    chunks.append((section, "\n\n".join(current)))
+                budget = max_tokens - (current_tokens if carry else 0)
+                windows = _split_long(paragraph, budget, min(overlap_tokens, budget // 2), encoding_name)
+                if carry:
+                    windows[0] = "\n\n".join(carry + [windows[0]])
+                chunks.extend((section, window) for window in windows)
+                current, current_tokens = [], 0
+                continue
+            # +1 roughly accounts for the paragraph separator
+            if current and current_tokens + tokens + 1 > max_tokens:
+                chunks.append((section, "\n\n".join(current)))
+                current, current_tokens = [], 0
+            current.append(paragraph)
+            current_tokens += tokens + 1
+        if current:
+            chunks.append((section, "\n\n".join(current)))
+
+    return [
+        {"text": chunk_text, "source": source, "section": section, "chunk": i}
+        for i, (section, chunk_text) in enumerate(chunks)
+    ]
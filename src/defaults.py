@@ -12,6 +12,17 @@ NODE_DEFAULTS = {
         "execution_k": 12,
         # number of top snippets to retrieve for validation error analysis
         "validation_k": 4,
+        # fuse vector hits with BM25 and exact API symbol lookups (reciprocal rank fusion)
+        "hybrid": True,
+        "rrf_k": 60,
+        # candidates taken from each ranking per requested snippet
+        "candidates": 3,
+        "lexical_weight": 1.0,
+        "symbol_weight": 1.5,
+        # how search queries are written: "local" builds them from the error, code and schema,
+        # "llm" asks the model, "auto" asks the model only when the local query has no
+        # exception or Crawlee symbol to anchor on
+        "query_rewrite": "auto",
     },
     # Default iteration counts for reasoning loops
     "max_iterations": {
@@ -21,4 +32,172 @@ NODE_DEFAULTS = {
         "validation": 3,
         "semantic": 3,
     },
-}
\ No newline at end of file
+    # Docs index settings for RAGNode
+    "rag": {
+        # location of the persisted qdrant collection (client_type "local_db"),
+        # one index per installed crawlee version
+        "client_path": "databases/crawlee_{crawlee_version}",
+        # location of the memory-mapped index (client_type "numpy")
+        "numpy_path": "databases/crawlee_{crawlee_version}_numpy",
+        # compact codes of the numpy index: None, "int8" (4x smaller) or "binary" (32x smaller)
+        "quantization": None,
+        # reduce vectors to this many dimensions before quantizing, None keeps all
+        "dimensions": None,
+        # how: "truncate" or "pca" (not "reduction", the graph config key of HtmlAnalyzerNode)
+        "vector_reduction": "truncate",
+        # candidates reranked with full-precision vectors per requested hit
+        "rerank_factor": 4,
+        # versions of a numpy collection kept on disk, the live one included, so that
+        # readers still mapping a replaced version can finish with it
+        "keep_versions": 3,
+        "collection_name": "vectorial_collection",
+        # "incremental" re-embeds only new or changed pages, "rebuild" re-embeds everything
+        "index_mode": "incremental",
+        # seconds before a synced index is crawled again for changes
+        "refresh_interval": 24 * 60 * 60,
+        # crawl the docs for changes even if the index is current (independent of the graph's `force`)
+        "refresh": False,
+        # "live" crawls https://crawlee.dev/python/, otherwise a path to a local docs
+        # snapshot (directory or archive), see scripts/build_docs_index.py
+        "docs_source": "live",
+        # only snapshot pages under this relative path are indexed
+        "snapshot_prefix": "api/",
+        # pages are split into chunks of at most this many tokens before embedding
+        "chunk_tokens": 512,
+        "chunk_overlap": 64,
+        # chunks per embedding request, and requests in flight at once
+        "embed_batch_size": 64,
+        "embed_concurrency": 4,
+        # None for no rate limit
+        "embed_requests_per_second": None,
+        "embed_max_retries": 5,
+        # unix socket of a served RetrievalService; DS490_RETRIEVAL_SOCKET is used when None
+        "retrieval_socket": None,
+    },
+    # Disk cache for document and query embeddings
+    "embedding_cache": {
+        "enabled": True,
+        "path": ".embedding_cache/embeddings.sqlite",
+        # total size of the cached vectors before least recently used ones are evicted
+        "max_bytes": 256 * 1024 * 1024,
+    },
+    # Opt-in: write several initial candidates concurrently and keep the first that runs
+    "speculative": {
+        "enabled": False,
+        "candidates": 3,
+        # sampling temperature of each candidate, cycled if there are more candidates
+        "temperatures": [0.2, 0.7, 1.0],
+    },
+    # Pre-warmed worker processes running the candidate scrapers
+    "execution_pool": {
+        "enabled": True,
+        # idle workers kept ready, with crawlee, playwright and pydantic already imported
+        "size": 2,
+        # workers connect to one running Chromium instead of launching their own
+        "shared_browser": True,
+        # whether that Chromium runs without a window; the graph sets it from its `headless`
+        "headless": True,
+    },
+    # Pages recorded by the first execution of a job and replayed to the repair attempts
+    # records and replays the pages of Playwright crawlers only; HTTP crawlers
+    # (BeautifulSoupCrawler, ParselCrawler) always fetch from the network
+    "page_fixtures": {
+        "enabled": True,
+        # directory of the archives, kept between jobs (one subdirectory per source URL);
+        # a temporary one per job when None
+        "path": None,
+        # seconds before a kept archive is discarded and the pages recorded again, None never
+        "ttl": 24 * 60 * 60,
+    },
+    # In-memory cache of retrieved doc snippets, keyed by normalized query and index version
+    "retrieval_cache": {
+        "enabled": True,
+        "max_entries": 1024,
+        # seconds before a cached result is retrieved again
+        "ttl": 6 * 60 * 60,
+    },
+    # Static check of generated code against the installed library APIs before it is run
+    "api_check": {
+        "enabled": True,
+        # imports, attributes and call signatures of these packages are verified
+        "packages": ["crawlee", "playwright"],
+    },
+    # Streaming monitor of candidate runs, which stops them at the first fatal error
+    "execution_monitor": {
+        # seconds a run may take in total
+        "timeout": 60,
+        # seconds without new output (periodic crawler statistics aside) before a run is stopped
+        "stall_timeout": 30,
+        # seconds a failing run gets to print the rest of its traceback
+        "grace_period": 1.0,
+        # output lines kept, from the start and the end of the run
+        "max_output_lines": 400,
+        # stop at the first request handler error raised in the script instead of letting
+        # crawlee retry it; off, as a retry can succeed (e.g. a flaky network or page load)
+        "fail_on_retry": False,
+    },
+    # Crawlee storage of candidate runs: a temporary directory per run, removed afterwards
+    "run_storage": {
+        # write the storages to disk during the run (crawlee's default) instead of keeping them in memory
+        "persist": False,
+    },
+    # Validation of the scraped items against the output schema, compiled once per job
+    "schema_validation": {
+        # items always validated; past this many, item i is validated with probability
+        # sample_size / (i + 1), a thinning rather than a fixed-size sample (None validates every item)
+        "sample_size": 1000,
+        # indexes of violating items reported per violation
+        "examples": 3,
+    },
+    # Token budget of the initial code prompt; the HTML, then the docs, then the analyses are reduced to fit
+    "prompt_budget": {
+        "enabled": True,
+        "max_tokens": 24000,
+        "encoding": "cl100k_base",
+        # tokens a reduced section keeps at least
+        "min_section_tokens": 256,
+        # elements kept of a run of identical HTML siblings (same tag and classes)
+        "html_keep_siblings": 2,
+    },
+    # Disk cache of LLM completions, used only by deterministic models (temperature 0 or a seed)
+    "llm_cache": {
+        "enabled": True,
+        "path": ".llm_cache/completions.sqlite",
+        # total size of the cached completions before least recently used ones are evicted
+        "max_bytes": 256 * 1024 * 1024,
+        # always call the model, but store its completions (refreshes the cache)
+        "bypass": False,
+    },
+    # Concurrent execution of the upstream graph nodes
+    "scheduler": {
+        # nodes running at the same time (1 runs them one after the other)
+        "max_workers": 4,
+    },
+    # Cache of the upstream node outputs, keyed on the inputs and configuration of each node
+    "node_cache": {
+        "enabled": True,
+        "dir": ".node_cache",
+        # seconds an entry lives, by node class (fetched pages go stale); other nodes never expire
+        "ttl": {"FetchNode": 24 * 60 * 60},
+        # compressed size of the cache before least recently used entries are evicted
+        "max_bytes": 512 * 1024 * 1024,
+        # strings at least this long (pages, reduced HTML) are stored once as zstd blobs
+        "min_blob_bytes": 1024,
+        "level": 3,
+    },
+    # Spans of every node, iteration, LLM call, search and execution of a run
+    "tracing": {
+        "enabled": True,
+        # JSON lines export of the spans, "{trace_id}" is replaced; None keeps them in memory only
+        "path": None,
+    },
+    # Batch generation (graphs/batch_session.py)
+    "batch": {
+        # jobs running at the same time
+        "max_concurrency": 4,
+        # browsers FetchNode may have open at the same time, across all jobs
+        "browser_slots": 2,
+        # where each job's code is saved, unless the job sets `filename`
+        "output_dir": "generated_code",
+    },
+}
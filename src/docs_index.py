@@ -0,0 +1,264 @@
+"""
+Helpers for keeping the Crawlee documentation index up to date.
+Every page is tracked in a small manifest (source -> content hash, chunk point ids) so that
+only new or changed pages have to be embedded again.
+Pages can come from the live documentation site or from a local docs snapshot
+(a directory or an archive), and indexes are keyed by the installed crawlee version.
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import tarfile
+import tempfile
+import time
+import uuid
+import zipfile
+from importlib.metadata import PackageNotFoundError, version
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 2
+
+SNAPSHOT_EXTENSIONS = (".html", ".htm", ".md", ".mdx", ".txt")
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+def installed_crawlee_version() -> str:
+    """
+    Returns the version of the installed crawlee package, or "unknown".
+    """
+    try:
+        return version("crawlee")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def resolve_index_path(path: str, crawlee_version: Optional[str] = None) -> str:
+    """
+    Fills the `{crawlee_version}` placeholder of an index path.
+
+    Example:
+        >>> resolve_index_path("databases/crawlee_{crawlee_version}", "0.6.8")
+        'databases/crawlee_0.6.8'
+    """
+    return path.format(crawlee_version=crawlee_version or installed_crawlee_version())
+
+
+def content_hash(text: str) -> str:
+    """
+    Returns the sha256 hex digest of a page content.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def page_id(source: str) -> str:
+    """
+    Returns a stable point id for a page or page chunk, derived from its source url
+    (and chunk position, e.g. "https://crawlee.dev/python/api/class/Dataset#3").
+
+    Qdrant accepts UUID strings as point ids, so the same chunk always
+    lands on the same point and can be overwritten or deleted later.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, source))
+
+
+def manifest_path(index_path: str) -> str:
+    return os.path.join(index_path, MANIFEST_NAME)
+
+
+def load_manifest(index_path: str) -> dict:
+    """
+    Loads the manifest stored next to the index, or an empty one if missing or unreadable.
+    """
+    path = manifest_path(index_path)
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty_manifest()
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    return manifest
+
+
+def save_manifest(index_path: str, manifest: dict) -> None:
+    """
+    Atomically writes the manifest next to the index.
+    """
+    os.makedirs(index_path, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=index_path, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path(index_path))
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def empty_manifest() -> dict:
+    return {"version": MANIFEST_VERSION, "synced_at": None, "pages": {}}
+
+
+def is_fresh(manifest: dict, refresh_interval: Optional[float]) -> bool:
+    """
+    Tells whether the manifest was synced recently enough to skip crawling.
+
+    Args:
+        manifest (dict): The manifest loaded with `load_manifest`.
+        refresh_interval (float): Maximum age in seconds. None or a negative
+            value means the index never goes stale on its own.
+    """
+    synced_at = manifest.get("synced_at")
+    if synced_at is None or not manifest.get("pages"):
+        return False
+    if refresh_interval is None or refresh_interval < 0:
+        return True
+    return time.time() - synced_at < refresh_interval
+
+
+def diff_pages(
+    pages: Dict[str, str], manifest: dict
+) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Compares freshly loaded pages against the manifest.
+
+    Args:
+        pages (Dict[str, str]): Mapping of page source to page content.
+        manifest (dict): The manifest of the current index.
+
+    Returns:
+        tuple: The pages that are new or changed (source -> content) and
+        the sources that are no longer present.
+    """
+    known = manifest.get("pages", {})
+    changed = {
+        source: text
+        for source, text in pages.items()
+        if known.get(source, {}).get("hash") != content_hash(text)
+    }
+    removed = [source for source in known if source not in pages]
+    return changed, removed
+
+
+def is_archive(path: str) -> bool:
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def snapshot_fingerprint(path: str) -> str:
+    """
+    Returns a cheap fingerprint of a docs snapshot, without parsing any page.
+
+    Archives are fingerprinted by size and modification time, directories by
+    the relative path, size and modification time of every docs file.
+    """
+    digest = hashlib.sha256()
+    if is_archive(path):
+        stat = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()
+
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"Docs snapshot not found: {path}")
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(SNAPSHOT_EXTENSIONS):
+                continue
+            full_path = os.path.join(root, name)
+            stat = os.stat(full_path)
+            rel = os.path.relpath(full_path, path)
+            digest.update(f"{rel}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _iter_snapshot_files(path: str) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yields (relative posix path, raw bytes) for every docs file of a snapshot.
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(SNAPSHOT_EXTENSIONS):
+                    full_path = os.path.join(root, name)
+                    rel = os.path.relpath(full_path, path).replace(os.sep, "/")
+                    with open(full_path, "rb") as f:
+                        yield rel, f.read()
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(SNAPSHOT_EXTENSIONS):
+                    yield info.filename, archive.read(info)
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path) as archive:
+            for member in archive.getmembers():
+                if member.isfile() and member.name.lower().endswith(SNAPSHOT_EXTENSIONS):
+                    yield member.name, archive.extractfile(member).read()
+    else:
+        raise ValueError(f"Unsupported docs snapshot: {path}")
+
+
+def _strip_root(paths: List[str]) -> str:
+    """
+    Returns the directory shared by every path of an archive (e.g. "crawlee-docs/"), if any.
+    """
+    roots = {p.split("/", 1)[0] for p in paths if "/" in p}
+    if len(roots) == 1 and all("/" in p for p in paths):
+        return roots.pop() + "/"
+    return ""
+
+
+def _html_to_text(raw: bytes) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(raw, "html.parser")
+    for tag in soup(["script", "style", "nav", "header", "footer", "aside"]):
+        tag.decompose()
+    # Docusaurus renders the page body inside <article>; fall back to <main> and <body>.
+    main = soup.find("article") or soup.find("main") or soup.body or soup
+    return main.get_text("\n", strip=True)
+
+
+def load_snapshot_pages(
+    path: str, prefix: str = "", base_url: Optional[str] = None
+) -> Dict[str, str]:
+    """
+    Loads the pages of a local docs snapshot.
+
+    Args:
+        path (str): A directory or an archive (.zip, .tar, .tar.gz, ...) holding
+            the rendered (HTML) or source (Markdown) documentation.
+        prefix (str): Only pages whose path relative to the snapshot root starts
+            with this prefix are kept (e.g. "api/").
+        base_url (str): If given, page sources are `base_url` joined with the
+            relative path, so that they match the urls of the live site.
+
+    Returns:
+        Dict[str, str]: Mapping of page source to page content.
+    """
+    files = list(_iter_snapshot_files(path))
+    root = _strip_root([rel for rel, _ in files]) if is_archive(path) else ""
+    if root and prefix.startswith(root):
+        root = ""
+
+    pages = {}
+    for rel, raw in files:
+        rel = rel[len(root):]
+        if not rel.startswith(prefix):
+            continue
+        if rel.lower().endswith((".html", ".htm")):
+            text = _html_to_text(raw)
+            rel = posixpath.dirname(rel) if posixpath.basename(rel) == "index.html" else rel
+        else:
+            text = raw.decode("utf-8", errors="replace")
+        if not text.strip():
+            continue
+        source = base_url.rstrip("/") + "/" + rel if base_url else rel
+        pages[source] = text
+    return pages
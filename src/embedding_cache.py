@@ -0,0 +1,136 @@
+"""
+Persistent embedding cache shared by RAGNode and GenerateCodeNode.
+Vectors are stored on disk keyed by the embedding model and the hash of the text,
+so identical doc pages and identical queries are only ever embedded once.
+"""
+
+import hashlib
+from array import array
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from src.defaults import NODE_DEFAULTS
+from src.disk_cache import DiskLRUCache
+
+
+def embedder_model_name(embedder) -> str:
+    """
+    Returns a name identifying the model behind a LangChain embedder.
+    """
+    if isinstance(embedder, CachedEmbeddings):
+        return embedder.model_name
+    for attr in ("model", "model_name", "model_id", "deployment"):
+        name = getattr(embedder, attr, None)
+        if isinstance(name, str) and name:
+            return f"{type(embedder).__name__}:{name}"
+    return type(embedder).__name__
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any LangChain embedder and serves repeated texts from a disk cache.
+
+    Attributes:
+        embedder (Embeddings): The wrapped embedder, called only for cache misses.
+        cache (DiskLRUCache): The store holding the float32 vectors.
+        model_name (str): Part of every cache key, so different models never collide.
+
+    Args:
+        embedder (Embeddings): The embedder to wrap.
+        cache (DiskLRUCache): The store holding the vectors.
+        model_name (str): Overrides the model name derived from the embedder.
+    """
+
+    def __init__(
+        self,
+        embedder: Embeddings,
+        cache: DiskLRUCache,
+        model_name: Optional[str] = None,
+    ):
+        self.embedder = embedder
+        self.cache = cache
+        self.model_name = model_name or embedder_model_name(embedder)
+
+    def _key(self, kind: str, text: str) -> str:
+        # Queries and documents are kept apart: some models embed them differently.
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}|{kind}|{digest}"
+
+    @staticmethod
+    def _dumps(vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _loads(raw: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(raw)
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key("doc", text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embedder.embed_documents(list(missing.values()))
+            fresh = {key: self._dumps(vec) for key, vec in zip(missing, vectors)}
+            self.cache.set_many(fresh)
+            cached.update(fresh)
+
+        return [self._loads(cached[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        raw = self.cache.get(key)
+        if raw is None:
+            vector = self.embedder.embed_query(text)
+            self.cache.set(key, self._dumps(vector))
+            return vector
+        return self._loads(raw)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key("doc", text) for text in texts]
+        cached = self.cache.get_many(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+
+        if missing:
+            vectors = await self.embedder.aembed_documents(list(missing.values()))
+            fresh = {key: self._dumps(vec) for key, vec in zip(missing, vectors)}
+            self.cache.set_many(fresh)
+            cached.update(fresh)
+
+        return [self._loads(cached[key]) for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        raw = self.cache.get(key)
+        if raw is None:
+            vector = await self.embedder.aembed_query(text)
+            self.cache.set(key, self._dumps(vector))
+            return vector
+        return self._loads(raw)
+
+
+def cached_embedder(embedder: Embeddings, config: Optional[dict] = None) -> Embeddings:
+    """
+    Wraps an embedder with the disk cache described by an `embedding_cache` config.
+
+    Args:
+        embedder (Embeddings): The embedder to wrap.
+        config (dict): Overrides of NODE_DEFAULTS["embedding_cache"]
+            (`enabled`, `path`, `max_bytes`).
+
+    Returns:
+        Embeddings: The wrapped embedder, or `embedder` itself if caching is disabled.
+    """
+    if isinstance(embedder, CachedEmbeddings):
+        return embedder
+    cfg = {**NODE_DEFAULTS["embedding_cache"], **(config or {})}
+    if not cfg["enabled"]:
+        return embedder
+    return CachedEmbeddings(embedder, DiskLRUCache(cfg["path"], cfg["max_bytes"]))
@@ -0,0 +1,463 @@
+"""
+Streaming monitor of candidate scraper runs.
+
+A broken scraper used to be noticed only once it exited: every line of output
+was collected, then searched for "ERROR". Meanwhile it could retry a failing
+request handler on every page or hang until the 60-second timeout.
+ExecutionMonitor parses the output line by line as it arrives: crawlee log lines
+(`[logger] LEVEL message`) and Python tracebacks, including the ones crawlee
+prints indented under its log lines. On the first fatal error it waits a short
+grace period for the rest of the traceback, then kills the whole process tree;
+it does the same when the run stops making progress. The captured output is
+capped to its first and last lines, and the failure is reported as a
+structured ExecutionFailure. The items the script pushes to its datasets are
+read from the `results` pipe of the process (see src/execution_pool.py) while
+it runs, and count as progress.
+"""
+
+import json
+import logging
+import queue
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, List, NamedTuple, Optional
+
+import psutil
+
+from src.defaults import NODE_DEFAULTS
+
+logger = logging.getLogger(__name__)
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+LOG_RE = re.compile(r"^(?:\[(?P<logger>[\w.]+)\]\s+)?(?P<level>DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL)\s+(?P<message>.*)$")
+FRAME_RE = re.compile(r'File "(?P<path>[^"]+)", line (?P<line>\d+), in (?P<function>[^\s,]+)')
+EXCEPTION_LINE_RE = re.compile(
+    r"^(?P<type>(?:[A-Za-z_]\w*\.)*[A-Z]\w*(?:Error|Exception|Exit|Interrupt|Timeout)\w*)(?::\s*(?P<message>.*))?$"
+)
+RETRY_RE = re.compile(r"^Retrying request to \S+ due to: (?P<message>.*?)(?:\.\s+(?P<summary>File \".*))?$")
+# The errors crawlee logs when a request or the whole crawl fails for good,
+# matched anywhere in a line for outputs not using crawlee's log format.
+CRAWLER_FAILURE_RE = re.compile(
+    r"Request to \S+ failed and reached maximum retries"
+    r"|Aborting crawler run due to error"
+    r"|An exception occurred during handling of failed request"
+)
+# Periodic status lines that crawlee prints while it is stuck as well.
+STATUS_RE = re.compile(r"Current request statistics|AutoscaledPool|current_concurrency = |Final request statistics|crawler.statistics", re.I)
+
+TRACEBACK_HEADER = "Traceback (most recent call last):"
+# Queued by the results reader for every pushed item, as a sign of progress.
+_ITEM = object()
+CHAINED_MARKERS = ("During handling of the above exception", "The above exception was the direct cause")
+
+
+class ExecutionFailure(NamedTuple):
+    """
+    Why a candidate run failed.
+
+    Attributes:
+        kind (str): "exception" (uncaught traceback), "crawler_error" (an ERROR
+            log line of the crawler), "handler_error" (a request handler raised
+            in the script and crawlee is about to retry it), "stall" (no
+            progress), "timeout" or "exit" (non-zero exit without a parsed error).
+        exc_type (str): The exception type, if known.
+        message (str): The exception or log message.
+        frame (str): The innermost frame of the script, else of the traceback,
+            as "path:line in function".
+        source (str): The source line of that frame.
+        traceback (str): The captured traceback or log block.
+        output (str): The capped output of the run.
+    """
+    kind: str
+    exc_type: Optional[str]
+    message: str
+    frame: Optional[str]
+    source: Optional[str]
+    traceback: str
+    output: str
+
+    def describe(self) -> str:
+        """
+        Formats the failure for the repair prompt, with the exception line first.
+        """
+        headline = f"{self.exc_type}: {self.message}" if self.exc_type else self.message
+        lines = [headline]
+        if self.frame:
+            lines.append(f"  at {self.frame}")
+        if self.source:
+            lines.append(f"    {self.source}")
+        lines.append(f"Failure kind: {self.kind}")
+        if self.traceback:
+            lines += ["", self.traceback]
+        if self.output and (not self.traceback or self.traceback not in self.output):
+            lines += ["", "Output:", self.output]
+        return "\n".join(lines)
+
+
+class ExecutionResult(NamedTuple):
+    """
+    The outcome of a monitored run: a status ("ok", "error" or "timeout"),
+    its capped output, unless it succeeded the failure, and the items it
+    pushed to its datasets.
+    """
+    status: str
+    output: str
+    failure: Optional[ExecutionFailure] = None
+    items: Optional[List[Any]] = None
+    # Set by the caller, e.g. the schema validation of the items.
+    validation: Any = None
+
+
+class OutputCapture:
+    """
+    Keeps the first `head` and last `tail` lines of an output.
+    """
+
+    def __init__(self, head: int, tail: int):
+        self.head: List[str] = []
+        self.tail = deque(maxlen=tail)
+        self.head_size = head
+        self.dropped = 0
+
+    def add(self, line: str) -> None:
+        if len(self.head) < self.head_size:
+            self.head.append(line)
+            return
+        if len(self.tail) == self.tail.maxlen:
+            self.dropped += 1
+        self.tail.append(line)
+
+    def text(self) -> str:
+        lines = list(self.head)
+        if self.dropped:
+            lines.append(f"... [{self.dropped} lines omitted] ...")
+        lines += self.tail
+        return "\n".join(lines).strip()
+
+
+class OutputParser:
+    """
+    Incrementally parses the output of a run into a failure, if any.
+
+    Args:
+        script_path (str): Path of the candidate script, whose frames are
+            preferred when reporting where an error happened.
+        fail_on_retry (bool): Whether a request handler raising in the script
+            is fatal, instead of waiting for crawlee to retry it.
+        max_traceback_lines (int): Lines of a traceback kept in the failure.
+    """
+
+    def __init__(self, script_path: Optional[str] = None, fail_on_retry: bool = False, max_traceback_lines: int = 60):
+        self.script_path = script_path
+        self.fail_on_retry = fail_on_retry
+        self.max_traceback_lines = max_traceback_lines
+        self.failure: Optional[ExecutionFailure] = None
+        # The failure is complete once its traceback (if any) has been read.
+        self.complete = False
+        self._block: List[str] = []
+        self._frames: List[tuple] = []
+        self._in_traceback = False
+        self._chained = False
+        # Indentation of the last frame line while its source line is expected, else None.
+        self._frame_indent: Optional[int] = None
+
+    def feed(self, line: str) -> bool:
+        """
+        Parses one line; returns whether it shows progress, i.e. is not a periodic status line.
+        """
+        line = ANSI_RE.sub("", line.rstrip("\n"))
+        stripped = line.strip()
+
+        if stripped.startswith(TRACEBACK_HEADER):
+            if not self._in_traceback and not self._chained:
+                self._block, self._frames = [], []
+            self._in_traceback, self._chained = True, False
+            self._frame_indent = None
+            self._keep(line)
+            return True
+        if stripped.startswith(CHAINED_MARKERS) and self._block:
+            # The exception just read is the cause of the next traceback: keep both in one block.
+            self._chained = True
+            self._keep("")
+            self._keep(line)
+            self._keep("")
+            return True
+
+        log = LOG_RE.match(stripped)
+        if self._in_traceback and not log:
+            self._traceback_line(line, stripped)
+            return True
+        self._in_traceback = False
+
+        if log:
+            self._log_line(log.group("level"), log.group("message"), line)
+            return not STATUS_RE.search(log.group("message"))
+        if self.failure is None and CRAWLER_FAILURE_RE.search(stripped):
+            self._fail("crawler_error", None, stripped, traceback=stripped, complete=False)
+        return True
+
+    def _keep(self, line: str) -> None:
+        if len(self._block) < self.max_traceback_lines:
+            self._block.append(line)
+
+    def _traceback_line(self, line: str, stripped: str) -> None:
+        self._keep(line)
+        indent = len(line) - len(line.lstrip())
+        frame = FRAME_RE.search(stripped)
+        if frame:
+            self._frames.append((frame.group("path"), frame.group("line"), frame.group("function"), None))
+            self._frame_indent = indent
+            return
+        if not stripped or set(stripped) <= set("^~ ") or stripped.startswith(CHAINED_MARKERS):
+            self._frame_indent = None
+            return
+        if self._frame_indent is not None and indent > self._frame_indent:
+            path, lineno, function, _ = self._frames[-1]
+            self._frames[-1] = (path, lineno, function, stripped)
+            self._frame_indent = None
+            return
+        self._frame_indent = None
+        exception = EXCEPTION_LINE_RE.match(stripped)
+        if exception:
+            self._in_traceback = False
+            kind = self.failure.kind if self.failure is not None and not self.complete else "exception"
+            self._fail(
+                kind,
+                exception.group("type").rsplit(".", 1)[-1],
+                (exception.group("message") or "").strip(),
+                traceback="\n".join(self._block),
+                frames=self._frames,
+                # A chained traceback may follow; the grace period bounds the wait.
+                complete=False,
+            )
+
+    def _log_line(self, level: str, message: str, line: str) -> None:
+        if level in ("ERROR", "CRITICAL"):
+            self._fail("crawler_error", None, message, traceback=line.strip(), complete=False)
+            return
+        if level.startswith("WARN") and self.fail_on_retry:
+            retry = RETRY_RE.match(message)
+            summary = FRAME_RE.search(retry.group("summary") or "") if retry else None
+            if summary and self._in_script(summary.group("path")):
+                source = (retry.group("summary") or "")[summary.end():].strip(" ,") or None
+                frame = (summary.group("path"), summary.group("line"), summary.group("function"), source)
+                self._fail(
+                    "handler_error", None, retry.group("message"), traceback=line.strip(),
+                    frames=[frame], complete=True,
+                )
+
+    def _in_script(self, path: str) -> bool:
+        return self.script_path is not None and path.endswith(self.script_path.rsplit("/", 1)[-1])
+
+    def _fail(self, kind, exc_type, message, traceback="", frames=(), complete=True) -> None:
+        if self.complete:
+            return
+        frame = None
+        script_frames = [f for f in frames if self._in_script(f[0])]
+        if script_frames or frames:
+            frame = (script_frames or list(frames))[-1]
+        previous = self.failure
+        self.failure = ExecutionFailure(
+            kind=kind,
+            exc_type=exc_type or (previous.exc_type if previous else None),
+            message=message or (previous.message if previous else ""),
+            frame=f"{frame[0]}:{frame[1]} in {frame[2]}" if frame else (previous.frame if previous else None),
+            source=frame[3] if frame else (previous.source if previous else None),
+            traceback=traceback if previous is None or previous.traceback in traceback
+            else "\n".join(filter(None, [previous.traceback, traceback])),
+            output="",
+        )
+        self.complete = complete
+
+
+def kill_tree(proc: subprocess.Popen) -> None:
+    """
+    Kills a process with all its descendants (playwright driver, browsers).
+    """
+    try:
+        children = psutil.Process(proc.pid).children(recursive=True)
+    except psutil.Error:
+        children = []
+    for process in children:
+        try:
+            process.kill()
+        except psutil.Error:
+            pass
+    if proc.poll() is None:
+        proc.kill()
+
+
+class ExecutionMonitor:
+    """
+    Watches a running candidate and stops it early when it fails.
+
+    Args:
+        timeout (float): Seconds the run may take in total.
+        stall_timeout (float): Seconds without progress (output other than
+            periodic status lines) before the run is stopped.
+        grace_period (float): Seconds given to a failing run to print the rest
+            of its traceback before it is killed.
+        max_output_lines (int): Lines of output kept, split between its start and end.
+        fail_on_retry (bool): Whether a request handler raising in the script is fatal.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 60,
+        stall_timeout: float = 30,
+        grace_period: float = 1.0,
+        max_output_lines: int = 400,
+        fail_on_retry: bool = False,
+    ):
+        self.timeout = timeout
+        self.stall_timeout = stall_timeout
+        self.grace_period = grace_period
+        self.max_output_lines = max_output_lines
+        self.fail_on_retry = fail_on_retry
+
+    @classmethod
+    def from_config(cls, config: Optional[dict] = None) -> "ExecutionMonitor":
+        """
+        Creates a monitor from overrides of NODE_DEFAULTS["execution_monitor"].
+        """
+        config = {**NODE_DEFAULTS["execution_monitor"], **(config or {})}
+        return cls(
+            timeout=config["timeout"],
+            stall_timeout=config["stall_timeout"],
+            grace_period=config["grace_period"],
+            max_output_lines=config["max_output_lines"],
+            fail_on_retry=config["fail_on_retry"],
+        )
+
+    def watch(
+        self,
+        proc: subprocess.Popen,
+        script_path: Optional[str] = None,
+        on_item: Optional[Callable[[Any], None]] = None,
+    ) -> ExecutionResult:
+        """
+        Reads the output of a run until it exits or is stopped.
+
+        Args:
+            proc (subprocess.Popen): The run, with its combined output readable
+                as text from `stdout` and, optionally, its pushed items as JSON
+                lines from `results`.
+            script_path (str): Path of the candidate script.
+            on_item (Callable): Called with every pushed item as it arrives, from the reader thread.
+
+        Returns:
+            ExecutionResult: The status, the capped output, the failure, if any, and the pushed items.
+        """
+        lines: "queue.Queue" = queue.Queue()
+        items: List[Any] = []
+
+        def read():
+            try:
+                for line in proc.stdout:
+                    lines.put(line)
+            except (OSError, ValueError):
+                pass
+            finally:
+                lines.put(None)
+
+        def read_results(results):
+            try:
+                for line in results:
+                    try:
+                        item = json.loads(line)
+                    except ValueError:
+                        continue
+                    items.append(item)
+                    if on_item is not None:
+                        on_item(item)
+                    lines.put(_ITEM)
+            except (OSError, ValueError):
+                pass
+            finally:
+                results.close()
+
+        readers = [threading.Thread(target=read, name="execution-monitor", daemon=True)]
+        if getattr(proc, "results", None) is not None:
+            readers.append(
+                threading.Thread(target=read_results, args=(proc.results,), name="execution-results", daemon=True)
+            )
+        for reader in readers:
+            reader.start()
+
+        parser = OutputParser(script_path, self.fail_on_retry)
+        capture = OutputCapture(self.max_output_lines // 4, self.max_output_lines - self.max_output_lines // 4)
+        start = last_progress = time.monotonic()
+        failed_at = None
+        stopped = None
+
+        while True:
+            now = time.monotonic()
+            deadlines = {"timeout": start + self.timeout, "stall": last_progress + self.stall_timeout}
+            if failed_at is not None:
+                deadlines["failure"] = failed_at + self.grace_period
+            reason, deadline = min(deadlines.items(), key=lambda item: item[1])
+            if deadline <= now:
+                stopped = reason
+                break
+            try:
+                line = lines.get(timeout=deadline - now)
+            except queue.Empty:
+                continue
+            if line is None:
+                break
+            if line is _ITEM:
+                last_progress = time.monotonic()
+                continue
+            capture.add(line.rstrip("\n"))
+            if parser.feed(line):
+                last_progress = time.monotonic()
+            if parser.failure is not None:
+                if parser.complete:
+                    stopped = "failure"
+                    break
+                failed_at = failed_at or time.monotonic()
+
+        if stopped is not None:
+            kill_tree(proc)
+        try:
+            proc.wait(timeout=max(self.grace_period, 5))
+        except subprocess.TimeoutExpired:
+            kill_tree(proc)
+            proc.wait()
+            stopped = stopped or "timeout"
+        for reader in readers:
+            reader.join(timeout=1)
+        output = capture.text()
+        elapsed = time.monotonic() - start
+
+        if stopped == "timeout":
+            logger.info(f"Candidate run timed out after {elapsed:.1f}s")
+            failure = ExecutionFailure(
+                "timeout", None, "Execution timed out.", None, None, "", output
+            )
+            return ExecutionResult("timeout", output, failure, items)
+        if stopped == "stall":
+            failure = ExecutionFailure(
+                "stall",
+                None,
+                f"No progress for {self.stall_timeout:.0f}s, the scraper was stopped "
+                "(waiting on a selector or page that never appears?)",
+                None,
+                None,
+                "",
+                output,
+            )
+            return ExecutionResult("error", output, failure, items)
+        if parser.failure is not None:
+            if stopped:
+                logger.info(f"Candidate run stopped after {elapsed:.1f}s: {parser.failure.kind}")
+            return ExecutionResult("error", output, parser.failure._replace(output=output), items)
+        if proc.returncode != 0:
+            failure = ExecutionFailure(
+                "exit", None, f"The script exited with code {proc.returncode}.", None, None, "", output
+            )
+            return ExecutionResult("error", output, failure, items)
+        return ExecutionResult("ok", output, items=items)
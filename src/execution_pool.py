@@ -0,0 +1,289 @@
+"""
+Pool of pre-warmed worker processes running candidate scrapers.
+
+Starting `python candidate.py` costs the cold import of crawlee, playwright and
+pydantic plus a Chromium launch before any scraping happens. ExecutionPool keeps
+`size` idle workers (src/candidate_runtime.py) that have already done the
+imports and a Chromium running for all of them to connect to over CDP, headless
+unless the graph runs headed.
+`run()` hands a script to an idle worker and returns it as a `subprocess.Popen`,
+so callers read its output, wait on it with a timeout and kill it exactly as
+they would a fresh interpreter. The items the script pushes to crawlee datasets
+are readable as JSON lines from the `results` pipe of the returned process. Every worker runs a single script and is
+replaced right away, so runs never share interpreter state.
+"""
+
+import atexit
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from src.defaults import NODE_DEFAULTS
+
+logger = logging.getLogger(__name__)
+
+RUNTIME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "candidate_runtime.py")
+BROWSER_ENDPOINT_ENV = "DS490_BROWSER_ENDPOINT"
+RESULT_FD_ENV = "DS490_RESULT_FD"
+DEVTOOLS_RE = re.compile(r"DevTools listening on (ws://\S+)")
+
+_pools: Dict[tuple, "ExecutionPool"] = {}
+_pools_lock = threading.Lock()
+
+
+class SharedBrowser:
+    """
+    A Chromium started once and reached over CDP by the workers.
+
+    Args:
+        headless (bool): Whether the browser runs without a window.
+        startup_timeout (float): Seconds to wait for the DevTools endpoint.
+    """
+
+    def __init__(self, headless: bool = True, startup_timeout: float = 20):
+        self.headless = headless
+        self.startup_timeout = startup_timeout
+        self.process: Optional[subprocess.Popen] = None
+        self.endpoint: Optional[str] = None
+        self._profile_dir: Optional[str] = None
+
+    @staticmethod
+    def executable_path() -> str:
+        try:
+            from playwright.sync_api import sync_playwright
+        except ImportError:
+            raise ImportError(
+                "playwright is not installed. Please install it using 'pip install playwright'."
+            )
+        with sync_playwright() as playwright:
+            return playwright.chromium.executable_path
+
+    def start(self) -> str:
+        """
+        Launches Chromium and returns its DevTools websocket endpoint.
+        """
+        self._profile_dir = tempfile.mkdtemp(prefix="ds490-chromium-")
+        self.process = subprocess.Popen(
+            [
+                self.executable_path(),
+                *(["--headless=new"] if self.headless else []),
+                "--remote-debugging-port=0",
+                f"--user-data-dir={self._profile_dir}",
+                "--no-first-run",
+                "--no-default-browser-check",
+                "--disable-dev-shm-usage",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+
+        found = threading.Event()
+
+        def read_endpoint():
+            # Drains stderr until the browser exits so it never blocks on a full pipe.
+            for line in self.process.stderr:
+                match = DEVTOOLS_RE.search(line)
+                if match and not found.is_set():
+                    self.endpoint = match.group(1)
+                    found.set()
+
+        threading.Thread(target=read_endpoint, name="chromium-stderr", daemon=True).start()
+        if not found.wait(self.startup_timeout):
+            self.close()
+            raise RuntimeError("Chromium did not report a DevTools endpoint")
+        return self.endpoint
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def close(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+        self.endpoint = None
+        if self._profile_dir:
+            shutil.rmtree(self._profile_dir, ignore_errors=True)
+            self._profile_dir = None
+
+
+class ExecutionPool:
+    """
+    Keeps pre-warmed workers ready to run candidate scripts.
+
+    Args:
+        size (int): Number of idle workers kept ready.
+        shared_browser (bool): Whether the workers connect to one running Chromium
+            instead of launching their own.
+        headless (bool): Whether the shared browser runs without a window.
+        python (str): Interpreter used for the workers.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        shared_browser: bool = True,
+        headless: bool = True,
+        python: str = sys.executable,
+    ):
+        self.size = size
+        self.shared_browser = shared_browser
+        self.headless = headless
+        self.python = python
+        self.browser: Optional[SharedBrowser] = None
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._started = False
+        atexit.register(self.close)
+
+    def start(self) -> None:
+        """
+        Launches the shared browser (if enabled) and fills the pool.
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            if self.shared_browser:
+                self._start_browser()
+            self._fill()
+
+    def _start_browser(self) -> None:
+        browser = SharedBrowser(self.headless)
+        try:
+            browser.start()
+            self.browser = browser
+        except Exception as e:
+            logger.warning(f"Shared browser unavailable, workers will launch their own: {e}")
+
+    def _spawn(self) -> subprocess.Popen:
+        return _spawn_worker(self.python, self.browser.endpoint if self.browser else None)
+
+    def _fill(self) -> None:
+        while len(self._idle) < self.size:
+            self._idle.append(self._spawn())
+
+    def run(self, path: str, env: Optional[dict] = None, cwd: Optional[str] = None) -> subprocess.Popen:
+        """
+        Runs a script in a warm worker.
+
+        Args:
+            path (str): The script to run.
+            env (dict): Environment variables set for this run only.
+            cwd (str): Working directory of the run, defaulting to the current one.
+
+        Returns:
+            subprocess.Popen: The worker running the script, with its combined
+            stdout and stderr readable as text from `stdout` and the pushed
+            items as JSON lines from `results`.
+        """
+        self.start()
+        with self._lock:
+            if self.browser is not None and not self.browser.alive():
+                # The browser crashed: idle workers point to a dead endpoint.
+                self.browser.close()
+                self.browser = None
+                self._discard_idle()
+                if self.shared_browser:
+                    self._start_browser()
+            worker = None
+            while self._idle and worker is None:
+                worker = self._idle.popleft()
+                if worker.poll() is not None:
+                    worker.results.close()
+                    worker = None
+            if worker is None:
+                worker = self._spawn()
+            self._fill()
+
+        return _submit(worker, path, env, cwd)
+
+    def _discard_idle(self) -> None:
+        while self._idle:
+            worker = self._idle.popleft()
+            if worker.poll() is None:
+                worker.kill()
+            worker.wait()
+            worker.results.close()
+
+    def close(self) -> None:
+        """
+        Stops the idle workers and the shared browser.
+        """
+        with self._lock:
+            self._discard_idle()
+            if self.browser is not None:
+                self.browser.close()
+                self.browser = None
+            self._started = False
+
+
+def _spawn_worker(python: str, browser_endpoint: Optional[str] = None) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.pop(BROWSER_ENDPOINT_ENV, None)
+    if browser_endpoint:
+        env[BROWSER_ENDPOINT_ENV] = browser_endpoint
+    # A pipe of its own for the pushed items, so they never interleave with the log output.
+    read_fd, write_fd = os.pipe()
+    env[RESULT_FD_ENV] = str(write_fd)
+    try:
+        worker = subprocess.Popen(
+            [python, "-u", RUNTIME_PATH],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            env=env,
+            pass_fds=(write_fd,),
+        )
+    except BaseException:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+    worker.results = os.fdopen(read_fd, "r", encoding="utf-8")
+    return worker
+
+
+def _submit(worker: subprocess.Popen, path: str, env: Optional[dict], cwd: Optional[str]) -> subprocess.Popen:
+    worker.stdin.write(json.dumps({"path": path, "env": env or {}, "cwd": cwd or os.getcwd()}) + "\n")
+    worker.stdin.close()
+    return worker
+
+
+def run_candidate(path: str, env: Optional[dict] = None, cwd: Optional[str] = None) -> subprocess.Popen:
+    """
+    Runs a script in a freshly started worker, for when the pool is disabled.
+
+    It costs the same cold start as `python <path>`, but applies the per-run
+    settings of the runtime (environment, page fixtures).
+    """
+    return _submit(_spawn_worker(sys.executable), path, env, cwd)
+
+
+def shared_pool(config: Optional[dict] = None) -> Optional[ExecutionPool]:
+    """
+    Returns the process-wide ExecutionPool for overrides of
+    NODE_DEFAULTS["execution_pool"], or None if the pool is disabled.
+    """
+    config = {**NODE_DEFAULTS["execution_pool"], **(config or {})}
+    if not config["enabled"]:
+        return None
+    key = (config["size"], config["shared_browser"], config["headless"])
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ExecutionPool(config["size"], config["shared_browser"], config["headless"])
+        return _pools[key]
@@ -0,0 +1,136 @@
+"""
+Lexical retrieval over the Crawlee doc chunks.
+
+Tracebacks and generated code are dominated by exact API symbols
+(`PlaywrightCrawlingContext`, `enqueue_links`, `push_data`) that dense vectors
+match poorly. LexicalIndex scores chunks with BM25 over identifier-aware tokens
+and keeps an exact symbol -> chunks map for direct lookups.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+# Identifiers that look like API symbols: CamelCase names with at least two humps
+# (PlaywrightCrawler) or snake_case names (enqueue_links, max_requests_per_crawl).
+SYMBOL_RE = re.compile(r"\b(?:[A-Z][a-z0-9]+(?:[A-Z][A-Za-z0-9]*)+|[a-z][a-z0-9]*(?:_[a-z0-9]+)+)\b")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was with "
+    "not no can will should into use used using how what when which".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lowercased tokens, keeping whole identifiers as well as their parts.
+
+    Example:
+        >>> tokenize("await context.enqueue_links()")
+        ['await', 'context', 'enqueue_links', 'enqueue', 'links']
+    """
+    tokens = []
+    for identifier in IDENTIFIER_RE.findall(text):
+        lowered = identifier.lower()
+        if lowered in STOPWORDS:
+            continue
+        tokens.append(lowered)
+        parts = [p.lower() for part in identifier.split("_") for p in CAMEL_RE.findall(part)]
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p not in STOPWORDS)
+    return tokens
+
+
+def extract_symbols(text: str) -> List[str]:
+    """
+    Returns the API-looking symbols of a text (code, traceback, error message), in order of appearance.
+    """
+    return list(dict.fromkeys(SYMBOL_RE.findall(text or "")))
+
+
+class LexicalIndex:
+    """
+    BM25 index over doc chunks, with an exact symbol lookup.
+
+    Args:
+        documents (Iterable[Tuple[id, str]]): The chunk ids and texts to index.
+        k1 (float): BM25 term frequency saturation.
+        b (float): BM25 length normalization.
+    """
+
+    def __init__(self, documents: Iterable[Tuple[object, str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[object] = []
+        self.lengths: List[int] = []
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.symbols: Dict[str, Set[int]] = defaultdict(set)
+
+        for doc_id, text in documents:
+            row = len(self.ids)
+            self.ids.append(doc_id)
+            tokens = tokenize(text)
+            self.lengths.append(len(tokens))
+            for token, count in Counter(tokens).items():
+                self.postings[token][row] = count
+            for symbol in extract_symbols(text):
+                self.symbols[symbol].add(row)
+
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _idf(self, token: str) -> float:
+        df = len(self.postings.get(token, ()))
+        return math.log(1 + (len(self.ids) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[object, float]]:
+        """
+        Returns the ids of the best BM25 matches for the query, best first.
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = self._idf(token)
+            for row, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[row] / (self.avg_length or 1))
+                scores[row] += idf * tf * (self.k1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [(self.ids[row], score) for row, score in best]
+
+    def lookup_symbols(self, symbols: Iterable[str], limit: int = 10) -> List[Tuple[object, float]]:
+        """
+        Returns the chunks mentioning the given symbols verbatim, ranked by the
+        number of distinct symbols they contain (rarer symbols weigh more).
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for symbol in set(symbols):
+            rows = self.symbols.get(symbol)
+            if not rows:
+                continue
+            weight = 1 / math.log(2 + len(rows))
+            for row in rows:
+                scores[row] += weight
+        best = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [(self.ids[row], score) for row, score in best]
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[object]], weights: List[float] = None, k: int = 60
+) -> List[Tuple[object, float]]:
+    """
+    Fuses ranked id lists: every id scores sum(weight / (k + rank)) over the lists it appears in.
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[object, float] = defaultdict(float)
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
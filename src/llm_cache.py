@@ -0,0 +1,118 @@
+"""
+Persistent cache of LLM completions.
+
+With a deterministic model (temperature 0, or a fixed `seed`), the same
+rendered prompt sent to the same model with the same parameters yields the same
+completion, so re-running a project or a benchmark does not need to call the
+provider again. CompletionCache is a LangChain cache stored in a DiskLRUCache:
+LangChain keys every lookup on the rendered prompt and the model's
+`llm_string` (model name and sampling parameters), and consults the cache of a
+model in every `invoke`, including the ones made by the scrapegraphai helpers.
+`use_completion_cache` attaches it to deterministic models only.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+from src.defaults import NODE_DEFAULTS
+from src.disk_cache import DiskLRUCache
+
+_stores: Dict[str, DiskLRUCache] = {}
+_stores_lock = threading.Lock()
+
+
+class CompletionCache(BaseCache):
+    """
+    LangChain cache of completions kept in a DiskLRUCache.
+
+    Attributes:
+        store (DiskLRUCache): The store of the serialized generations.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups not found in the cache, or bypassed.
+        bypass (bool): Never answer from the cache, but still store the fresh
+            completions (to refresh the entries).
+
+    Args:
+        store (DiskLRUCache): The store of the serialized generations.
+        bypass (bool): Whether lookups always miss.
+    """
+
+    def __init__(self, store: DiskLRUCache, bypass: bool = False):
+        self.store = store
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(json.dumps([llm_string, prompt]).encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        raw = None if self.bypass else self.store.get(self._key(prompt, llm_string))
+        generations = None
+        if raw is not None:
+            try:
+                generations = [loads(generation) for generation in json.loads(raw)]
+            except Exception:
+                # Entry written by an incompatible LangChain version: treat as a miss.
+                generations = None
+        if generations is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        raw = json.dumps([dumps(generation) for generation in return_val]).encode("utf-8")
+        self.store.set(self._key(prompt, llm_string), raw)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def deterministic(llm) -> bool:
+    """
+    Whether a model's completions are reproducible: temperature 0 or a fixed seed.
+    """
+    return getattr(llm, "temperature", None) == 0 or getattr(llm, "seed", None) is not None
+
+
+def create_completion_cache(config: Optional[dict] = None) -> Optional[CompletionCache]:
+    """
+    Creates a CompletionCache from overrides of NODE_DEFAULTS["llm_cache"], or None if disabled.
+    Caches using the same file share one store.
+    """
+    config = {**NODE_DEFAULTS["llm_cache"], **(config or {})}
+    if not config["enabled"]:
+        return None
+    with _stores_lock:
+        if config["path"] not in _stores:
+            _stores[config["path"]] = DiskLRUCache(config["path"], config["max_bytes"])
+        store = _stores[config["path"]]
+    return CompletionCache(store, bypass=config["bypass"])
+
+
+def use_completion_cache(llm, cache: Optional[CompletionCache]):
+    """
+    Attaches `cache` to a deterministic model, and detaches it from a model that
+    is not (e.g. a copy given a higher temperature).
+
+    Returns:
+        The model.
+    """
+    if cache is None or not hasattr(llm, "cache"):
+        return llm
+    if deterministic(llm):
+        llm.cache = cache
+    elif llm.cache is cache:
+        llm.cache = None
+    return llm
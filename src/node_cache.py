@@ -0,0 +1,232 @@
+"""
+Per-node cache of the upstream graph results.
+
+Every node's output is stored under a hash of exactly what it reads: the state
+keys its `input` expression selects, its configuration (models by their
+identifying parameters, schemas by their JSON schema) and its type. A changed
+schema therefore only recomputes the nodes configured with it, and a changed
+prompt leaves the fetched page cached. Nodes whose results go stale (FetchNode)
+get a time to live. Outputs that cannot be serialized (the docs index client of
+RAGNode) are not cached, so those nodes always run. Entries are kept in a
+BlobStore, so a page read by several nodes or cached for several prompts is
+stored once, compressed, and the cache stays under a size cap; the
+`<key>.json` files of the previous one-file-per-entry layout are moved into it
+when the cache is opened.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from src.blob_store import BlobStore
+from src.defaults import NODE_DEFAULTS
+
+logger = logging.getLogger(__name__)
+
+# Configuration that does not change what a node outputs.
+_IGNORED_CONFIG = {"verbose", "force"}
+
+_KEY = re.compile(r"[A-Za-z_]\w*")
+
+# An entry file of the previous layout, named by the key of the entry, or one left half-written.
+_LEGACY_ENTRY = re.compile(r"^([0-9a-f]{64})\.json(\.\d+\.\d+\.tmp)?$")
+
+# Legacy entries moved into the store per index rewrite.
+_IMPORT_BATCH = 100
+
+
+def encode(value: Any) -> Any:
+    """
+    Converts a state value to JSON, Documents included.
+
+    Raises:
+        TypeError: If the value holds anything else than JSON values and Documents.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, Document):
+        return {"__document__": [value.page_content, value.metadata]}
+    if isinstance(value, (list, tuple)):
+        return [encode(item) for item in value]
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        return {key: encode(item) for key, item in value.items()}
+    raise TypeError(f"{type(value).__name__} is not cacheable")
+
+
+def decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if isinstance(value, dict):
+        if set(value) == {"__document__"}:
+            page_content, metadata = value["__document__"]
+            return Document(page_content=page_content, metadata=metadata)
+        return {key: decode(item) for key, item in value.items()}
+    return value
+
+
+def fingerprint(value: Any) -> Any:
+    """
+    A JSON description of a configuration value that changes when its behaviour does.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {str(key): fingerprint(item) for key, item in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [fingerprint(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(map(str, value))
+    if isinstance(value, type) and hasattr(value, "model_json_schema"):
+        return value.model_json_schema()
+    # LangChain models describe themselves (model name, temperature, ...) with _identifying_params.
+    params = getattr(value, "_identifying_params", None)
+    if isinstance(params, dict):
+        return {"__type__": type(value).__name__, **fingerprint(params)}
+    return type(value).__name__
+
+
+def input_keys(node) -> List[str]:
+    """
+    The state keys mentioned in a node's `input` expression, e.g.
+    "user_prompt & (relevant_chunks | parsed_doc | doc)" gives all four.
+    """
+    return _KEY.findall(getattr(node, "input", None) or "")
+
+
+def read_keys(node, state: dict) -> List[str]:
+    """
+    The state keys a node reads: the ones its `input` expression selects in this state.
+    """
+    if not getattr(node, "input", None):
+        return []
+    try:
+        return list(node.get_input_keys(state))
+    except Exception:
+        # Not a BaseNode, or an expression the state does not satisfy: every present key it mentions.
+        return [key for key in input_keys(node) if key in state]
+
+
+class NodeCache:
+    """
+    Node outputs keyed on the node inputs and configuration.
+
+    Attributes:
+        hits (int): Nodes whose output was read from the cache.
+        misses (int): Nodes that had to run.
+
+    Args:
+        store (BlobStore): Where the entries are stored.
+        ttl (Dict[str, float]): Seconds an entry lives, by node class name; others never expire.
+        refresh (bool): Never read entries, but still write them (e.g. with `force`).
+    """
+
+    def __init__(self, store: BlobStore, ttl: Optional[Dict[str, float]] = None, refresh: bool = False):
+        self.store = store
+        self.ttl = ttl or {}
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, node, state: dict) -> Optional[str]:
+        """
+        Hashes a node's type, outputs, configuration and the inputs it reads, or
+        returns None if an input cannot be serialized.
+        """
+        try:
+            inputs = {key: encode(state[key]) for key in read_keys(node, state)}
+        except TypeError as e:
+            logger.debug(f"{type(node).__name__} is not cached: {e}")
+            return None
+        config = {
+            key: fingerprint(value)
+            for key, value in (getattr(node, "node_config", None) or {}).items()
+            if key not in _IGNORED_CONFIG
+        }
+        source = json.dumps(
+            [type(node).__name__, getattr(node, "output", None), config, inputs],
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+    def get(self, node, key: str) -> Optional[dict]:
+        """
+        Returns the state keys a node set, or None if they are not cached or have expired.
+        """
+        entry = None if self.refresh else self.store.get(key)
+        ttl = self.ttl.get(type(node).__name__)
+        if entry is not None and ttl is not None and time.time() - entry["created"] > ttl:
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return decode(entry["changes"])
+
+    def set(self, node, key: str, changes: dict) -> None:
+        """
+        Stores the state keys a node set, unless one of them cannot be serialized.
+        """
+        try:
+            entry = {"node": type(node).__name__, "created": time.time(), "changes": encode(changes)}
+        except TypeError as e:
+            logger.debug(f"{type(node).__name__} output is not cached: {e}")
+            return
+        self.store.put(key, entry)
+
+
+def import_legacy_entries(store: BlobStore) -> int:
+    """
+    Moves the entries of the previous layout, one `<key>.json` file per entry in
+    the store directory, into the store, and deletes the files, unreadable and
+    half-written ones included. Storing an entry twice is harmless, so processes
+    opening the cache at the same time can all run it.
+
+    Returns:
+        int: The number of entries imported.
+    """
+    try:
+        names = [name for name in os.listdir(store.directory) if _LEGACY_ENTRY.match(name)]
+    except OSError:
+        return 0
+    imported = 0
+    for start in range(0, len(names), _IMPORT_BATCH):
+        batch = {}
+        for name in names[start:start + _IMPORT_BATCH]:
+            match = _LEGACY_ENTRY.match(name)
+            if match.group(2):
+                continue
+            try:
+                with open(os.path.join(store.directory, name), "r") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+            if isinstance(entry, dict) and {"created", "changes"} <= set(entry):
+                batch[match.group(1)] = entry
+        store.put_many(batch)
+        imported += len(batch)
+        for name in names[start:start + _IMPORT_BATCH]:
+            try:
+                os.remove(os.path.join(store.directory, name))
+            except OSError:
+                pass
+    if names:
+        logger.info(f"Node cache {store.directory}: imported {imported} entries of the previous layout")
+    return imported
+
+
+def create_node_cache(config: Optional[dict] = None, refresh: bool = False) -> Optional[NodeCache]:
+    """
+    Creates a NodeCache from overrides of NODE_DEFAULTS["node_cache"], or None if disabled.
+    """
+    config = {**NODE_DEFAULTS["node_cache"], **(config or {})}
+    if not config["enabled"]:
+        return None
+    store = BlobStore(config["dir"], config["max_bytes"], config["min_blob_bytes"], config["level"])
+    import_legacy_entries(store)
+    return NodeCache(store, config["ttl"], refresh)
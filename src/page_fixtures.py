@@ -0,0 +1,146 @@
+"""
+Record-and-replay archive of the pages fetched by candidate scrapers.
+
+The first execution of a job records every browser response, one HAR entry
+per line as it arrives, so a run killed on timeout keeps what it fetched; the
+recordings are then merged into the archive, along with the entries it
+already holds, and the following repair attempts are served from it through
+Playwright's `route_from_har`, so they neither wait on nor hit the target site
+again. Requests missing from the archive (a new link followed by a repaired
+scraper) still go to the network.
+
+An archive kept between jobs (a given `directory`) lives in a subdirectory
+keyed by the source URL of the job, so that jobs on other sites never replay
+it, and is recorded again once it is older than `ttl` seconds. To invalidate
+it sooner, delete that subdirectory (or the whole `directory`).
+
+Only Playwright traffic is covered: the HTTP crawlers (BeautifulSoupCrawler,
+ParselCrawler) fetch pages without a browser and always use the network.
+
+The recording itself happens in the candidate process (src/candidate_runtime.py),
+driven by the DS490_HAR_MODE and DS490_HAR_DIR environment variables.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+HAR_MODE_ENV = "DS490_HAR_MODE"
+HAR_DIR_ENV = "DS490_HAR_DIR"
+ARCHIVE_NAME = "archive.har"
+RECORDING_PATTERN = "record-*.jsonl"
+
+
+def source_key(source: str) -> str:
+    """
+    Names the archive directory of a source URL (or local directory): its host and a hash of it.
+    """
+    host = urlsplit(source).hostname or "local"
+    return f"{host}-{hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]}"
+
+
+class PageFixtures:
+    """
+    The page archive of one generation job.
+
+    Args:
+        directory (str): Where archives are kept. If None, a temporary directory
+            is used and removed by `close()`; a given directory is kept, so its
+            archive is replayed by later jobs on the same source too.
+        source (str): The source URL of the job. The archive of a kept directory
+            is stored in a subdirectory keyed by it (see `source_key`).
+        ttl (float): Seconds after which the archive of a kept directory is
+            discarded and the pages recorded again. None keeps it until deleted.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        source: Optional[str] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.owned = directory is None
+        if self.owned:
+            self.directory = tempfile.mkdtemp(prefix="ds490-pages-")
+        else:
+            self.directory = os.path.join(directory, source_key(source)) if source else directory
+        os.makedirs(self.directory, exist_ok=True)
+        if not self.owned and ttl is not None and self.has_archive():
+            if time.time() - os.path.getmtime(self.archive_path) > ttl:
+                os.remove(self.archive_path)
+
+    @property
+    def archive_path(self) -> str:
+        return os.path.join(self.directory, ARCHIVE_NAME)
+
+    def has_archive(self) -> bool:
+        return os.path.isfile(self.archive_path)
+
+    def env(self) -> dict:
+        """
+        Returns the environment of the next candidate run: replay once an archive exists, record until then.
+        """
+        return {
+            HAR_MODE_ENV: "replay" if self.has_archive() else "record",
+            HAR_DIR_ENV: self.directory,
+        }
+
+    def collect(self) -> int:
+        """
+        Merges the HAR entries recorded by the runs that finished into the
+        archive, after the entries it already holds: recordings collected late
+        (from a run still going when the archive was written) extend it
+        rather than replace it. A line cut short by a killed run is skipped.
+
+        Returns:
+            int: The number of responses added to the archive.
+        """
+        recordings = sorted(glob.glob(os.path.join(self.directory, RECORDING_PATTERN)))
+        if not recordings:
+            return 0
+
+        entries = []
+        for path in recordings:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entries.append(json.loads(line))
+                        except ValueError:
+                            pass
+            except OSError:
+                pass
+            finally:
+                os.remove(path)
+
+        if not entries:
+            return 0
+        archived = []
+        if self.has_archive():
+            try:
+                with open(self.archive_path, "r", encoding="utf-8") as f:
+                    archived = json.load(f)["log"]["entries"]
+            except (OSError, ValueError, KeyError):
+                pass
+        har = {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": "ds490", "version": "1"},
+                "entries": archived + entries,
+            }
+        }
+        tmp_path = f"{self.archive_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(har, f)
+        os.replace(tmp_path, self.archive_path)
+        return len(entries)
+
+    def close(self) -> None:
+        if self.owned:
+            shutil.rmtree(self.directory, ignore_errors=True)
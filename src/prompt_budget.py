@@ -0,0 +1,195 @@
+"""
+Token budget of the code-generation prompts.
+
+The initial code prompt embeds the reduced HTML, its analysis, the schema and
+every retrieved docs snippet as they are, so a large page can produce a prompt
+that is slow, expensive or over the model's context. PromptBudgeter counts the
+tokens of each section (with tiktoken, counts are cached) and, when the prompt
+is over budget, reduces the lowest-priority sections first until it fits:
+repeated HTML siblings (the 50 identical product cards of a listing) are
+collapsed to a few examples, repeated doc paragraphs are dropped, and what is
+still over its share is cut with an explicit marker. The per-section breakdown
+is logged.
+"""
+
+import logging
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from src.chunking import _encoding, count_tokens
+from src.defaults import NODE_DEFAULTS
+
+logger = logging.getLogger(__name__)
+
+Reducer = Callable[[str, int], str]
+
+
+@lru_cache(maxsize=4096)
+def cached_count(text: str, encoding_name: str = "cl100k_base") -> int:
+    return count_tokens(text, encoding_name)
+
+
+def truncate_tokens(text: str, max_tokens: int, encoding_name: str = "cl100k_base") -> str:
+    """
+    Cuts a text to `max_tokens` tokens, a note of how many were omitted included.
+    """
+    encoding = _encoding(encoding_name)
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    # The note of the longest possible count, so that the kept tokens and the note fit.
+    note = len(encoding.encode(f"\n[... {len(tokens)} tokens omitted ...]", disallowed_special=()))
+    keep = max(0, max_tokens - note)
+    return encoding.decode(tokens[:keep]) + f"\n[... {len(tokens) - keep} tokens omitted ...]"
+
+
+def collapse_html_siblings(html: str, keep: int = 2) -> str:
+    """
+    Keeps the first `keep` of every run of adjacent sibling elements with the same
+    tag and classes, replacing the others with a comment that tells how many were
+    removed. Whitespace between the siblings does not end a run, other text does,
+    and similar elements elsewhere in the parent are left in place.
+    """
+    try:
+        from bs4 import BeautifulSoup, Comment
+    except ImportError:
+        raise ImportError(
+            "beautifulsoup4 is not installed. Please install it using 'pip install beautifulsoup4'."
+        )
+    soup = BeautifulSoup(html, "html.parser")
+
+    def signature(element):
+        return element.name, tuple(sorted(element.get("class", [])))
+
+    def collapse(run):
+        if len(run) <= keep:
+            return
+        for element in run[keep + 1:]:
+            element.decompose()
+        tag, classes = signature(run[0])
+        label = f"<{tag}{' class=' + repr(' '.join(classes)) if classes else ''}>"
+        run[keep].replace_with(Comment(f" {len(run) - keep} more similar {label} elements "))
+        run[keep].decompose()
+
+    for parent in [soup, *soup.find_all(True)]:
+        if getattr(parent, "decomposed", False):
+            continue
+        runs: List[list] = [[]]
+        for child in parent.children:
+            if getattr(child, "name", None) is None:
+                if str(child).strip():
+                    runs.append([])
+            elif runs[-1] and signature(runs[-1][0]) == signature(child):
+                runs[-1].append(child)
+            else:
+                runs.append([child])
+        for run in runs:
+            collapse(run)
+    return str(soup)
+
+
+def drop_repeated_paragraphs(text: str) -> str:
+    """
+    Removes paragraphs (blocks separated by blank lines) already seen earlier in the text.
+    """
+    seen, kept = set(), []
+    for paragraph in re.split(r"\n\s*\n", text):
+        key = " ".join(paragraph.split()).lower()
+        if key and key in seen:
+            continue
+        seen.add(key)
+        kept.append(paragraph)
+    return "\n\n".join(kept)
+
+
+class Section(NamedTuple):
+    """
+    A variable part of a prompt.
+
+    Attributes:
+        name (str): The template variable it fills.
+        text (str): Its content.
+        priority (int): Lower is more valuable; the highest priorities are reduced first.
+        reducers (Tuple[Reducer, ...]): Lossy steps tried in order, each given the
+            text and the tokens it should fit in, before the text is cut.
+        fixed (bool): Never reduced (e.g. the user request or the schema).
+    """
+    name: str
+    text: str
+    priority: int
+    reducers: Tuple[Reducer, ...] = ()
+    fixed: bool = False
+
+
+class PromptBudgeter:
+    """
+    Fits the sections of a prompt into a token budget.
+
+    Args:
+        max_tokens (int): Tokens allowed for the whole prompt, template included.
+        encoding_name (str): The tiktoken encoding used to count tokens.
+        min_section_tokens (int): Tokens a reduced section keeps at least.
+    """
+
+    def __init__(self, max_tokens: int, encoding_name: str = "cl100k_base", min_section_tokens: int = 256):
+        self.max_tokens = max_tokens
+        self.encoding_name = encoding_name
+        self.min_section_tokens = min_section_tokens
+
+    def count(self, text: Optional[str]) -> int:
+        return cached_count(text or "", self.encoding_name)
+
+    def fit(self, template: str, sections: List[Section]) -> Dict[str, str]:
+        """
+        Reduces the lowest-priority sections until the prompt fits the budget.
+
+        Args:
+            template (str): The prompt template, whose own tokens count toward the budget.
+            sections (List[Section]): The sections filling it.
+
+        Returns:
+            Dict[str, str]: The text of every section, by name.
+        """
+        texts = {section.name: section.text or "" for section in sections}
+        before = {name: self.count(text) for name, text in texts.items()}
+        tokens = dict(before)
+        overhead = self.count(template)
+        excess = overhead + sum(tokens.values()) - self.max_tokens
+
+        for section in sorted(sections, key=lambda s: -s.priority):
+            if excess <= 0:
+                break
+            if section.fixed or tokens[section.name] <= self.min_section_tokens:
+                continue
+            target = max(self.min_section_tokens, tokens[section.name] - excess)
+            text = texts[section.name]
+            for reducer in section.reducers:
+                if self.count(text) <= target:
+                    break
+                text = reducer(text, target)
+            if self.count(text) > target:
+                text = truncate_tokens(text, target, self.encoding_name)
+            texts[section.name] = text
+            excess -= tokens[section.name] - self.count(text)
+            tokens[section.name] = self.count(text)
+
+        breakdown = ", ".join(
+            f"{name} {before[name]}" + (f"->{tokens[name]}" if tokens[name] != before[name] else "")
+            for name in texts
+        )
+        logger.info(
+            f"Prompt tokens: {overhead + sum(tokens.values())} of {self.max_tokens} "
+            f"(template {overhead}, {breakdown})"
+        )
+        return texts
+
+
+def create_budgeter(config: Optional[dict] = None) -> Optional[PromptBudgeter]:
+    """
+    Creates a PromptBudgeter from overrides of NODE_DEFAULTS["prompt_budget"], or None if disabled.
+    """
+    config = {**NODE_DEFAULTS["prompt_budget"], **(config or {})}
+    if not config["enabled"]:
+        return None
+    return PromptBudgeter(config["max_tokens"], config["encoding"], config["min_section_tokens"])
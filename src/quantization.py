@@ -0,0 +1,123 @@
+"""
+Compact vector representations for the NumPy docs index.
+
+Vectors can be reduced to fewer dimensions (truncation or PCA) and quantized to
+int8 (one byte per dimension, 4x smaller than float32) or to binary codes (one
+bit per dimension, 32x smaller). Scores computed on the compact codes are only
+used to shortlist candidates, which are then reranked with the full-precision
+vectors.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+QUANTIZATIONS = (None, "int8", "binary")
+REDUCTIONS = ("truncate", "pca")
+
+# Number of set bits of every byte value, used to compute Hamming distances.
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def fit_reduction(
+    vectors: np.ndarray, dimensions: int, method: str = "truncate"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fits a linear map from the full vectors to `dimensions` dimensions.
+
+    Args:
+        vectors (np.ndarray): The (N, D) full-precision vectors.
+        dimensions (int): The target number of dimensions.
+        method (str): "truncate" keeps the first dimensions (fine for Matryoshka
+            models such as text-embedding-3), "pca" projects on the main components.
+
+    Returns:
+        tuple: The (D,) mean subtracted before projecting and the (D, d) projection.
+    """
+    if method not in REDUCTIONS:
+        raise ValueError(f"reduction must be one of {REDUCTIONS}")
+    dim = vectors.shape[1]
+    dimensions = min(dimensions, dim)
+    if method == "truncate" or len(vectors) < 2:
+        return np.zeros(dim, dtype=np.float32), np.eye(dim, dimensions, dtype=np.float32)
+
+    mean = vectors.mean(axis=0)
+    _, _, components = np.linalg.svd(vectors - mean, full_matrices=False)
+    projection = np.zeros((dim, dimensions), dtype=np.float32)
+    available = min(dimensions, components.shape[0])
+    projection[:, :available] = components[:available].T
+    return mean.astype(np.float32), projection
+
+
+def reduce(vectors: np.ndarray, mean: np.ndarray, projection: np.ndarray) -> np.ndarray:
+    return normalize((np.asarray(vectors, dtype=np.float32) - mean) @ projection)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-dimension scalar quantization.
+
+    Returns:
+        tuple: The (N, d) int8 codes and the (d,) float32 scale such that
+        `codes * scale` approximates the vectors.
+    """
+    scale = np.abs(vectors).max(axis=0) / 127.0 if len(vectors) else np.ones(vectors.shape[1])
+    scale = np.where(scale == 0, 1, scale).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+    return codes, scale
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """
+    Keeps the sign of every dimension, packed 8 dimensions per byte.
+    """
+    return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+
+def int8_scores(codes: np.ndarray, scale: np.ndarray, query: np.ndarray, block: int = 4096) -> np.ndarray:
+    """
+    Approximate dot products between the int8 codes and a query.
+
+    The codes are converted in blocks so that memory stays bounded for large indexes.
+    """
+    scaled_query = (query * scale).astype(np.float32)
+    scores = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), block):
+        scores[start:start + block] = codes[start:start + block].astype(np.float32) @ scaled_query
+    return scores
+
+
+def binary_scores(bits: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """
+    Negated Hamming distances between the binary codes and the query signs.
+    """
+    query_bits = np.packbits(np.asarray(query) > 0)
+    return -_POPCOUNT[np.bitwise_xor(bits, query_bits)].sum(axis=1, dtype=np.int32)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Returns the rows of the `k` highest scores, best first.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def compact_size(count: int, dimensions: int, quantization: Optional[str]) -> int:
+    """
+    Bytes taken by the searchable codes of `count` vectors.
+    """
+    if quantization == "binary":
+        return count * ((dimensions + 7) // 8)
+    if quantization == "int8":
+        return count * dimensions
+    return count * dimensions * 4
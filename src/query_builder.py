@@ -0,0 +1,132 @@
+"""
+Local construction of the docs search queries used by GenerateCodeNode.
+
+Asking the LLM to phrase a 1-2 sentence search query costs a full model
+round-trip before every retrieval. The query builder assembles it directly
+from what the retrieval actually needs to match: the exception type and
+message, the Crawlee symbols referenced by the code or the traceback, and the
+names of the fields to extract.
+"""
+
+import re
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from src.lexical_index import extract_symbols
+
+# Last "ExceptionType: message" line of a traceback or error output.
+EXCEPTION_RE = re.compile(
+    r"^\s*((?:[A-Za-z_][\w]*\.)*[A-Z]\w*(?:Error|Exception|Exit|Interrupt|Warning|Timeout)\w*)(?::\s*(.*))?$",
+    re.MULTILINE,
+)
+# Frames of the traceback raised inside the crawlee package.
+CRAWLEE_FRAME_RE = re.compile(r'File "[^"]*[/\\]crawlee[/\\][^"]*", line \d+, in (\w+)')
+CRAWLEE_IMPORT_RE = re.compile(r"from\s+crawlee[\w.]*\s+import\s+(?:\(([\w\s,]+)\)|([\w ,]+))")
+CONTEXT_ATTRIBUTE_RE = re.compile(r"\bcontext\.(\w+)")
+QUOTED_IDENTIFIER_RE = re.compile(r"['\"`]([A-Za-z_]\w*)['\"`]")
+
+MAX_MESSAGE_CHARS = 200
+MAX_PROMPT_CHARS = 200
+
+
+class SearchQuery(NamedTuple):
+    """
+    A locally built query; `anchored` tells whether it contains an exception or
+    Crawlee symbols, i.e. whether it is specific enough to skip the LLM rewrite.
+    """
+    text: str
+    anchored: bool
+
+
+def parse_exception(error: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Extracts the type and message of the last exception reported in an error output.
+
+    Example:
+        >>> parse_exception("Traceback ...\\nAttributeError: 'X' object has no attribute 'y'")
+        ('AttributeError', "'X' object has no attribute 'y'")
+    """
+    matches = EXCEPTION_RE.findall(error or "")
+    if not matches:
+        return None, None
+    exc_type, message = matches[-1]
+    message = " ".join(message.split())[:MAX_MESSAGE_CHARS]
+    return exc_type.rsplit(".", 1)[-1], message or None
+
+
+def crawlee_symbols(error: Optional[str] = None, code: Optional[str] = None, limit: int = 8) -> List[str]:
+    """
+    Returns the Crawlee API symbols referenced by an error output and by the code, most specific first.
+
+    From the error: identifiers of the exception message and functions of the
+    traceback frames inside crawlee. From the code: attributes used on the
+    crawling `context` and names imported from crawlee.
+    """
+    symbols: List[str] = []
+    if error:
+        _, message = parse_exception(error)
+        symbols += extract_symbols(message or "")
+        symbols += QUOTED_IDENTIFIER_RE.findall(message or "")
+        symbols += [name for name in CRAWLEE_FRAME_RE.findall(error) if not name.startswith("_")]
+    if code:
+        symbols += CONTEXT_ATTRIBUTE_RE.findall(code)
+        for names in CRAWLEE_IMPORT_RE.findall(code):
+            symbols += [name.strip() for name in "".join(names).split(",") if name.strip()]
+    return list(dict.fromkeys(symbols))[:limit]
+
+
+def schema_fields(schema: Optional[dict]) -> List[str]:
+    """
+    Returns the property names of a JSON schema, including nested models, in order of definition.
+    """
+    if not schema:
+        return []
+    fields: List[str] = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            fields.extend(node.get("properties", {}).keys())
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(schema)
+    return list(dict.fromkeys(fields))
+
+
+def build_query(
+    user_prompt: Optional[str] = None,
+    fields: Iterable[str] = (),
+    error: Optional[str] = None,
+    code: Optional[str] = None,
+) -> SearchQuery:
+    """
+    Assembles a docs search query without calling the LLM.
+
+    Args:
+        user_prompt (str): What to scrape, used when there is no error to look up.
+        fields (Iterable[str]): Names of the fields to extract.
+        error (str): Execution output, traceback or validation errors.
+        code (str): The generated code.
+
+    Returns:
+        SearchQuery: The query text and whether it is anchored on an exception or symbols.
+    """
+    exc_type, message = parse_exception(error)
+    symbols = crawlee_symbols(error, code)
+
+    parts: List[str] = []
+    if exc_type:
+        parts.append(f"{exc_type}: {message}" if message else exc_type)
+    elif error:
+        parts.append(" ".join(error.split())[:MAX_MESSAGE_CHARS])
+    if symbols:
+        parts.append("Crawlee for Python " + " ".join(symbols))
+    fields = list(fields)
+    if fields:
+        parts.append("extract " + ", ".join(fields) + " and store them with push_data")
+    if not error and user_prompt:
+        parts.append(" ".join(user_prompt.split())[:MAX_PROMPT_CHARS])
+
+    return SearchQuery(". ".join(parts), anchored=bool(exc_type or symbols))
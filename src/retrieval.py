@@ -0,0 +1,188 @@
+"""
+Retrieval of Crawlee doc snippets for GenerateCodeNode.
+
+HybridRetriever fuses three rankings with reciprocal rank fusion: dense vector
+hits for the (rewritten) query, BM25 hits over the query and the error text, and
+chunks that mention the exact API symbols found in a traceback or in code.
+"""
+
+import asyncio
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.defaults import NODE_DEFAULTS
+from src.embedding_cache import embedder_model_name
+from src.lexical_index import LexicalIndex, extract_symbols, reciprocal_rank_fusion
+from src.retrieval_cache import cache_key, normalize_text
+
+
+def iter_payloads(client, collection_name: str) -> List[tuple]:
+    """
+    Returns (id, payload) for every point of a collection, from a NumpyVectorIndex or a QdrantClient.
+    """
+    if hasattr(client, "payloads"):
+        return client.payloads(collection_name)
+
+    payloads, offset = [], None
+    while True:
+        batch, offset = client.scroll(
+            collection_name, limit=256, offset=offset, with_payload=True, with_vectors=False
+        )
+        payloads.extend((point.id, point.payload or {}) for point in batch)
+        if offset is None:
+            return payloads
+
+
+def build_lexical_index(client, collection_name: str) -> Tuple[LexicalIndex, Dict[object, dict]]:
+    """
+    Builds the BM25 index of a collection, returned with the payloads keyed by point id.
+    """
+    payloads = iter_payloads(client, collection_name)
+    lexical = LexicalIndex((point_id, payload.get("text", "")) for point_id, payload in payloads)
+    return lexical, dict(payloads)
+
+
+class HybridRetriever:
+    """
+    Searches the docs collection with vectors, BM25 and exact symbol lookups.
+
+    Results are cached in the RetrievalCache of a shared RetrievalService
+    (`client.cache`), keyed by the normalized query and context, the limit, the
+    retrieval settings and the version of the index.
+
+    Attributes:
+        client: The vector store (QdrantClient or NumpyVectorIndex) or RetrievalService.
+        embedder: The LangChain embedder used for queries.
+        collection_name (str): The docs collection.
+        hybrid (bool): If False, only the vector search is used.
+        cache_hits (int): Searches of this retriever served from the cache.
+        cache_misses (int): Searches of this retriever that queried the index.
+
+    Args:
+        client: The vector store holding the doc chunks.
+        embedder: The LangChain embedder used for queries.
+        config (dict): Overrides of NODE_DEFAULTS["retrieval"] (`hybrid`,
+            `rrf_k`, `candidates`, `lexical_weight`, `symbol_weight`).
+        collection_name (str): The docs collection.
+    """
+
+    def __init__(
+        self,
+        client,
+        embedder,
+        config: Optional[dict] = None,
+        collection_name: str = NODE_DEFAULTS["rag"]["collection_name"],
+    ):
+        cfg = {**NODE_DEFAULTS["retrieval"], **(config or {})}
+        self.client = client
+        self.embedder = embedder
+        self.collection_name = collection_name
+        self.hybrid = cfg["hybrid"]
+        self.rrf_k = cfg["rrf_k"]
+        self.candidates = cfg["candidates"]
+        self.weights = [1.0, cfg["lexical_weight"], cfg["symbol_weight"]]
+        self.cache = getattr(client, "cache", None)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._settings = [embedder_model_name(embedder), collection_name, self.hybrid,
+                          self.rrf_k, self.candidates, self.weights]
+        self._lexical = None
+        self._lock = threading.Lock()
+
+    def lexical_index(self) -> Tuple[LexicalIndex, Dict[object, dict]]:
+        """
+        Returns the BM25 index over the collection payloads, built on first use.
+
+        A shared RetrievalService keeps one index per process (rebuilt when the
+        collection changes), so it is reused rather than built per retriever.
+        """
+        if hasattr(self.client, "lexical_index"):
+            return self.client.lexical_index(self.collection_name)
+        with self._lock:
+            if self._lexical is None:
+                self._lexical = build_lexical_index(self.client, self.collection_name)
+            return self._lexical
+
+    def search(self, query: str, limit: int, context: Optional[str] = None) -> List[dict]:
+        """
+        Retrieves the payloads of the most relevant doc chunks.
+
+        Args:
+            query (str): The search query, embedded for the vector search.
+            limit (int): Number of chunks to return.
+            context (str): Extra text (execution error, traceback) searched lexically
+                and scanned for exact API symbols.
+
+        Returns:
+            List[dict]: The payloads of the retrieved chunks, best first.
+        """
+        key = self._cache_key(query, limit, context)
+        payloads = self._cached(key)
+        if payloads is None:
+            payloads = self._search(query, limit, context, self.embedder.embed_query(query))
+            self._store(key, payloads)
+        return payloads
+
+    async def asearch(self, query: str, limit: int, context: Optional[str] = None) -> List[dict]:
+        """
+        Async version of `search`: the query is embedded with `aembed_query` and
+        the blocking index lookups run in a worker thread.
+        """
+        key = await asyncio.to_thread(self._cache_key, query, limit, context)
+        payloads = await asyncio.to_thread(self._cached, key)
+        if payloads is None:
+            query_vector = await self.embedder.aembed_query(query)
+            payloads = await asyncio.to_thread(self._search, query, limit, context, query_vector)
+            await asyncio.to_thread(self._store, key, payloads)
+        return payloads
+
+    def _cache_key(self, query: str, limit: int, context: Optional[str]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return cache_key(
+            *self._settings,
+            normalize_text(query),
+            normalize_text(context) if self.hybrid else "",
+            limit,
+            self.client.index_version(self.collection_name),
+        )
+
+    def _cached(self, key: Optional[str]) -> Optional[List[dict]]:
+        if key is None:
+            return None
+        payloads = self.cache.get(key)
+        if payloads is not None:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+        return payloads
+
+    def _store(self, key: Optional[str], payloads: List[dict]) -> None:
+        if key is not None:
+            self.cache.set(key, payloads)
+
+    def _search(self, query: str, limit: int, context: Optional[str], query_vector: List[float]) -> List[dict]:
+        pool = limit * self.candidates if self.hybrid else limit
+        hits = self.client.search(
+            collection_name=self.collection_name,
+            query_vector=query_vector,
+            limit=pool,
+        )
+        if not self.hybrid:
+            return [hit.payload for hit in hits]
+
+        lexical, payloads = self.lexical_index()
+        payloads = {**payloads, **{hit.id: hit.payload for hit in hits}}
+        lexical_hits = lexical.search(f"{query}\n{context or ''}", pool)
+        symbol_hits = lexical.lookup_symbols(extract_symbols(context or query), pool)
+
+        fused = reciprocal_rank_fusion(
+            [
+                [hit.id for hit in hits],
+                [point_id for point_id, _ in lexical_hits],
+                [point_id for point_id, _ in symbol_hits],
+            ],
+            self.weights,
+            self.rrf_k,
+        )
+        return [payloads[point_id] for point_id, _ in fused[:limit] if point_id in payloads]
@@ -0,0 +1,94 @@
+"""
+Cache of retrieval results shared across repair iterations and jobs.
+
+The same crawlee errors produce the same (or nearly the same) docs queries over
+and over. RetrievalCache keeps the retrieved payloads keyed by the normalized
+query and error text, the number of hits, the retrieval settings and the
+version of the docs index, so a rebuilt index never serves stale results.
+Entries expire after a TTL and the least recently used ones are evicted first.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from typing import Any, Optional
+
+from cachetools import TTLCache
+
+from src.defaults import NODE_DEFAULTS
+
+# Parts of an error output that differ between otherwise identical failures:
+# temporary script names, memory addresses and line or row numbers.
+_TEMP_FILE_RE = re.compile(r"\btmp\w*\.py\b")
+_ADDRESS_RE = re.compile(r"\b0x[0-9a-f]+\b")
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """
+    Normalizes a query or error text so near-identical ones share a cache entry.
+
+    Example:
+        >>> normalize_text('File "/tmp/tmpab12.py", line 14\\n  KeyError:  3')
+        'file "/tmp/tmp.py", line 0 keyerror: 0'
+    """
+    text = (text or "").lower()
+    text = _TEMP_FILE_RE.sub("tmp.py", text)
+    text = _ADDRESS_RE.sub("0x", text)
+    text = _NUMBER_RE.sub("0", text)
+    return " ".join(text.split())
+
+
+def cache_key(*parts: Any) -> str:
+    """
+    Hashes JSON-serializable key parts into a cache key.
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class RetrievalCache:
+    """
+    In-memory TTL + LRU cache of retrieval results with hit and miss counters.
+
+    Args:
+        max_entries (int): Results kept before the least recently used are evicted.
+        ttl (float): Seconds a result stays valid.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._entries = TTLCache(maxsize=max_entries, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+def create_retrieval_cache(config: Optional[dict] = None) -> Optional[RetrievalCache]:
+    """
+    Creates a RetrievalCache from overrides of NODE_DEFAULTS["retrieval_cache"], or None if disabled.
+    """
+    config = {**NODE_DEFAULTS["retrieval_cache"], **(config or {})}
+    if not config["enabled"]:
+        return None
+    return RetrievalCache(config["max_entries"], config["ttl"])
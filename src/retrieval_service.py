@@ -0,0 +1,512 @@
+"""
+Process-wide access to the Crawlee docs index.
+
+Qdrant local mode locks its directory, so every job opening its own
+`QdrantClient(path=...)` collides with the others. RetrievalService opens the
+index once per process and is safe to query from many threads; `shared_service`
+returns that instance. For multi-process deployments (the Django app runs each
+generation in a subprocess) `serve` exposes the service on a unix socket and
+`shared_service` connects to it instead when `retrieval_socket` (or the
+DS490_RETRIEVAL_SOCKET environment variable) names a live socket. The socket is
+only accessible to the user running the server, and it only accepts reads
+(search, payloads, the shared retrieval cache) unless served with `allow_writes`.
+
+The socket protocol is one JSON object per line in each direction:
+`{"op": "search", "args": {...}}` answered by `{"ok": true, "result": ...}` or
+`{"ok": false, "error": "..."}`.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.defaults import NODE_DEFAULTS
+from src.lexical_index import LexicalIndex
+from src.retrieval import build_lexical_index, iter_payloads
+from src.retrieval_cache import RetrievalCache, create_retrieval_cache
+from src.vector_index import NUMPY_OPTIONS, NumpyVectorIndex, ScoredPoint, _point_fields, create_client, index_path
+
+logger = logging.getLogger(__name__)
+
+SOCKET_ENV = "DS490_RETRIEVAL_SOCKET"
+
+# Operations a served index accepts without `allow_writes`.
+READ_OPS = frozenset({
+    "info", "index_version", "collection_exists", "count", "search", "payloads",
+    "cache_get", "cache_set", "cache_stats",
+})
+WRITE_OPS = frozenset({"create_collection", "delete_collection", "upsert", "delete"})
+
+_services: Dict[tuple, Any] = {}
+_services_lock = threading.Lock()
+
+
+def service_options(client_type: str, options: Optional[dict] = None) -> dict:
+    """
+    Returns the options a RetrievalService is opened with, with their defaults
+    filled in, so that two sets of options can be compared.
+    """
+    options = options or {}
+    normalized = {
+        "retrieval_cache": {**NODE_DEFAULTS["retrieval_cache"], **(options.get("retrieval_cache") or {})},
+    }
+    if client_type == "numpy":
+        defaults = NODE_DEFAULTS["rag"]
+        for key in NUMPY_OPTIONS.values():
+            normalized[key] = options.get(key, defaults[key])
+    return json.loads(json.dumps(normalized, default=str))
+
+
+class RetrievalService:
+    """
+    A thread-safe handle on the docs index, shared by every job of a process.
+
+    It exposes the client methods used by RAGNode and GenerateCodeNode, so it
+    can be stored as `vectorial_db` in place of a client. Writes are serialized;
+    reads are too for Qdrant clients, while NumpyVectorIndex reads, which only
+    touch immutable versions, run concurrently.
+
+    It also holds the process-wide RetrievalCache (`cache`), emptied on every write.
+
+    Args:
+        client_type (str): "local_db", "image" or "numpy".
+        path (str): The index directory.
+        options (dict): Options passed to `create_client`, and the
+            `retrieval_cache` overrides of NODE_DEFAULTS["retrieval_cache"].
+    """
+
+    # Local handles accept writes; see RemoteRetrievalService.writable.
+    writable = True
+
+    def __init__(self, client_type: str, path: str, options: Optional[dict] = None):
+        self.client_type = client_type
+        self.path = os.path.abspath(path) if path else path
+        self.options = service_options(client_type, options)
+        self.client = create_client(client_type, path, options)
+        self.cache: Optional[RetrievalCache] = create_retrieval_cache((options or {}).get("retrieval_cache"))
+        self.version = 0
+        self._lock = threading.RLock()
+        self._concurrent_reads = isinstance(self.client, NumpyVectorIndex)
+        self._lexical: Dict[str, Tuple[str, LexicalIndex, dict]] = {}
+
+    def _reading(self):
+        return contextlib.nullcontext() if self._concurrent_reads else self._lock
+
+    def info(self) -> dict:
+        return {
+            "client_type": self.client_type,
+            "path": self.path,
+            "version": self.version,
+            "options": self.options,
+            "writable": True,
+        }
+
+    def index_version(self, collection_name: str) -> str:
+        """
+        Identifies the current content of a collection, including writes made by other processes.
+        """
+        current = getattr(self.client, "current_version", None)
+        return f"{self.version}:{current(collection_name) if current else ''}"
+
+    def _changed(self) -> None:
+        self.version += 1
+        if self.cache is not None:
+            self.cache.clear()
+
+    def collection_exists(self, collection_name: str) -> bool:
+        with self._reading():
+            return self.client.collection_exists(collection_name)
+
+    def count(self, collection_name: str) -> int:
+        with self._reading():
+            result = self.client.count(collection_name)
+        return getattr(result, "count", result)
+
+    def search(self, collection_name: str, query_vector: List[float], limit: int = 10, **kwargs) -> list:
+        with self._reading():
+            return self.client.search(
+                collection_name=collection_name, query_vector=query_vector, limit=limit
+            )
+
+    def payloads(self, collection_name: str) -> List[tuple]:
+        with self._reading():
+            return iter_payloads(self.client, collection_name)
+
+    def lexical_index(self, collection_name: str) -> Tuple[LexicalIndex, Dict[object, dict]]:
+        """
+        Returns the BM25 index of a collection, rebuilt only after the collection changed.
+        """
+        version = self.index_version(collection_name)
+        with self._lock:
+            cached = self._lexical.get(collection_name)
+            if cached is None or cached[0] != version:
+                cached = (version, *build_lexical_index(self, collection_name))
+                self._lexical[collection_name] = cached
+            return cached[1], cached[2]
+
+    def create_collection(self, collection_name: str, vectors_config=None, **kwargs) -> bool:
+        with self._lock:
+            self._changed()
+            return self.client.create_collection(collection_name, vectors_config=vectors_config)
+
+    def delete_collection(self, collection_name: str, **kwargs) -> bool:
+        with self._lock:
+            self._changed()
+            return self.client.delete_collection(collection_name)
+
+    def upsert(self, collection_name: str, points: list, **kwargs) -> None:
+        with self._lock:
+            self._changed()
+            self.client.upsert(collection_name=collection_name, points=points)
+
+    def delete(self, collection_name: str, points_selector, **kwargs) -> None:
+        with self._lock:
+            self._changed()
+            self.client.delete(collection_name=collection_name, points_selector=points_selector)
+
+    def close(self) -> None:
+        with self._lock:
+            self.client.close()
+
+
+class RemoteRetrievalService:
+    """
+    Client of a RetrievalService served on a unix socket by `serve`.
+
+    It has the same interface as RetrievalService; every thread keeps its own
+    connection. The BM25 index is built locally from the served payloads and
+    rebuilt when the served index version changes.
+
+    Attributes:
+        writable (bool): Whether the server accepts writes (`allow_writes`).
+
+    Args:
+        socket_path (str): Path of the unix socket.
+    """
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.writable = False
+        self.cache = _RemoteCache(self)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._lexical: Dict[str, Tuple[str, LexicalIndex, dict]] = {}
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.socket_path)
+            conn = self._local.conn = (sock, sock.makefile("rwb"))
+        return conn
+
+    def _call(self, op: str, **args):
+        sock, stream = self._connection()
+        try:
+            stream.write(json.dumps({"op": op, "args": args}).encode() + b"\n")
+            stream.flush()
+            line = stream.readline()
+        except OSError:
+            self._local.conn = None
+            sock.close()
+            raise
+        if not line:
+            self._local.conn = None
+            sock.close()
+            raise ConnectionError(f"Retrieval service at {self.socket_path} closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise RuntimeError(f"Retrieval service error: {response['error']}")
+        return response["result"]
+
+    def info(self) -> dict:
+        return self._call("info")
+
+    def index_version(self, collection_name: str) -> str:
+        return self._call("index_version", collection_name=collection_name)
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return self._call("collection_exists", collection_name=collection_name)
+
+    def count(self, collection_name: str) -> int:
+        return self._call("count", collection_name=collection_name)
+
+    def search(self, collection_name: str, query_vector: List[float], limit: int = 10, **kwargs) -> List[ScoredPoint]:
+        hits = self._call(
+            "search", collection_name=collection_name, query_vector=list(query_vector), limit=limit
+        )
+        return [ScoredPoint(*hit) for hit in hits]
+
+    def payloads(self, collection_name: str) -> List[tuple]:
+        return [tuple(item) for item in self._call("payloads", collection_name=collection_name)]
+
+    def lexical_index(self, collection_name: str) -> Tuple[LexicalIndex, Dict[object, dict]]:
+        version = self.index_version(collection_name)
+        with self._lock:
+            cached = self._lexical.get(collection_name)
+            if cached is None or cached[0] != version:
+                cached = (version, *build_lexical_index(self, collection_name))
+                self._lexical[collection_name] = cached
+            return cached[1], cached[2]
+
+    def create_collection(self, collection_name: str, vectors_config=None, **kwargs) -> bool:
+        size = getattr(vectors_config, "size", None)
+        return self._call("create_collection", collection_name=collection_name, size=size)
+
+    def delete_collection(self, collection_name: str, **kwargs) -> bool:
+        return self._call("delete_collection", collection_name=collection_name)
+
+    def upsert(self, collection_name: str, points: list, **kwargs) -> None:
+        points = [dict(zip(("id", "vector", "payload"), _point_fields(point))) for point in points]
+        self._call("upsert", collection_name=collection_name, points=points)
+
+    def delete(self, collection_name: str, points_selector, **kwargs) -> None:
+        ids = list(getattr(points_selector, "points", points_selector))
+        self._call("delete", collection_name=collection_name, ids=ids)
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn[0].close()
+            self._local.conn = None
+
+
+class _RemoteCache:
+    """
+    The RetrievalCache of a served RetrievalService, shared by all its clients.
+    """
+
+    def __init__(self, remote: RemoteRetrievalService):
+        self.remote = remote
+
+    def get(self, key: str):
+        return self.remote._call("cache_get", key=key)
+
+    def set(self, key: str, value) -> None:
+        self.remote._call("cache_set", key=key, value=value)
+
+    def stats(self) -> dict:
+        return self.remote._call("cache_stats")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        service = self.server.service
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                op = request["op"]
+                if op in WRITE_OPS and not self.server.allow_writes:
+                    raise PermissionError(f"'{op}' is not allowed: the index is served read-only")
+                result = _dispatch(service, op, request.get("args", {}))
+                if op == "info":
+                    result = {**result, "writable": self.server.allow_writes}
+                response = {"ok": True, "result": result}
+            except Exception as e:
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+def _dispatch(service: RetrievalService, op: str, args: dict):
+    if op == "info":
+        return service.info()
+    if op == "index_version":
+        return service.index_version(args["collection_name"])
+    if op.startswith("cache_"):
+        if service.cache is None:
+            return None
+        if op == "cache_get":
+            return service.cache.get(args["key"])
+        if op == "cache_set":
+            return service.cache.set(args["key"], args["value"])
+        if op == "cache_stats":
+            return service.cache.stats()
+    if op in ("collection_exists", "count", "delete_collection"):
+        return getattr(service, op)(args["collection_name"])
+    if op == "search":
+        hits = service.search(args["collection_name"], args["query_vector"], args["limit"])
+        return [[hit.id, hit.score, hit.payload] for hit in hits]
+    if op == "payloads":
+        return [[point_id, payload] for point_id, payload in service.payloads(args["collection_name"])]
+    if op == "create_collection":
+        vectors_config = None
+        if not isinstance(service.client, NumpyVectorIndex):
+            from qdrant_client.models import Distance, VectorParams
+
+            vectors_config = VectorParams(size=args["size"], distance=Distance.COSINE)
+        return service.create_collection(args["collection_name"], vectors_config)
+    if op == "upsert":
+        points = args["points"]
+        if not isinstance(service.client, NumpyVectorIndex):
+            from qdrant_client.models import PointStruct
+
+            points = [PointStruct(**point) for point in points]
+        return service.upsert(args["collection_name"], points)
+    if op == "delete":
+        return service.delete(args["collection_name"], args["ids"])
+    raise ValueError(f"Unknown operation {op!r}")
+
+
+class _RetrievalServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: RetrievalService, allow_writes: bool):
+        self.service = service
+        self.allow_writes = allow_writes
+        super().__init__(socket_path, _RequestHandler)
+
+    def server_bind(self):
+        super().server_bind()
+        # Only the user running the server may connect.
+        os.chmod(self.server_address, 0o600)
+
+
+def serve(service: RetrievalService, socket_path: str, allow_writes: bool = False) -> socketserver.BaseServer:
+    """
+    Serves a RetrievalService on a unix socket from a daemon thread.
+
+    Args:
+        service (RetrievalService): The service to expose.
+        socket_path (str): Path of the socket; a stale socket file is replaced.
+        allow_writes (bool): Accept the operations that modify the index
+            (upsert, delete, create and delete collection) from clients.
+
+    Returns:
+        The running server; call `shutdown()` to stop it.
+    """
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(socket_path)
+    server = _RetrievalServer(socket_path, service, allow_writes)
+    threading.Thread(target=server.serve_forever, name="retrieval-server", daemon=True).start()
+    return server
+
+
+def _connect(
+    socket_path: str, client_type: str, path: str, options: dict
+) -> Optional[RemoteRetrievalService]:
+    """
+    Connects to a served index, or returns None if the socket is dead or serves
+    another index, or the same index with other options.
+    """
+    if not os.path.exists(socket_path):
+        return None
+    remote = RemoteRetrievalService(socket_path)
+    try:
+        info = remote.info()
+    except OSError:
+        return None
+    if info["client_type"] != client_type or info["path"] != os.path.abspath(path):
+        logger.warning(
+            f"Retrieval service at {socket_path} serves {info['path']}, not {path}; opening the index locally"
+        )
+        remote.close()
+        return None
+    if info.get("options") != options:
+        logger.warning(
+            f"Retrieval service at {socket_path} serves {path} with options {info.get('options')}, "
+            f"not {options}; opening the index locally"
+        )
+        remote.close()
+        return None
+    remote.writable = bool(info.get("writable"))
+    return remote
+
+
+def open_service(client_type: str, path: str, options: Optional[dict] = None):
+    """
+    Opens a private handle on an index, to be closed by the caller: a connection
+    to the socket serving it if there is one, else a new RetrievalService.
+
+    Args:
+        client_type (str): "local_db", "image" or "numpy".
+        path (str): The index directory.
+        options (dict): Options passed to `create_client`.
+    """
+    options = options or {}
+    socket_path = options.get("retrieval_socket") or os.environ.get(SOCKET_ENV)
+    if socket_path:
+        remote = _connect(socket_path, client_type, path, service_options(client_type, options))
+        if remote is not None:
+            return remote
+    return RetrievalService(client_type, path, options)
+
+
+def shared_service(client_type: str, path: str, options: Optional[dict] = None):
+    """
+    Returns the process-wide service for an index, opening it on first use.
+
+    If `options["retrieval_socket"]` or the DS490_RETRIEVAL_SOCKET environment
+    variable names a live socket serving the same index, a RemoteRetrievalService
+    connected to it is returned instead. The shared service must not be closed.
+
+    Args:
+        client_type (str): "local_db", "image" or "numpy".
+        path (str): The index directory.
+        options (dict): Options passed to `create_client`.
+
+    Raises:
+        ValueError: If the index is already open in this process with other options.
+    """
+    options = options or {}
+    socket_path = options.get("retrieval_socket") or os.environ.get(SOCKET_ENV)
+    normalized = service_options(client_type, options)
+    key = (client_type, os.path.abspath(path) if path else path)
+
+    with _services_lock:
+        if key in _services:
+            service = _services[key]
+            if service.options != normalized:
+                raise ValueError(
+                    f"The {client_type} index at {path} is already open with options {service.options}, "
+                    f"not {normalized}"
+                )
+            return service
+        if socket_path:
+            remote_key = (*key, socket_path, json.dumps(normalized, sort_keys=True))
+            if remote_key not in _services:
+                remote = _connect(socket_path, client_type, path, normalized)
+                if remote is not None:
+                    _services[remote_key] = remote
+            if remote_key in _services:
+                return _services[remote_key]
+        _services[key] = RetrievalService(client_type, path, options)
+        return _services[key]
+
+
+def start_service(
+    client_type: str = "local_db",
+    path: Optional[str] = None,
+    options: Optional[dict] = None,
+    socket_path: Optional[str] = None,
+    allow_writes: bool = False,
+) -> threading.Thread:
+    """
+    Opens the shared service in a background thread and, if `socket_path` is
+    given, serves it there (read-only unless `allow_writes`) and exports
+    DS490_RETRIEVAL_SOCKET for child processes.
+
+    Returns:
+        threading.Thread: The warm-up thread.
+    """
+    options = {**(options or {}), "retrieval_socket": None}
+    path = path or index_path(client_type, options)
+
+    def warm():
+        try:
+            service = shared_service(client_type, path, options)
+            if socket_path:
+                serve(service, socket_path, allow_writes)
+                os.environ[SOCKET_ENV] = socket_path
+            logger.info(f"Retrieval service ready for {path}")
+        except Exception:
+            logger.exception(f"Could not start the retrieval service for {path}")
+
+    thread = threading.Thread(target=warm, name="retrieval-warmup", daemon=True)
+    thread.start()
+    return thread
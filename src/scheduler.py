@@ -0,0 +1,263 @@
+"""
+Concurrent execution of the upstream nodes of a graph.
+
+The nodes of CodeGeneratorGraph are chained in a straight line, but most of
+them do not depend on each other: RAGNode takes no input and PromptRefinerNode
+only needs `user_prompt`, so both can run while FetchNode and ParseNode wait on
+the network. GraphScheduler derives the dependencies of every node from its
+`input` expression (the earlier nodes that output a key it mentions) and runs
+each node on a thread pool as soon as they have finished, reading its output
+from a NodeCache when one is given. The ScheduleReport it returns has the timing
+of every node and the critical path, the chain of nodes that bounds the wall
+time.
+
+Some nodes set keys besides their declared outputs (FetchNode also sets
+`original_html`); the graph names them in `side_outputs`. A key that no earlier
+node outputs and that is not in the initial state is assumed to come from any
+earlier node, so a node reading it keeps its sequential position.
+"""
+
+import contextlib
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from src.defaults import NODE_DEFAULTS
+from src.node_cache import NodeCache, input_keys
+from src.tracing import in_context, span
+
+logger = logging.getLogger(__name__)
+
+class NodeRun(NamedTuple):
+    """
+    The execution of one node.
+
+    Attributes:
+        name (str): The node name.
+        start (float): Seconds from the start of the schedule.
+        end (float): Seconds from the start of the schedule.
+        dependencies (Tuple[str, ...]): The nodes it waited for.
+        cached (bool): Whether its output was read from the node cache.
+    """
+    name: str
+    start: float
+    end: float
+    dependencies: Tuple[str, ...]
+    cached: bool = False
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class ScheduleReport(NamedTuple):
+    """
+    The timing of a schedule.
+
+    Attributes:
+        runs (List[NodeRun]): The node executions, in graph order.
+        wall_time (float): Seconds from the first start to the last end.
+        critical_path (List[str]): The chain of dependent nodes with the longest total duration.
+    """
+    runs: List[NodeRun]
+    wall_time: float
+    critical_path: List[str]
+
+    def describe(self) -> str:
+        durations = {run.name: run.duration for run in self.runs}
+        serial = sum(durations.values())
+        path = " -> ".join(f"{name} {durations[name]:.2f}s" for name in self.critical_path)
+        cached = [run.name for run in self.runs if run.cached]
+        return (
+            f"Graph nodes ran in {self.wall_time:.2f}s ({serial:.2f}s sequentially); "
+            f"critical path: {path}" + (f"; cached: {', '.join(cached)}" if cached else "")
+        )
+
+
+class GraphScheduler:
+    """
+    Runs graph nodes concurrently, each one once its dependencies have finished.
+
+    Args:
+        nodes (List): The nodes, in an order where every node comes after the
+            nodes it depends on (the sequential order of the graph).
+        max_workers (int): Nodes running at the same time; 1 runs them in order.
+        side_outputs (Dict[str, type]): Keys set by the nodes of a type besides their declared outputs.
+        cache (NodeCache): Cache of the node outputs, None to always run the nodes.
+        throttles (Dict[type, threading.Semaphore]): Semaphores held while the
+            nodes of a type execute (cache hits skip them), e.g. to bound the
+            browsers FetchNode launches across concurrent graphs.
+    """
+
+    def __init__(
+        self,
+        nodes: List,
+        max_workers: int = 4,
+        side_outputs: Optional[Dict[str, type]] = None,
+        cache: Optional[NodeCache] = None,
+        throttles: Optional[Dict[type, threading.Semaphore]] = None,
+    ):
+        self.nodes = list(nodes)
+        self.max_workers = max(1, max_workers)
+        self.side_outputs = side_outputs or {}
+        self.cache = cache
+        self.throttles = throttles or {}
+
+    @classmethod
+    def from_config(
+        cls,
+        nodes: List,
+        config: Optional[dict] = None,
+        side_outputs: Optional[Dict[str, type]] = None,
+        cache: Optional[NodeCache] = None,
+        throttles: Optional[Dict[type, threading.Semaphore]] = None,
+    ) -> "GraphScheduler":
+        """
+        Creates a scheduler with overrides of NODE_DEFAULTS["scheduler"].
+        """
+        config = {**NODE_DEFAULTS["scheduler"], **(config or {})}
+        return cls(nodes, config["max_workers"], side_outputs, cache, throttles)
+
+    def _outputs(self, node) -> List[str]:
+        side = [key for key, node_type in self.side_outputs.items() if isinstance(node, node_type)]
+        return list(getattr(node, "output", None) or []) + side
+
+    def dependencies(self, initial_keys: Iterable[str]) -> List[Set[int]]:
+        """
+        Returns, for every node, the indexes of the earlier nodes it waits for.
+
+        Args:
+            initial_keys (Iterable[str]): The keys of the state the nodes start from.
+        """
+        initial_keys = set(initial_keys)
+        dependencies = []
+        for index, node in enumerate(self.nodes):
+            needed = set()
+            for key in input_keys(node):
+                producers = {
+                    earlier for earlier in range(index)
+                    if key in self._outputs(self.nodes[earlier])
+                }
+                if producers:
+                    needed |= producers
+                elif key not in initial_keys:
+                    logger.debug(f"No node declares '{key}' as output: {self._name(index)} waits for every earlier node")
+                    needed |= set(range(index))
+            dependencies.append(needed)
+        return dependencies
+
+    def run(self, state: dict) -> Tuple[dict, ScheduleReport]:
+        """
+        Executes every node on a copy of the state holding the results of its
+        dependencies, and merges the keys it sets into the shared state.
+
+        If a node raises, no other node is started, and the exception is raised
+        once the running ones have finished.
+
+        Args:
+            state (dict): The initial state.
+
+        Returns:
+            Tuple[dict, ScheduleReport]: The final state and the timing of the nodes.
+        """
+        state = dict(state)
+        dependencies = self.dependencies(state.keys())
+        pending = set(range(len(self.nodes)))
+        done: Set[int] = set()
+        timings: Dict[int, Tuple[float, float]] = {}
+        cached: Set[int] = set()
+        error: Optional[BaseException] = None
+        origin = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="graph-node") as pool:
+            running = {}
+            while True:
+                if error is None:
+                    for index in sorted(i for i in pending if dependencies[i] <= done):
+                        pending.discard(index)
+                        running[pool.submit(in_context(self._execute), index, dict(state), origin)] = index
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = running.pop(future)
+                    try:
+                        changes, timings[index], from_cache = future.result()
+                    except BaseException as e:
+                        logger.error(f"{self._name(index)} failed: {e}")
+                        error = error or e
+                        continue
+                    state.update(changes)
+                    done.add(index)
+                    if from_cache:
+                        cached.add(index)
+
+        if error is not None:
+            raise error
+
+        report = self._report(dependencies, timings, cached)
+        logger.info(report.describe())
+        return state, report
+
+    def _execute(self, index: int, state: dict, origin: float) -> Tuple[Dict[str, Any], Tuple[float, float], bool]:
+        node = self.nodes[index]
+        with span(self._name(index), "node") as node_span:
+            start = time.perf_counter() - origin
+            key = self.cache.key(node, state) if self.cache is not None else None
+            if key is not None:
+                changes = self.cache.get(node, key)
+                if changes is not None:
+                    node_span.set(cached=True)
+                    return changes, (start, time.perf_counter() - origin), True
+
+            before = dict(state)
+            with self._throttle(node):
+                result = node.execute(state)
+            changes = {key: value for key, value in result.items() if key not in before or before[key] is not value}
+            end = time.perf_counter() - origin
+            if key is not None:
+                self.cache.set(node, key, changes)
+            node_span.set(cached=False)
+            return changes, (start, end), False
+
+    def _throttle(self, node):
+        for node_type, semaphore in self.throttles.items():
+            if semaphore is not None and isinstance(node, node_type):
+                return semaphore
+        return contextlib.nullcontext()
+
+    def _name(self, index: int) -> str:
+        node = self.nodes[index]
+        return getattr(node, "node_name", None) or type(node).__name__
+
+    def _report(
+        self, dependencies: List[Set[int]], timings: Dict[int, Tuple[float, float]], cached: Set[int]
+    ) -> ScheduleReport:
+        runs = [
+            NodeRun(
+                self._name(index), start, end,
+                tuple(self._name(dependency) for dependency in sorted(dependencies[index])),
+                index in cached,
+            )
+            for index, (start, end) in sorted(timings.items())
+        ]
+        if not runs:
+            return ScheduleReport([], 0.0, [])
+
+        # Longest chain of durations, in graph order (every dependency comes first).
+        finish: Dict[int, float] = {}
+        previous: Dict[int, Optional[int]] = {}
+        for index in sorted(timings):
+            start, end = timings[index]
+            before = max(dependencies[index], key=lambda d: finish[d], default=None)
+            finish[index] = (end - start) + (finish[before] if before is not None else 0.0)
+            previous[index] = before
+        path, index = [], max(finish, key=finish.get)
+        while index is not None:
+            path.append(self._name(index))
+            index = previous[index]
+
+        wall_time = max(end for _, end in timings.values()) - min(start for start, _ in timings.values())
+        return ScheduleReport(runs, wall_time, path[::-1])
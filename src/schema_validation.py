@@ -0,0 +1,186 @@
+"""
+Compiled, streaming validation of scraped items against the output schema.
+
+`jsonschema.validate` re-checks the schema and re-derives a validator on every
+call, and reports only the first error, so a repair round could fix one schema
+problem at a time. SchemaValidator compiles the schema once per job and
+validates the items as they are pushed (`ValidationStream.feed`), collecting
+every violation aggregated by path: `$.offers[*].price` rather than one entry
+per item. For very large outputs the items are thinned once `sample_size` of
+them have been checked: item i is then checked with probability
+sample_size / (i + 1), so about sample_size * (1 + ln(total / sample_size))
+items are checked in all, spread over the whole output. This is not a reservoir
+sample (which would keep exactly `sample_size` items and validate them only at
+the end), so that each item is still validated as it arrives.
+"""
+
+import random
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from jsonschema.validators import validator_for
+
+from src.defaults import NODE_DEFAULTS
+
+
+class Violation(NamedTuple):
+    """
+    Violations of one schema rule at one path.
+
+    Attributes:
+        path (str): JSON path of the value, with array indexes replaced by `*`.
+        keyword (str): The failing schema keyword ("type", "required", ...).
+        message (str): The message of the first occurrence.
+        count (int): How many checked items violate it.
+        samples (List[int]): Indexes of the first violating items.
+    """
+    path: str
+    keyword: str
+    message: str
+    count: int
+    samples: List[int]
+
+
+class ValidationReport(NamedTuple):
+    """
+    The outcome of validating a set of items.
+    """
+    total: int
+    checked: int
+    invalid: int
+    violations: List[Violation]
+
+    @property
+    def valid(self) -> bool:
+        return self.total > 0 and not self.violations
+
+    def describe(self, max_violations: int = 20) -> List[str]:
+        """
+        Formats the violations for the repair prompt, most frequent first, one line each.
+        """
+        if self.total == 0:
+            return ["No items were pushed to the dataset"]
+        scope = f"{self.checked} checked items" if self.checked == self.total \
+            else f"{self.checked} sampled items (of {self.total})"
+        lines = [f"{self.invalid} of {scope} do not match the output schema:"]
+        for violation in self.violations[:max_violations]:
+            lines.append(
+                f"{violation.path}: {violation.message} [{violation.keyword}] "
+                f"in {violation.count} item(s), e.g. item {', '.join(map(str, violation.samples))}"
+            )
+        if len(self.violations) > max_violations:
+            lines.append(f"... and {len(self.violations) - max_violations} more violations")
+        return lines
+
+
+def _path(error) -> str:
+    path = "$"
+    for part in error.absolute_path:
+        path += "[*]" if isinstance(part, int) else f".{part}"
+    if error.validator == "required":
+        # Report a missing property at its own path.
+        missing = error.message.split("'")[1] if error.message.count("'") >= 2 else None
+        if missing:
+            path += f".{missing}"
+    return path
+
+
+class ValidationStream:
+    """
+    Accumulates the validation of items pushed one at a time; created by SchemaValidator.stream().
+    """
+
+    def __init__(self, validator: "SchemaValidator"):
+        self.validator = validator
+        self.total = 0
+        self.checked = 0
+        self.invalid = 0
+        self._violations: Dict[tuple, list] = {}
+        self._random = random.Random(validator.seed)
+        self._items: List[Any] = []
+
+    def feed(self, item: Any) -> None:
+        """
+        Validates one item; past `sample_size` items, only with probability sample_size / (index + 1).
+        """
+        index = self.total
+        self.total += 1
+        if self.validator.collection:
+            self._items.append(item)
+            return
+        sample_size = self.validator.sample_size
+        if sample_size is not None and index >= sample_size and self._random.random() >= sample_size / (index + 1):
+            return
+        self._check(item, index)
+
+    def _check(self, instance: Any, index: int) -> None:
+        self.checked += 1
+        errors = list(self.validator.compiled.iter_errors(instance))
+        if not errors:
+            return
+        self.invalid += 1
+        seen = set()
+        for error in errors:
+            key = (_path(error), error.validator)
+            if key in seen:
+                continue
+            seen.add(key)
+            entry = self._violations.setdefault(key, [error.message, 0, []])
+            entry[1] += 1
+            if len(entry[2]) < self.validator.examples:
+                entry[2].append(index)
+
+    def report(self) -> ValidationReport:
+        if self.validator.collection and self._items:
+            # An array schema describes the whole output, which is validated once at the end.
+            self._check(self._items, 0)
+            self.total, self.checked = len(self._items), len(self._items)
+            self.invalid = len(self._items) if self._violations else 0
+            self._items = []
+        violations = [
+            Violation(path, keyword, message, count, samples)
+            for (path, keyword), (message, count, samples) in self._violations.items()
+        ]
+        violations.sort(key=lambda violation: (-violation.count, violation.path))
+        return ValidationReport(self.total, self.checked, self.invalid, violations)
+
+
+class SchemaValidator:
+    """
+    A JSON schema compiled once and used to validate many items.
+
+    Args:
+        schema (dict): The JSON schema of one item, or of the whole output if it is an array schema.
+        sample_size (int): Items always checked; past it, item i is checked with
+            probability sample_size / (i + 1). None checks every item.
+        examples (int): Violating item indexes kept per violation.
+        seed (int): Seed of the sampling.
+    """
+
+    def __init__(self, schema: dict, sample_size: Optional[int] = None, examples: int = 3, seed: int = 0):
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+        self.compiled = cls(schema, format_checker=cls.FORMAT_CHECKER)
+        self.collection = schema.get("type") == "array"
+        self.sample_size = sample_size
+        self.examples = examples
+        self.seed = seed
+
+    @classmethod
+    def from_config(cls, schema: dict, config: Optional[dict] = None) -> "SchemaValidator":
+        """
+        Compiles a schema with overrides of NODE_DEFAULTS["schema_validation"].
+        """
+        config = {**NODE_DEFAULTS["schema_validation"], **(config or {})}
+        return cls(schema, config["sample_size"], config["examples"])
+
+    def stream(self) -> ValidationStream:
+        return ValidationStream(self)
+
+    def validate(self, items: Iterable[Any]) -> ValidationReport:
+        """
+        Validates a sequence of items at once.
+        """
+        stream = self.stream()
+        for item in items:
+            stream.feed(item)
+        return stream.report()
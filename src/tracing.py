@@ -0,0 +1,322 @@
+"""
+Structured tracing of a generation.
+
+The `--- (...) ---` log lines tell what happened but not where the time went.
+A Tracer records spans (name, kind, start, duration, parent, attributes) for
+the graph nodes, the reasoning-loop iterations, the LLM calls with their token
+usage, the docs embedding and search, and the candidate executions, and
+exports them as JSON lines.
+
+The active tracer and span are context variables: `span()` opens a child of
+the current span of the current tracer, and does nothing when no tracer is
+active, so instrumented code runs the same without tracing. Threads started
+through `in_context` (and `asyncio.to_thread`, which copies the context) keep
+the parent of the code that started them. LLM calls are traced by
+`LLMTracingHandler`, a LangChain callback added to the model with `trace_llm`.
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.defaults import NODE_DEFAULTS
+
+_tracer: contextvars.ContextVar[Optional["Tracer"]] = contextvars.ContextVar("tracer", default=None)
+_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("span", default=None)
+
+
+class Span:
+    """
+    A timed operation of a trace.
+
+    Attributes:
+        name (str): What ran, e.g. "FetchNode" or "gpt-4o-mini".
+        kind (str): "graph", "node", "iteration", "llm", "embedding", "search", "execution", ...
+        trace_id (str): The trace it belongs to.
+        span_id (str): Its id.
+        parent_id (str): The id of the enclosing span, None for a root span.
+        start (float): Epoch seconds.
+        end (float): Epoch seconds, None while running.
+        status (str): "ok" or "error".
+        error (str): The exception that ended it, if any.
+        attributes (dict): JSON values describing it (tokens, status, hits, ...).
+    """
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str], attributes: dict):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.attributes = dict(attributes)
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if self.end is not None:
+            return
+        self.end = time.time()
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "end": self.end,
+            "duration": self.duration,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """
+    Stands in for a span when no tracer is active.
+    """
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Tracer:
+    """
+    Collects the spans of one trace; thread-safe.
+
+    Args:
+        trace_id (str): The trace id, random by default.
+    """
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, kind: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+        """
+        Starts a span, child of `parent` or else of the current span. It ends with `finish()`.
+        """
+        parent = parent or _span.get()
+        span = Span(name, kind, self.trace_id, parent.span_id if parent is not None else None, attributes)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    @contextlib.contextmanager
+    def activate(self):
+        """
+        Makes this the tracer `span()` records into, within the block.
+        """
+        token = _tracer.set(self)
+        try:
+            yield self
+        finally:
+            _tracer.reset(token)
+
+    def to_jsonl(self) -> str:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        return "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+
+    def export(self, path: str) -> str:
+        """
+        Writes the spans as JSON lines; `{trace_id}` in the path is replaced by the trace id.
+
+        Returns:
+            str: The path written.
+        """
+        path = path.format(trace_id=self.trace_id)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            f.write(self.to_jsonl())
+        return path
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Returns the count and total seconds of the finished spans of each kind,
+        with the token totals of the LLM calls.
+        """
+        totals: Dict[str, dict] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            if span.end is None:
+                continue
+            entry = totals.setdefault(span.kind, {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += span.duration
+            for key in ("prompt_tokens", "completion_tokens"):
+                if isinstance(span.attributes.get(key), int):
+                    entry[key] = entry.get(key, 0) + span.attributes[key]
+        return totals
+
+    def describe(self) -> str:
+        parts = []
+        for kind, entry in sorted(self.summary().items(), key=lambda item: -item[1]["seconds"]):
+            tokens = ""
+            if "prompt_tokens" in entry:
+                tokens = f", {entry['prompt_tokens']}+{entry.get('completion_tokens', 0)} tokens"
+            parts.append(f"{kind} {entry['count']}x {entry['seconds']:.2f}s{tokens}")
+        return f"Trace {self.trace_id}: " + "; ".join(parts)
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _tracer.get()
+
+
+@contextlib.contextmanager
+def span(name: str, kind: str = "internal", **attributes: Any):
+    """
+    Records the block as a span of the active tracer, child of the current span.
+
+    Yields:
+        The span, whose `set()` adds attributes; a no-op stand-in when no tracer is active.
+    """
+    tracer = _tracer.get()
+    if tracer is None:
+        yield _NOOP
+        return
+    current = tracer.start_span(name, kind, **attributes)
+    token = _span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(e)
+        raise
+    finally:
+        current.finish()
+        _span.reset(token)
+
+
+def in_context(fn: Callable) -> Callable:
+    """
+    Binds a function to a copy of the current context, so that a thread running
+    it records its spans into the active tracer, under the current span. A copy
+    can only run in one thread at a time: bind once per submitted task.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+
+    return run
+
+
+class LLMTracingHandler(BaseCallbackHandler):
+    """
+    LangChain callback recording every model call as an "llm" span of the active
+    tracer, with its prompt and completion tokens.
+    """
+
+    # Run in the calling thread, where the tracer and the parent span are set.
+    run_inline = True
+
+    def __init__(self):
+        self._spans: Dict[Any, Span] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, serialized: Optional[dict], kwargs: dict, **attributes: Any) -> None:
+        tracer = _tracer.get()
+        if tracer is None:
+            return
+        params = kwargs.get("invocation_params") or {}
+        name = (
+            params.get("model") or params.get("model_name")
+            or (kwargs.get("metadata") or {}).get("ls_model_name")
+            or ((serialized or {}).get("id") or ["llm"])[-1]
+        )
+        span = tracer.start_span(str(name), "llm", temperature=params.get("temperature"), **attributes)
+        with self._lock:
+            self._spans[run_id] = span
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs: Any) -> None:
+        self._start(run_id, serialized, kwargs, prompt_chars=sum(len(str(m.content)) for batch in messages for m in batch))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs: Any) -> None:
+        self._start(run_id, serialized, kwargs, prompt_chars=sum(len(prompt) for prompt in prompts))
+
+    def on_llm_end(self, response, *, run_id, **kwargs: Any) -> None:
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        usage = dict((response.llm_output or {}).get("token_usage") or {})
+        if not usage:
+            # Chat models report the usage on the message instead.
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if metadata:
+                        usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + metadata.get("input_tokens", 0)
+                        usage["completion_tokens"] = usage.get("completion_tokens", 0) + metadata.get("output_tokens", 0)
+        span.set(
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            completion_chars=sum(len(g.text) for generations in response.generations for g in generations),
+        )
+        span.finish()
+
+    def on_llm_error(self, error: BaseException, *, run_id, **kwargs: Any) -> None:
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.finish(error)
+
+
+_llm_handler = LLMTracingHandler()
+
+
+def trace_llm(llm):
+    """
+    Adds the tracing callback to a LangChain model (once); copies of the model keep it.
+
+    Returns:
+        The model.
+    """
+    if not hasattr(llm, "callbacks"):
+        return llm
+    callbacks = llm.callbacks
+    if callbacks is None:
+        llm.callbacks = [_llm_handler]
+    elif isinstance(callbacks, list):
+        if _llm_handler not in callbacks:
+            llm.callbacks = [*callbacks, _llm_handler]
+    else:
+        # A callback manager.
+        callbacks.add_handler(_llm_handler, inherit=True)
+    return llm
+
+
+def create_tracer(config: Optional[dict] = None) -> Optional[Tracer]:
+    """
+    Creates a Tracer if NODE_DEFAULTS["tracing"], with overrides, enables it.
+    """
+    config = {**NODE_DEFAULTS["tracing"], **(config or {})}
+    return Tracer() if config["enabled"] else None
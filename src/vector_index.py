@@ -0,0 +1,491 @@
+"""
+Vector store backends for the Crawlee docs index.
+
+Besides Qdrant, the docs can be served from a NumpyVectorIndex: normalized float32
+vectors in a memory-mapped .npy matrix plus an offset-indexed payload file. Top-k
+is a single matrix product, nothing is unpickled at startup, readers take no lock,
+and every process mapping the files shares the same read-only pages.
+Optionally the index also stores compact (reduced and/or quantized) codes that are
+scanned instead of the full matrix, see src/quantization.py.
+"""
+
+import contextlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from src.defaults import NODE_DEFAULTS
+from src.docs_index import resolve_index_path
+
+CURRENT_NAME = "CURRENT"
+
+# Attempts of a reader to map the live version, which a writer may prune meanwhile.
+LOAD_ATTEMPTS = 3
+
+
+class ScoredPoint(NamedTuple):
+    """
+    A search hit, shaped like qdrant_client's ScoredPoint.
+    """
+    id: Any
+    score: float
+    payload: Dict[str, Any]
+
+
+def _point_fields(point):
+    if isinstance(point, dict):
+        return point["id"], point["vector"], point.get("payload") or {}
+    return point.id, point.vector, point.payload or {}
+
+
+class _Collection:
+    """
+    One immutable version of a collection, mapped into memory.
+    """
+
+    def __init__(self, directory: str):
+        import numpy as np
+
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(directory, "ids.json"), "r") as f:
+            self.ids = json.load(f)
+        self.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        self.quantization = self.meta.get("quantization")
+        self.reduced = bool(self.meta.get("dimensions"))
+        if self.reduced:
+            self.mean = np.load(os.path.join(directory, "mean.npy"))
+            self.projection = np.load(os.path.join(directory, "projection.npy"))
+        if self.quantization is not None or self.reduced:
+            self.codes = np.load(os.path.join(directory, "codes.npy"), mmap_mode="r")
+        if self.quantization == "int8":
+            self.scale = np.load(os.path.join(directory, "scale.npy"))
+        self.offsets = np.load(os.path.join(directory, "offsets.npy"), mmap_mode="r")
+        self._payload_file = open(os.path.join(directory, "payloads.jsonl"), "rb")
+        self._payloads = (
+            mmap.mmap(self._payload_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.offsets[-1] > 0 else b""
+        )
+
+    def payload(self, row: int) -> dict:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self._payloads[start:end])
+
+    @property
+    def compact(self) -> bool:
+        return self.quantization is not None or self.reduced
+
+    def approximate_scores(self, query):
+        """
+        Scores every point against a normalized query using the compact codes.
+        """
+        from src.quantization import binary_scores, int8_scores, reduce
+
+        if self.reduced:
+            query = reduce(query, self.mean, self.projection)
+        if self.quantization == "int8":
+            return int8_scores(self.codes, self.scale, query)
+        if self.quantization == "binary":
+            return binary_scores(self.codes, query)
+        return self.codes @ query
+
+    def close(self) -> None:
+        if isinstance(self._payloads, mmap.mmap):
+            self._payloads.close()
+        self._payload_file.close()
+
+
+class NumpyVectorIndex:
+    """
+    In-process vector index stored as memory-mapped NumPy arrays.
+
+    It implements the subset of the QdrantClient interface used by RAGNode and
+    GenerateCodeNode (`collection_exists`, `create_collection`, `delete_collection`,
+    `upsert`, `delete`, `search`), so it can be used wherever a client is expected.
+
+    Each collection is a directory holding immutable versions (`vectors.npy`,
+    `offsets.npy`, `payloads.jsonl`, `ids.json`, `meta.json`) and a `CURRENT` file
+    naming the live version. Writers, serialized by a file lock next to the
+    collection, build a new version and swap `CURRENT` atomically; readers notice
+    the swap on their next search. Replaced versions are only deleted once
+    `keep_versions` newer ones exist, so a reader that has just read `CURRENT`
+    can still map the version it names.
+
+    With `quantization` and/or `dimensions` set, every version also stores compact
+    codes: searches scan those and rerank the best `limit * rerank_factor`
+    candidates with the full-precision vectors, of which only the candidate rows
+    are ever paged in.
+
+    Args:
+        path (str): The directory holding the collections.
+        quantization (str): None, "int8" or "binary", applied to written versions.
+        dimensions (int): If set, vectors are reduced to this many dimensions before quantization.
+        reduction (str): "truncate" or "pca", how dimensions are reduced.
+        rerank_factor (int): Candidates reranked with full precision per requested hit,
+            0 to return the approximate ranking as is.
+        keep_versions (int): Versions of a collection kept on disk, the live one included.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        quantization: Optional[str] = None,
+        dimensions: Optional[int] = None,
+        reduction: str = "truncate",
+        rerank_factor: int = 4,
+        keep_versions: int = 3,
+    ):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "numpy is not installed. Please install it using 'pip install numpy'."
+            )
+        try:
+            from filelock import FileLock
+        except ImportError:
+            raise ImportError(
+                "filelock is not installed. Please install it using 'pip install filelock'."
+            )
+        from src.quantization import QUANTIZATIONS, REDUCTIONS
+
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"quantization must be one of {QUANTIZATIONS}")
+        if reduction not in REDUCTIONS:
+            raise ValueError(f"reduction must be one of {REDUCTIONS}")
+        self.path = path
+        self.quantization = quantization
+        self.dimensions = dimensions
+        self.reduction = reduction
+        self.rerank_factor = rerank_factor
+        self.keep_versions = max(1, keep_versions)
+        self._file_lock = FileLock
+        self._collections: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _collection_dir(self, collection_name: str) -> str:
+        return os.path.join(self.path, collection_name)
+
+    @contextlib.contextmanager
+    def _writing(self, collection_name: str):
+        """
+        Serializes the writers of a collection, across threads and processes.
+        The lock file sits next to the collection, which `delete_collection` removes.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with self._file_lock(os.path.join(self.path, f"{collection_name}.lock")):
+            yield
+
+    def _current(self, collection_name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self._collection_dir(collection_name), CURRENT_NAME), "r") as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def current_version(self, collection_name: str) -> Optional[str]:
+        """
+        Returns the name of the live version of a collection, which changes on every write.
+        """
+        return self._current(collection_name)
+
+    def _load(self, collection_name: str) -> _Collection:
+        """
+        Returns the mapped live version of a collection, remapping it if it was swapped.
+        """
+        for attempt in range(LOAD_ATTEMPTS):
+            current = self._current(collection_name)
+            if current is None:
+                raise ValueError(f"Collection {collection_name} not found")
+            with self._lock:
+                loaded = self._collections.get(collection_name)
+                if loaded is not None and loaded[0] == current:
+                    return loaded[1]
+                try:
+                    collection = _Collection(os.path.join(self._collection_dir(collection_name), current))
+                except FileNotFoundError:
+                    # Pruned by writers between reading CURRENT and mapping it: read CURRENT again.
+                    if attempt == LOAD_ATTEMPTS - 1:
+                        raise
+                    continue
+                # The previous version is left to the garbage collector: another
+                # thread may still be reading from its maps.
+                self._collections[collection_name] = (current, collection)
+                return collection
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return self._current(collection_name) is not None
+
+    def create_collection(self, collection_name: str, vectors_config=None, **kwargs) -> bool:
+        import numpy as np
+
+        size = vectors_config.size if vectors_config is not None else 0
+        with self._writing(collection_name):
+            self._write(collection_name, [], np.zeros((0, size), dtype=np.float32), [])
+        return True
+
+    def recreate_collection(self, collection_name: str, vectors_config=None, **kwargs) -> bool:
+        self.delete_collection(collection_name)
+        return self.create_collection(collection_name, vectors_config)
+
+    def delete_collection(self, collection_name: str, **kwargs) -> bool:
+        with self._lock:
+            loaded = self._collections.pop(collection_name, None)
+            if loaded is not None:
+                loaded[1].close()
+        with self._writing(collection_name):
+            shutil.rmtree(self._collection_dir(collection_name), ignore_errors=True)
+        return True
+
+    def count(self, collection_name: str) -> int:
+        return len(self._load(collection_name).ids)
+
+    def points(self, collection_name: str) -> List[dict]:
+        """
+        Returns every point of a collection as a dict with id, vector and payload.
+        """
+        collection = self._load(collection_name)
+        return [
+            {"id": point_id, "vector": collection.vectors[row].tolist(), "payload": collection.payload(row)}
+            for row, point_id in enumerate(collection.ids)
+        ]
+
+    def payloads(self, collection_name: str) -> List[tuple]:
+        """
+        Returns (id, payload) for every point of a collection, without touching the vectors.
+        """
+        collection = self._load(collection_name)
+        return [(point_id, collection.payload(row)) for row, point_id in enumerate(collection.ids)]
+
+    def upsert(self, collection_name: str, points: List[Any], **kwargs) -> None:
+        """
+        Inserts or replaces points (PointStruct or dicts with id, vector and payload).
+        """
+        import numpy as np
+
+        with self._writing(collection_name):
+            current = self._load(collection_name)
+            rows = {point_id: row for row, point_id in enumerate(current.ids)}
+            ids = list(current.ids)
+            vectors = np.array(current.vectors, dtype=np.float32)
+            payloads = [current.payload(row) for row in range(len(ids))]
+
+            new_vectors = []
+            for point in points:
+                point_id, vector, payload = _point_fields(point)
+                if point_id in rows:
+                    vectors[rows[point_id]] = vector
+                    payloads[rows[point_id]] = payload
+                else:
+                    rows[point_id] = len(ids)
+                    ids.append(point_id)
+                    payloads.append(payload)
+                    new_vectors.append(vector)
+            if new_vectors:
+                new_vectors = np.asarray(new_vectors, dtype=np.float32)
+                vectors = np.concatenate([vectors.reshape(-1, new_vectors.shape[1]), new_vectors])
+            self._write(collection_name, ids, vectors, payloads)
+
+    def delete(self, collection_name: str, points_selector, **kwargs) -> None:
+        """
+        Deletes points by id; `points_selector` is a list of ids or a qdrant PointIdsList.
+        """
+        import numpy as np
+
+        selected = set(getattr(points_selector, "points", points_selector))
+        with self._writing(collection_name):
+            current = self._load(collection_name)
+            keep = [row for row, point_id in enumerate(current.ids) if point_id not in selected]
+            self._write(
+                collection_name,
+                [current.ids[row] for row in keep],
+                np.asarray(current.vectors[keep], dtype=np.float32),
+                [current.payload(row) for row in keep],
+            )
+
+    def search(
+        self,
+        collection_name: str,
+        query_vector: List[float],
+        limit: int = 10,
+        **kwargs,
+    ) -> List[ScoredPoint]:
+        """
+        Returns the `limit` points with the highest cosine similarity to the query.
+        """
+        from src.quantization import normalize, top_k
+
+        collection = self._load(collection_name)
+        if not collection.ids or limit <= 0:
+            return []
+
+        query = normalize(query_vector)
+        if not collection.compact:
+            scores = collection.vectors @ query
+            top = top_k(scores, limit)
+            top_scores = scores[top]
+        else:
+            approximate = collection.approximate_scores(query)
+            if self.rerank_factor:
+                candidates = top_k(approximate, limit * self.rerank_factor)
+                exact = collection.vectors[sorted(candidates)] @ query
+                order = top_k(exact, limit)
+                top = sorted(candidates)
+                top, top_scores = [top[i] for i in order], exact[order]
+            else:
+                top = top_k(approximate, limit)
+                top_scores = approximate[top]
+        return [
+            ScoredPoint(id=collection.ids[row], score=float(score), payload=collection.payload(row))
+            for row, score in zip(top, top_scores)
+        ]
+
+    def _write(self, collection_name: str, ids: list, vectors, payloads: List[dict]) -> None:
+        """
+        Writes a new version of a collection and makes it the live one; the
+        caller holds the write lock of the collection.
+        """
+        import numpy as np
+
+        collection_dir = self._collection_dir(collection_name)
+        os.makedirs(collection_dir, exist_ok=True)
+        version = uuid.uuid4().hex
+        version_dir = os.path.join(collection_dir, version)
+        os.makedirs(version_dir)
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors):
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        np.save(os.path.join(version_dir, "vectors.npy"), vectors)
+
+        offsets = [0]
+        with open(os.path.join(version_dir, "payloads.jsonl"), "wb") as f:
+            for payload in payloads:
+                line = json.dumps(payload).encode("utf-8") + b"\n"
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+        np.save(os.path.join(version_dir, "offsets.npy"), np.asarray(offsets, dtype=np.int64))
+
+        with open(os.path.join(version_dir, "ids.json"), "w") as f:
+            json.dump(ids, f)
+        meta = {"size": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+                "count": len(ids), "distance": "Cosine"}
+        meta.update(self._write_codes(version_dir, vectors))
+        with open(os.path.join(version_dir, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+        fd, tmp_path = tempfile.mkstemp(dir=collection_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(collection_dir, CURRENT_NAME))
+        self._prune(collection_dir, version)
+
+    def _prune(self, collection_dir: str, current: str) -> None:
+        """
+        Deletes the versions older than the `keep_versions` most recent ones.
+        Processes that still map a deleted version keep reading the unlinked files.
+        """
+        versions = [
+            entry for entry in os.scandir(collection_dir)
+            if entry.is_dir() and entry.name != current
+        ]
+        versions.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+        for entry in versions[self.keep_versions - 1:]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    def _write_codes(self, version_dir: str, vectors) -> dict:
+        """
+        Writes the compact codes of a version and returns their description for meta.json.
+        """
+        import numpy as np
+
+        from src.quantization import fit_reduction, quantize_binary, quantize_int8, reduce
+
+        if self.quantization is None and not self.dimensions:
+            return {}
+
+        codes = vectors
+        dimensions = None
+        if self.dimensions and vectors.ndim == 2 and self.dimensions < vectors.shape[1]:
+            mean, projection = fit_reduction(vectors, self.dimensions, self.reduction)
+            np.save(os.path.join(version_dir, "mean.npy"), mean)
+            np.save(os.path.join(version_dir, "projection.npy"), projection)
+            codes = reduce(vectors, mean, projection) if len(vectors) else codes @ projection
+            dimensions = int(projection.shape[1])
+
+        if self.quantization == "int8":
+            codes, scale = quantize_int8(codes)
+            np.save(os.path.join(version_dir, "scale.npy"), scale)
+        elif self.quantization == "binary":
+            codes = quantize_binary(codes)
+        np.save(os.path.join(version_dir, "codes.npy"), np.ascontiguousarray(codes))
+        return {"quantization": self.quantization, "dimensions": dimensions, "reduction": self.reduction}
+
+    def close(self) -> None:
+        with self._lock:
+            for _, collection in self._collections.values():
+                collection.close()
+            self._collections.clear()
+
+
+def index_path(client_type: Optional[str], config: dict, crawlee_version: Optional[str] = None) -> str:
+    """
+    Returns the on-disk location of the docs index for a client type.
+
+    The Qdrant and NumPy backends keep separate indexes (`client_path` and
+    `numpy_path`), both keyed by the crawlee version.
+    """
+    defaults = NODE_DEFAULTS["rag"]
+    key = "numpy_path" if client_type == "numpy" else "client_path"
+    return resolve_index_path(config.get(key) or defaults[key], crawlee_version)
+
+
+# The config keys of the NumpyVectorIndex arguments.
+NUMPY_OPTIONS = {
+    "quantization": "quantization",
+    "dimensions": "dimensions",
+    "reduction": "vector_reduction",
+    "rerank_factor": "rerank_factor",
+    "keep_versions": "keep_versions",
+}
+
+
+def create_client(client_type: Optional[str], path: Optional[str] = None, options: Optional[dict] = None):
+    """
+    Opens the vector store used for the docs index.
+
+    Args:
+        client_type (str): "memory" (or None), "local_db", "image" or "numpy".
+        path (str): Index directory for "local_db" and "numpy".
+        options (dict): NumpyVectorIndex settings (quantization, dimensions,
+            vector_reduction, rerank_factor, keep_versions), defaulting to NODE_DEFAULTS["rag"].
+    """
+    if client_type == "numpy":
+        defaults = NODE_DEFAULTS["rag"]
+        options = options or {}
+        return NumpyVectorIndex(
+            path,
+            **{argument: options.get(key, defaults[key]) for argument, key in NUMPY_OPTIONS.items()},
+        )
+
+    try:
+        from qdrant_client import QdrantClient
+    except ImportError:
+        raise ImportError(
+            "qdrant_client is not installed. Please install it using 'pip install qdrant-client'."
+        )
+
+    if client_type in ["memory", None]:
+        return QdrantClient(":memory:")
+    elif client_type == "local_db":
+        return QdrantClient(path=path)
+    elif client_type == "image":
+        return QdrantClient(url="http://localhost:6333")
+    raise ValueError("client_type provided not correct")
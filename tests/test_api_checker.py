@@ -0,0 +1,169 @@
+import importlib.util
+
+import pytest
+
+from src.api_checker import check_api
+
+pytest.importorskip("crawlee")
+pytest.importorskip("playwright")
+
+PLAYWRIGHT_CRAWLER = '''
+import asyncio
+from datetime import timedelta
+
+from crawlee import ConcurrencySettings, Request
+from crawlee.crawlers import PlaywrightCrawler, PlaywrightCrawlingContext
+from crawlee.storages import Dataset
+
+
+async def main() -> None:
+    crawler = PlaywrightCrawler(
+        max_requests_per_crawl=50,
+        headless=True,
+        browser_type="chromium",
+        concurrency_settings=ConcurrencySettings(max_concurrency=4),
+        request_handler_timeout=timedelta(seconds=60),
+    )
+
+    @crawler.router.default_handler
+    async def request_handler(context: PlaywrightCrawlingContext) -> None:
+        context.log.info(f"Processing {context.request.url}")
+        await context.page.wait_for_selector("article")
+        for card in await context.page.query_selector_all("article"):
+            title = await card.query_selector("h2")
+            link = await card.query_selector("a")
+            await context.push_data({
+                "title": await title.inner_text() if title else None,
+                "url": await link.get_attribute("href") if link else None,
+            })
+        await context.enqueue_links(selector="a.next", label="LIST")
+
+    @crawler.router.handler("LIST")
+    async def list_handler(context: PlaywrightCrawlingContext) -> None:
+        rows = await context.page.locator("tr").all_inner_texts()
+        await context.push_data([{"row": row} for row in rows])
+
+    await crawler.run([Request.from_url("https://example.com")])
+    dataset = await Dataset.open()
+    await dataset.export_to(key="results.json", content_type="json")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+'''
+
+BEAUTIFULSOUP_CRAWLER = '''
+import asyncio
+
+from crawlee.crawlers import BeautifulSoupCrawler, BeautifulSoupCrawlingContext
+
+
+async def main() -> None:
+    crawler = BeautifulSoupCrawler(max_request_retries=2)
+
+    @crawler.router.default_handler
+    async def handler(context: BeautifulSoupCrawlingContext) -> None:
+        for item in context.soup.select("li.item"):
+            await context.push_data({"name": item.get_text(strip=True)})
+        await context.enqueue_links(strategy="same-domain")
+
+    await crawler.run(["https://example.com"])
+    data = await crawler.get_data()
+    print(data.items)
+
+
+asyncio.run(main())
+'''
+
+PARSEL_CRAWLER = '''
+from crawlee.crawlers import ParselCrawler, ParselCrawlingContext
+
+crawler = ParselCrawler()
+
+
+@crawler.router.default_handler
+async def handler(context: ParselCrawlingContext) -> None:
+    title = context.selector.css("title::text").get()
+    await context.push_data({"title": title, "url": context.request.url})
+'''
+
+PLAIN_PLAYWRIGHT = '''
+import asyncio
+from playwright.async_api import async_playwright
+
+
+async def main():
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.goto("https://example.com", wait_until="domcontentloaded", timeout=30000)
+        items = await page.eval_on_selector_all("a", "els => els.map(e => e.href)")
+        await browser.close()
+        return items
+
+
+print(asyncio.run(main()))
+'''
+
+
+@pytest.mark.parametrize("code", [PLAYWRIGHT_CRAWLER, BEAUTIFULSOUP_CRAWLER, PLAIN_PLAYWRIGHT])
+def test_no_false_positives_on_correct_scrapers(code):
+    assert check_api(code) == []
+
+
+def test_parsel_crawler():
+    errors = check_api(PARSEL_CRAWLER)
+    if importlib.util.find_spec("parsel") is not None:
+        assert errors == []
+    else:
+        # Importing it fails at run time as well.
+        assert errors
+        assert all(error.startswith("line 2: cannot import name 'Parsel") and "parsel" in error for error in errors)
+
+
+def test_unknown_import():
+    errors = check_api("from crawlee.crawlers import PlaywrightCrawlr\n")
+    assert len(errors) == 1
+    assert errors[0].startswith("line 1: cannot import name 'PlaywrightCrawlr' from 'crawlee.crawlers'")
+    assert "PlaywrightCrawler" in errors[0]
+
+
+def test_missing_module():
+    assert check_api("import crawlee.playwright_crawler\n") == ["line 1: No module named 'crawlee.playwright_crawler'"]
+
+
+def test_misspelled_context_method():
+    code = PLAYWRIGHT_CRAWLER.replace("await context.enqueue_links(", "await context.enqueue_link(")
+    errors = check_api(code)
+    assert len(errors) == 1
+    assert "enqueue_link" in errors[0] and "enqueue_links" in errors[0]
+
+
+def test_misspelled_page_method():
+    code = PLAYWRIGHT_CRAWLER.replace("context.page.wait_for_selector(", "context.page.wait_for_selectr(")
+    errors = check_api(code)
+    assert len(errors) == 1
+    assert "wait_for_selectr" in errors[0]
+
+
+def test_unexpected_crawler_keyword():
+    code = PLAYWRIGHT_CRAWLER.replace("max_requests_per_crawl=50", "max_pages=50")
+    errors = check_api(code)
+    assert len(errors) == 1
+    assert "max_pages" in errors[0]
+
+
+def test_unresolved_names_are_left_alone():
+    code = '''
+from crawlee.crawlers import PlaywrightCrawler
+
+def handler(context):
+    context.anything_goes()
+
+crawler = PlaywrightCrawler(**options)
+'''
+    assert check_api(code) == []
+
+
+def test_unchecked_packages_are_ignored():
+    assert check_api("from crawlee.crawlers import Nope\n", packages=["playwright"]) == []
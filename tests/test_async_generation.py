@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from pydantic import BaseModel
+
+import nodes.generate_crawlee_code_node as module
+from nodes.generate_crawlee_code_node import GenerateCodeNode
+from src.execution_monitor import ExecutionFailure, ExecutionResult
+
+FIRST = "print('first')"
+FIXED = "print('fixed')"
+
+
+class Product(BaseModel):
+    price: float
+
+
+class Calls:
+    """
+    Fakes of the docs retrieval and the error analysis, recording whether each
+    saw the other one running.
+    """
+
+    def __init__(self, wait: float):
+        self.wait = wait
+        self.retrieving = threading.Event()
+        self.analysing = threading.Event()
+        self.retrieval_saw_analysis = None
+        self.analysis_saw_retrieval = None
+
+    def retriever(self, client, embedder, config):
+        calls = self
+
+        class FakeRetriever:
+            cache = None
+
+            def search(self, query, limit, context=None):
+                if context is not None:
+                    calls.retrieving.set()
+                    calls.retrieval_saw_analysis = calls.analysing.is_set()
+                return [{"text": "Dataset.push_data stores items."}]
+
+            async def asearch(self, query, limit, context=None):
+                if context is not None:
+                    calls.retrieving.set()
+                    deadline = time.monotonic() + calls.wait
+                    while not calls.analysing.is_set() and time.monotonic() < deadline:
+                        await asyncio.sleep(0.01)
+                    calls.retrieval_saw_analysis = calls.analysing.is_set()
+                return [{"text": "Dataset.push_data stores items."}]
+
+        return FakeRetriever()
+
+    def analysis(self, state, llm_model):
+        self.analysing.set()
+        self.analysis_saw_retrieval = self.retrieving.wait(self.wait)
+        return "push the items"
+
+
+def run(monkeypatch, use_async):
+    calls = Calls(wait=2)
+    executed = []
+    failure = ExecutionFailure("exception", "KeyError", "'price'", None, None, "", "")
+    results = {
+        FIRST: ExecutionResult("error", "", failure),
+        FIXED: ExecutionResult("ok", "", None, [{"price": 1.5}]),
+    }
+    monkeypatch.setattr(module, "HybridRetriever", calls.retriever)
+    monkeypatch.setattr(module, "execution_focused_analysis", calls.analysis)
+    monkeypatch.setattr(module, "execution_focused_code_generation", lambda *args: f"```python\n{FIXED}\n```")
+
+    node = GenerateCodeNode(
+        input="user_prompt & refined_prompt & html_info & reduced_html & answer",
+        output=["generated_code"],
+        node_config={
+            "llm_model": FakeListChatModel(responses=[f"```python\n{FIRST}\n```"]),
+            "embedder_model": object(),
+            "schema": Product,
+            "retrieval": {"query_rewrite": "local"},
+            "execution_pool": {"enabled": False},
+            "page_fixtures": {"enabled": False},
+            "api_check": {"enabled": False},
+            "prompt_budget": {"enabled": False},
+        },
+    )
+
+    def run_code(code, on_start=None):
+        executed.append(code.strip())
+        return results[code.strip()]
+
+    monkeypatch.setattr(node, "run_code", run_code)
+    state = {
+        "user_prompt": "Extract the price of each product",
+        "refined_prompt": "The price is in span.price",
+        "html_info": "A product list",
+        "reduced_html": "<span class='price'>1.5</span>",
+        "answer": {"price": 1.5},
+    }
+    if use_async:
+        state = asyncio.run(node.aexecute(state))
+    else:
+        state = node.execute(state)
+    return state, executed, calls
+
+
+def test_aexecute_overlaps_the_retrieval_and_the_analysis(monkeypatch):
+    _, _, calls = run(monkeypatch, use_async=True)
+    assert calls.retrieval_saw_analysis
+    assert calls.analysis_saw_retrieval
+
+
+def test_execute_runs_them_one_after_the_other(monkeypatch):
+    _, _, calls = run(monkeypatch, use_async=False)
+    assert calls.retrieval_saw_analysis is False
+
+
+def test_aexecute_matches_execute(monkeypatch):
+    sync_state, sync_executed, _ = run(monkeypatch, use_async=False)
+    async_state, async_executed, _ = run(monkeypatch, use_async=True)
+
+    assert async_state["generated_code"] == sync_state["generated_code"]
+    assert async_state["generated_code"].strip() == FIXED
+    assert async_executed == sync_executed == [FIRST, FIXED]
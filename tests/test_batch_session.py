@@ -0,0 +1,95 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+
+import graphs.batch_session as batch_session
+from graphs.batch_session import BatchSession, Job
+
+
+class Record(BaseModel):
+    title: str
+
+
+class FakeRAGNode:
+    """Counts the index syncs; `execute` runs `action` first."""
+
+    def __init__(self, action=None):
+        self.action = action
+        self.calls = 0
+
+    def execute(self, state):
+        self.calls += 1
+        if self.action is not None:
+            self.action()
+        return state
+
+
+class FakeGraph:
+    def __init__(self, prompt, source, config, schema):
+        self.config = config
+        self.llm_model = object()
+        self.model_token = 1000
+        self.rag_node = FakeRAGNode()
+        self.graph = SimpleNamespace(nodes=[self.rag_node])
+        self.trace = None
+
+
+@pytest.fixture
+def session(monkeypatch, tmp_path):
+    monkeypatch.setattr(batch_session, "CodeGeneratorGraph", FakeGraph)
+    monkeypatch.setattr(batch_session, "RAGNode", FakeRAGNode)
+    return BatchSession({
+        "embedder_model": object(),
+        "embedding_cache": {"enabled": False},
+        "batch": {"output_dir": str(tmp_path)},
+    })
+
+
+def test_graphs_are_built_while_the_index_syncs(session):
+    syncing, release = threading.Event(), threading.Event()
+
+    def sync():
+        syncing.set()
+        assert release.wait(5)
+
+    graph = session.graph(Job("titles", "https://example.com", Record), 0)
+    graph.rag_node.action = sync
+    preparing = threading.Thread(target=session.prepare_index, args=(graph,))
+    preparing.start()
+    assert syncing.wait(5)
+
+    built = []
+    builder = threading.Thread(target=lambda: built.append(session.graph(Job("prices", "https://example.com", Record), 1)))
+    builder.start()
+    builder.join(2)
+    built_during_sync = not builder.is_alive()
+    release.set()
+    preparing.join(5)
+    builder.join(5)
+    assert built_during_sync
+    assert built[0].config["llm"]["model_instance"] is graph.llm_model
+
+
+def test_index_is_synced_once(session):
+    graphs = [session.graph(Job("titles", "https://example.com", Record), index) for index in range(4)]
+    threads = [threading.Thread(target=session.prepare_index, args=(graph,)) for graph in graphs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert sum(graph.rag_node.calls for graph in graphs) == 1
+
+
+def test_failed_sync_is_retried(session):
+    def fail():
+        raise ConnectionError("crawlee.dev is unreachable")
+
+    first, second = (session.graph(Job("titles", "https://example.com", Record), index) for index in range(2))
+    first.rag_node.action = fail
+    with pytest.raises(ConnectionError):
+        session.prepare_index(first)
+    session.prepare_index(second)
+    session.prepare_index(first)
+    assert (first.rag_node.calls, second.rag_node.calls) == (1, 1)
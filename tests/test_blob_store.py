@@ -0,0 +1,184 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from src.blob_store import BlobStore
+from src.node_cache import NodeCache, create_node_cache, import_legacy_entries
+
+PAGE = "<html>" + "<li>item</li>" * 200 + "</html>"
+OTHER_PAGE = "<html>" + "<p>text</p>" * 200 + "</html>"
+
+
+def blob_files(directory):
+    return sorted(
+        name for _, _, names in os.walk(os.path.join(directory, "blobs")) for name in names
+    )
+
+
+def index_stat(directory):
+    stat = os.stat(os.path.join(directory, "index.json"))
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def test_round_trip(tmp_path):
+    store = BlobStore(str(tmp_path))
+    value = {"doc": [PAGE], "title": "short", "count": 3, "nested": {"html": OTHER_PAGE}}
+    store.put("a", value)
+    assert store.get("a") == value
+    assert BlobStore(str(tmp_path)).get("a") == value
+    assert store.get("missing") is None
+
+
+def test_pages_are_stored_once(tmp_path):
+    store = BlobStore(str(tmp_path))
+    store.put("a", {"doc": PAGE})
+    store.put("b", {"original_html": PAGE, "parsed": [PAGE]})
+    assert len(blob_files(tmp_path)) == 1
+    store.put("c", {"doc": OTHER_PAGE})
+    assert len(blob_files(tmp_path)) == 2
+
+
+def test_shared_blob_outlives_one_of_its_entries(tmp_path):
+    store = BlobStore(str(tmp_path))
+    store.put("a", {"doc": PAGE})
+    store.put("b", {"doc": PAGE})
+    store.delete("a")
+    assert store.get("b") == {"doc": PAGE}
+    store.delete("b")
+    assert blob_files(tmp_path) == []
+
+
+def test_replacing_an_entry_releases_its_blobs(tmp_path):
+    store = BlobStore(str(tmp_path))
+    store.put("a", {"doc": PAGE})
+    store.put("a", {"doc": OTHER_PAGE})
+    assert len(blob_files(tmp_path)) == 1
+    assert store.get("a") == {"doc": OTHER_PAGE}
+
+
+def test_short_strings_stay_in_the_index(tmp_path):
+    store = BlobStore(str(tmp_path), min_blob_bytes=10)
+    store.put("a", {"title": "short", "doc": "long enough"})
+    assert len(blob_files(tmp_path)) == 1
+    with open(tmp_path / "index.json") as f:
+        assert json.load(f)["entries"]["a"]["value"]["title"] == "short"
+
+
+def test_reads_do_not_rewrite_the_index(tmp_path):
+    store = BlobStore(str(tmp_path))
+    store.put("a", {"doc": PAGE})
+    before = index_stat(tmp_path)
+    for _ in range(3):
+        assert store.get("a") == {"doc": PAGE}
+    assert index_stat(tmp_path) == before
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    store = BlobStore(str(tmp_path))
+    for key, page in (("a", PAGE), ("b", OTHER_PAGE)):
+        store.put(key, {"doc": page})
+    # Room for two pages and their entries, not three.
+    capped = BlobStore(str(tmp_path), max_bytes=store.size() + 100)
+    capped.get("a")
+    capped.put("c", {"doc": PAGE + "<footer>"})
+    assert capped.get("b") is None
+    assert capped.get("a") == {"doc": PAGE}
+    assert capped.size() <= capped.max_bytes
+
+
+def test_reads_by_another_process_count_for_eviction(tmp_path):
+    writer = BlobStore(str(tmp_path))
+    writer.put("a", {"doc": PAGE})
+    writer.put("b", {"doc": OTHER_PAGE})
+    BlobStore(str(tmp_path)).get("a")
+    writer.max_bytes = writer.size() + 100
+    writer.put("c", {"doc": PAGE + "<footer>"})
+    assert writer.get("a") is not None
+    assert writer.get("b") is None
+
+
+def test_newest_entry_is_kept_over_the_cap(tmp_path):
+    store = BlobStore(str(tmp_path), max_bytes=10)
+    store.put("a", {"doc": PAGE})
+    store.put("b", {"doc": OTHER_PAGE})
+    assert store.get("a") is None
+    assert store.get("b") == {"doc": OTHER_PAGE}
+
+
+def test_missing_blob_drops_the_entry(tmp_path):
+    store = BlobStore(str(tmp_path))
+    store.put("a", {"doc": PAGE})
+    blob, = blob_files(tmp_path)
+    os.remove(os.path.join(tmp_path, "blobs", blob[:2], blob))
+    assert store.get("a") is None
+    assert store.size() == 0
+
+
+def test_failed_write_keeps_the_previous_index(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path))
+    store.put("a", {"doc": PAGE})
+
+    def fail(path, data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "_write_atomic", fail)
+    with pytest.raises(OSError):
+        store.put("b", {"doc": OTHER_PAGE})
+    monkeypatch.undo()
+    assert store.get("b") is None
+    assert store.get("a") == {"doc": PAGE}
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+
+def test_unreadable_index_starts_empty(tmp_path):
+    BlobStore(str(tmp_path)).put("a", {"doc": "x"})
+    (tmp_path / "index.json").write_text("{not json")
+    store = BlobStore(str(tmp_path))
+    assert store.get("a") is None
+    store.put("b", {"doc": "y"})
+    assert store.get("b") == {"doc": "y"}
+
+
+def put_entries(directory, worker):
+    store = BlobStore(directory)
+    for i in range(20):
+        store.put(f"{worker}-{i}", {"doc": PAGE, "i": i})
+
+
+def test_concurrent_writers_keep_every_entry(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=put_entries, args=(str(tmp_path), worker)) for worker in range(3)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+    assert all(process.exitcode == 0 for process in workers)
+    store = BlobStore(str(tmp_path))
+    assert all(store.get(f"{worker}-{i}") == {"doc": PAGE, "i": i} for worker in range(3) for i in range(20))
+    assert len(blob_files(tmp_path)) == 1
+
+
+def test_legacy_entries_are_imported(tmp_path):
+    key = "ab" * 32
+    entry = {"node": "FetchNode", "created": 1.0, "changes": {"doc": [PAGE]}}
+    (tmp_path / f"{key}.json").write_text(json.dumps(entry))
+    (tmp_path / f"{'cd' * 32}.json").write_text("{truncated")
+    (tmp_path / f"{'ef' * 32}.json.12.34.tmp").write_text("{")
+    (tmp_path / "notes.json").write_text("{}")
+
+    node_cache = create_node_cache({"dir": str(tmp_path)})
+    assert node_cache.store.get(key) == entry
+    assert sorted(name for name in os.listdir(tmp_path) if name.endswith((".json", ".tmp"))) == [
+        "index.json", "notes.json",
+    ]
+    assert import_legacy_entries(node_cache.store) == 0
+
+
+def test_imported_entries_are_hits(tmp_path):
+    key = "ab" * 32
+    (tmp_path / f"{key}.json").write_text(json.dumps({"node": "Node", "created": 1e12, "changes": {"code": "x"}}))
+    store = BlobStore(str(tmp_path))
+    assert import_legacy_entries(store) == 1
+    assert NodeCache(store).get(object(), key) == {"code": "x"}
@@ -0,0 +1,53 @@
+import pytest
+
+import src.chunking as chunking
+from src.chunking import chunk_page, split_sections
+
+
+class CharEncoding:
+    """One token per character, so that budgets are easy to reason about."""
+
+    def encode(self, text, disallowed_special=()):
+        return list(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def char_tokens(monkeypatch):
+    monkeypatch.setattr(chunking, "_encoding", lambda encoding_name: CharEncoding())
+
+
+def test_split_sections_along_markdown_headings():
+    text = "# Dataset\nintro\n\n## push_data\nappends items\n\n## get_data\nreads items"
+    assert [heading for heading, _ in split_sections(text)] == ["Dataset", "push_data", "get_data"]
+
+
+def test_split_sections_titles_plain_text_by_its_first_line():
+    assert split_sections("Dataset\n\nStores items.") == [("Dataset", "Dataset\n\nStores items.")]
+
+
+def test_chunks_never_exceed_the_budget_or_span_sections():
+    text = "# A\n" + "\n\n".join(["a" * 30] * 5) + "\n\n# B\n" + "b" * 10
+    chunks = chunk_page("page", text, max_tokens=70, overlap_tokens=8)
+    assert all(len(chunk["text"]) <= 70 for chunk in chunks)
+    assert {chunk["section"] for chunk in chunks} == {"A", "B"}
+    assert all("a" not in chunk["text"] for chunk in chunks if chunk["section"] == "B")
+    assert [chunk["chunk"] for chunk in chunks] == list(range(len(chunks)))
+    assert all(chunk["source"] == "page" for chunk in chunks)
+
+
+def test_oversized_paragraph_is_cut_into_overlapping_windows():
+    paragraph = "".join(chr(ord("a") + i % 26) for i in range(100))
+    chunks = chunk_page("page", paragraph, max_tokens=40, overlap_tokens=10)
+    texts = [chunk["text"] for chunk in chunks]
+    assert all(len(text) <= 40 for text in texts)
+    for previous, following in zip(texts, texts[1:]):
+        assert previous[-10:] == following[:10]
+    assert texts[0] + "".join(text[10:] for text in texts[1:]) == paragraph
+
+
+def test_short_heading_stays_with_the_first_window():
+    chunks = chunk_page("page", "# Title\n\n" + "x" * 100, max_tokens=40, overlap_tokens=10)
+    assert chunks[0]["text"].startswith("# Title\n\nx")
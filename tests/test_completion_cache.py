@@ -0,0 +1,55 @@
+from langchain_core.language_models import FakeListChatModel
+
+from nodes.generate_crawlee_code_node import GenerateCodeNode
+from src.llm_cache import use_completion_cache
+
+
+class FakeChat(FakeListChatModel):
+    temperature: float = 0.0
+
+
+def make_node(llm, tmp_path, **config):
+    return GenerateCodeNode(
+        input="user_prompt",
+        output=["generated_code"],
+        node_config={
+            "llm_model": llm,
+            "llm_cache": {"path": str(tmp_path / "completions.sqlite")},
+            "execution_pool": {"enabled": False},
+            **config,
+        },
+    )
+
+
+def test_cache_is_attached_to_a_copy_of_the_shared_model(tmp_path):
+    llm = FakeChat(responses=["code"])
+    node = make_node(llm, tmp_path)
+    assert node.llm_model is not llm
+    assert node.llm_model.cache is node.completion_cache
+    assert llm.cache is None
+
+
+def test_sampling_parameters_stay_on_the_node(tmp_path):
+    llm = FakeChat(responses=["code"], temperature=0.7)
+    node = make_node(llm, tmp_path, temperature=0)
+    assert node.llm_model.temperature == 0
+    assert llm.temperature == 0.7
+    assert llm.cache is None
+
+
+def test_nodes_sharing_a_model_keep_their_own_cache(tmp_path):
+    llm = FakeChat(responses=["code"])
+    first = make_node(llm, tmp_path)
+    second = make_node(llm, tmp_path, llm_cache={"path": str(tmp_path / "other.sqlite")})
+    assert first.llm_model.cache is first.completion_cache
+    assert second.llm_model.cache is second.completion_cache
+    assert first.completion_cache.store is not second.completion_cache.store
+
+
+def test_cache_is_only_used_by_deterministic_models(tmp_path):
+    cache = make_node(FakeChat(responses=["code"]), tmp_path).completion_cache
+    hot = use_completion_cache(FakeChat(responses=["code"], temperature=1.0), cache)
+    assert hot.cache is None
+    cold = use_completion_cache(FakeChat(responses=["code"]), cache)
+    assert cold.cache is cache
+    assert use_completion_cache(cold.model_copy(update={"temperature": 1.0}), cache).cache is None
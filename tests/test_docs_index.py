@@ -0,0 +1,64 @@
+import time
+
+from src.docs_index import (
+    content_hash,
+    diff_pages,
+    empty_manifest,
+    is_fresh,
+    load_manifest,
+    page_id,
+    resolve_index_path,
+    save_manifest,
+)
+
+
+def manifest_of(pages, synced_at=None):
+    manifest = empty_manifest()
+    manifest["synced_at"] = synced_at
+    manifest["pages"] = {source: {"hash": content_hash(text), "ids": [page_id(source)]} for source, text in pages.items()}
+    return manifest
+
+
+def test_diff_pages_reports_new_changed_and_removed_pages():
+    manifest = manifest_of({"a": "alpha", "b": "beta", "c": "gamma"})
+    changed, removed = diff_pages({"a": "alpha", "b": "beta v2", "d": "delta"}, manifest)
+    assert changed == {"b": "beta v2", "d": "delta"}
+    assert removed == ["c"]
+
+
+def test_diff_pages_against_empty_manifest_returns_every_page():
+    changed, removed = diff_pages({"a": "alpha"}, empty_manifest())
+    assert changed == {"a": "alpha"}
+    assert removed == []
+
+
+def test_is_fresh():
+    assert not is_fresh(empty_manifest(), None)
+    assert not is_fresh(manifest_of({}, synced_at=time.time()), None)
+    assert is_fresh(manifest_of({"a": "alpha"}, synced_at=0), None)
+    assert is_fresh(manifest_of({"a": "alpha"}, synced_at=0), -1)
+    assert is_fresh(manifest_of({"a": "alpha"}, synced_at=time.time()), 60)
+    assert not is_fresh(manifest_of({"a": "alpha"}, synced_at=time.time() - 120), 60)
+
+
+def test_manifest_round_trip(tmp_path):
+    manifest = manifest_of({"a": "alpha"}, synced_at=1.0)
+    save_manifest(str(tmp_path / "index"), manifest)
+    assert load_manifest(str(tmp_path / "index")) == manifest
+    assert load_manifest(str(tmp_path / "missing")) == empty_manifest()
+
+
+def test_manifest_of_another_version_is_discarded(tmp_path):
+    manifest = manifest_of({"a": "alpha"}, synced_at=1.0)
+    manifest["version"] = -1
+    save_manifest(str(tmp_path), manifest)
+    assert load_manifest(str(tmp_path)) == empty_manifest()
+
+
+def test_page_id_is_stable_per_source():
+    assert page_id("https://crawlee.dev/python/api#0") == page_id("https://crawlee.dev/python/api#0")
+    assert page_id("https://crawlee.dev/python/api#0") != page_id("https://crawlee.dev/python/api#1")
+
+
+def test_resolve_index_path():
+    assert resolve_index_path("databases/crawlee_{crawlee_version}", "0.6.8") == "databases/crawlee_0.6.8"
@@ -0,0 +1,137 @@
+import asyncio
+import itertools
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+import src.disk_cache as disk_cache
+from src.disk_cache import DiskLRUCache
+from src.embedding_cache import CachedEmbeddings, cached_embedder, embedder_model_name
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    # Every access gets its own timestamp, so that the LRU order is exact.
+    ticks = itertools.count(1)
+    monkeypatch.setattr(disk_cache, "time", SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DiskLRUCache(str(tmp_path / "cache" / "embeddings.sqlite"))
+    yield cache
+    cache.close()
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self, model="small", offset=0.0):
+        self.model = model
+        self.offset = offset
+        self.documents = []
+        self.queries = []
+
+    def embed_documents(self, texts):
+        self.documents.extend(texts)
+        return [[len(text) + self.offset, 1.0] for text in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [len(text) + self.offset, -1.0]
+
+
+def test_least_recently_used_entries_are_evicted_past_max_bytes(tmp_path):
+    cache = DiskLRUCache(str(tmp_path / "cache.sqlite"), max_bytes=30)
+    cache.set_many({"a": b"a" * 10, "b": b"b" * 10, "c": b"c" * 10})
+    assert cache.get("a") == b"a" * 10
+
+    cache.set("d", b"d" * 10)
+
+    assert cache.get_many(["a", "b", "c", "d"]).keys() == {"a", "c", "d"}
+    assert cache.total_bytes() == 30
+
+
+def test_eviction_frees_enough_for_a_large_entry(tmp_path):
+    cache = DiskLRUCache(str(tmp_path / "cache.sqlite"), max_bytes=30)
+    cache.set_many({"a": b"a" * 10, "b": b"b" * 10, "c": b"c" * 10})
+
+    cache.set("big", b"x" * 25)
+
+    assert cache.get_many(["a", "b", "c", "big"]).keys() == {"big"}
+
+
+def test_get_many_queries_in_slices_of_500_keys(cache):
+    keys = [f"key-{i}" for i in range(1200)]
+    cache.set_many({key: key.encode() for key in keys[:1100]})
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+
+    found = cache.get_many(keys + keys[:10])
+
+    selects = [statement for statement in statements if statement.startswith("SELECT")]
+    assert len(selects) == 3
+    assert found == {key: key.encode() for key in keys[:1100]}
+    assert (cache.hits, cache.misses) == (1100, 100)
+
+
+def test_entries_persist_across_instances(cache):
+    cache.set("key", b"value")
+    other = DiskLRUCache(cache.path)
+    assert other.get("key") == b"value"
+    other.close()
+
+
+def test_cached_embeddings_embed_each_text_once(cache):
+    embedder = CountingEmbeddings()
+    cached = CachedEmbeddings(embedder, cache)
+
+    first = cached.embed_documents(["alpha", "beta"])
+    second = cached.embed_documents(["beta", "gamma", "alpha"])
+
+    assert first == [[5.0, 1.0], [4.0, 1.0]]
+    assert second == [[4.0, 1.0], [5.0, 1.0], [5.0, 1.0]]
+    assert embedder.documents == ["alpha", "beta", "gamma"]
+
+
+def test_documents_and_queries_are_cached_apart(cache):
+    embedder = CountingEmbeddings()
+    cached = CachedEmbeddings(embedder, cache)
+
+    assert cached.embed_documents(["alpha"]) == [[5.0, 1.0]]
+    assert cached.embed_query("alpha") == [5.0, -1.0]
+    assert cached.embed_query("alpha") == [5.0, -1.0]
+    assert embedder.documents == ["alpha"]
+    assert embedder.queries == ["alpha"]
+
+
+def test_models_are_cached_apart(cache):
+    small, large = CountingEmbeddings("small"), CountingEmbeddings("large", offset=100)
+    assert embedder_model_name(small) != embedder_model_name(large)
+
+    CachedEmbeddings(small, cache).embed_documents(["alpha"])
+    assert CachedEmbeddings(large, cache).embed_documents(["alpha"]) == [[105.0, 1.0]]
+    assert CachedEmbeddings(small, cache).embed_documents(["alpha"]) == [[5.0, 1.0]]
+    assert small.documents == large.documents == ["alpha"]
+
+
+def test_async_embeddings_share_the_cache(cache):
+    embedder = CountingEmbeddings()
+    cached = CachedEmbeddings(embedder, cache)
+    cached.embed_documents(["alpha"])
+    cached.embed_query("beta")
+
+    assert asyncio.run(cached.aembed_documents(["alpha"])) == [[5.0, 1.0]]
+    assert asyncio.run(cached.aembed_query("beta")) == [4.0, -1.0]
+    assert embedder.documents == ["alpha"]
+    assert embedder.queries == ["beta"]
+
+
+def test_cached_embedder(tmp_path):
+    embedder = CountingEmbeddings()
+    assert cached_embedder(embedder, {"enabled": False}) is embedder
+
+    cached = cached_embedder(embedder, {"path": str(tmp_path / "embeddings.sqlite"), "max_bytes": 1024})
+    assert isinstance(cached, CachedEmbeddings)
+    assert cached.cache.max_bytes == 1024
+    assert cached_embedder(cached) is cached
+    assert embedder_model_name(cached) == embedder_model_name(embedder)
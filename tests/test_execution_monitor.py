@@ -0,0 +1,167 @@
+import subprocess
+import sys
+
+from src.execution_monitor import ExecutionMonitor, OutputCapture, OutputParser
+
+SCRIPT = "/tmp/run/candidate.py"
+
+# Output of a BasicCrawler whose request handler raises, with max_request_retries=1.
+CRAWLEE_OUTPUT = """\
+[crawlee._autoscaling.autoscaled_pool] INFO  current_concurrency = 0; desired_concurrency = 10; cpu = 0; mem = 0; event_loop = 0.0; client_info = 0.0
+[crawlee.crawlers._basic._basic_crawler] INFO  handling
+[crawlee.crawlers._basic._basic_crawler] WARN  Retrying request to https://example.com due to: 'title'. File "/tmp/run/candidate.py", line 11, in handler,     print(items["title"])
+[crawlee.crawlers._basic._basic_crawler] INFO  handling
+[crawlee.crawlers._basic._basic_crawler] ERROR Request to https://example.com failed and reached maximum retries
+ Traceback (most recent call last):
+  File "/venv/lib/python3.11/site-packages/crawlee/crawlers/_basic/_context_pipeline.py", line 114, in __call__
+    await final_context_consumer(cast('TCrawlingContext', crawling_context))
+  File "/venv/lib/python3.11/site-packages/crawlee/_utils/wait.py", line 37, in wait_for
+    return await asyncio.wait_for(operation(), timeout.total_seconds())
+           ^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+  File "/usr/lib/python3.11/asyncio/tasks.py", line 489, in wait_for
+    return fut.result()
+           ^^^^^^^^^^^^
+  File "/venv/lib/python3.11/site-packages/crawlee/router.py", line 124, in __call__
+    return await user_defined_handler(context)
+           ^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+  File "/tmp/run/candidate.py", line 11, in handler
+    print(items["title"])
+          ~~~~~^^^^^^^^^
+KeyError: 'title'
+[crawlee._autoscaling.autoscaled_pool] INFO  Waiting for remaining tasks to finish
+[crawlee.crawlers._basic._basic_crawler] INFO  Error analysis: total_errors=2 unique_errors=1
+[crawlee.crawlers._basic._basic_crawler] INFO  Final request statistics:
+"""
+
+
+def parse(output, **kwargs):
+    parser = OutputParser(SCRIPT, **kwargs)
+    progress = [parser.feed(line) for line in output.splitlines()]
+    return parser, progress
+
+
+def test_request_failure_after_retries():
+    parser, _ = parse(CRAWLEE_OUTPUT)
+    failure = parser.failure
+    assert failure.kind == "crawler_error"
+    assert failure.exc_type == "KeyError"
+    assert failure.message == "'title'"
+    assert failure.frame == f"{SCRIPT}:11 in handler"
+    assert failure.source == 'print(items["title"])'
+    assert "failed and reached maximum retries" in failure.traceback
+
+
+def test_retries_are_not_fatal_by_default():
+    output = CRAWLEE_OUTPUT.split("[crawlee.crawlers._basic._basic_crawler] ERROR")[0]
+    parser, _ = parse(output)
+    assert parser.failure is None
+
+
+def test_fail_on_retry_stops_at_the_first_handler_error():
+    parser, _ = parse(CRAWLEE_OUTPUT, fail_on_retry=True)
+    failure = parser.failure
+    assert failure.kind == "handler_error"
+    assert failure.message == "'title'"
+    assert failure.frame == f"{SCRIPT}:11 in handler"
+    assert failure.source == 'print(items["title"])'
+
+
+def test_retry_raised_outside_the_script_is_not_fatal():
+    line = "[crawlee.crawlers._basic._basic_crawler] WARN  Retrying request to https://example.com due to: timeout. " \
+        'File "/venv/lib/python3.11/site-packages/playwright/_impl/_page.py", line 10, in goto,     await x'
+    parser, _ = parse(line, fail_on_retry=True)
+    assert parser.failure is None
+
+
+def test_uncaught_exception():
+    output = """Traceback (most recent call last):
+  File "/tmp/run/candidate.py", line 3, in <module>
+    main()
+  File "/tmp/run/candidate.py", line 2, in main
+    raise ValueError("no items")
+ValueError: no items
+"""
+    parser, _ = parse(output)
+    assert parser.failure[:5] == ("exception", "ValueError", "no items", f"{SCRIPT}:2 in main", 'raise ValueError("no items")')
+
+
+def test_chained_exceptions_are_kept_together():
+    output = """Traceback (most recent call last):
+  File "/tmp/run/candidate.py", line 2, in main
+    items["title"]
+KeyError: 'title'
+
+During handling of the above exception, another exception occurred:
+
+Traceback (most recent call last):
+  File "/tmp/run/candidate.py", line 4, in main
+    raise RuntimeError("parse failed")
+RuntimeError: parse failed
+"""
+    parser, _ = parse(output)
+    assert parser.failure.exc_type == "RuntimeError"
+    assert "KeyError: 'title'" in parser.failure.traceback
+    assert parser.failure.traceback.count("Traceback (most recent call last):") == 2
+
+
+def test_error_in_scraped_data_is_not_a_failure():
+    parser, _ = parse('{"title": "ERROR 404 - page not found"}\nSaved 3 items, 0 ERRORS')
+    assert parser.failure is None
+
+
+def test_crawler_failure_in_another_log_format():
+    parser, _ = parse("ERROR:crawlee.crawlers._basic._basic_crawler:Request to https://example.com failed and reached maximum retries")
+    assert parser.failure.kind == "crawler_error"
+
+
+def test_error_log_line():
+    parser, _ = parse("[crawlee.storages._dataset] ERROR Could not write the item")
+    assert parser.failure.kind == "crawler_error"
+    assert parser.failure.message == "Could not write the item"
+
+
+def test_status_lines_are_not_progress():
+    _, progress = parse(
+        "[crawlee._autoscaling.autoscaled_pool] INFO  current_concurrency = 0; desired_concurrency = 10\n"
+        "[crawlee.crawlers._basic._basic_crawler] INFO  Current request statistics:\n"
+        "[crawlee.crawlers._basic._basic_crawler] INFO  handling"
+    )
+    assert progress == [False, False, True]
+
+
+def test_output_capture_keeps_head_and_tail():
+    capture = OutputCapture(head=2, tail=2)
+    for i in range(10):
+        capture.add(f"line {i}")
+    assert capture.text() == "line 0\nline 1\n... [6 lines omitted] ...\nline 8\nline 9"
+
+
+def run(code, **kwargs):
+    proc = subprocess.Popen(
+        [sys.executable, "-u", "-c", code], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    return ExecutionMonitor(**kwargs).watch(proc)
+
+
+def test_watch_successful_run():
+    result = run("print('done')")
+    assert result.status == "ok"
+    assert result.output == "done"
+
+
+def test_watch_failing_run():
+    result = run("raise ValueError('boom')")
+    assert result.status == "error"
+    assert result.failure.kind == "exception"
+    assert result.failure.exc_type == "ValueError"
+
+
+def test_watch_stops_a_stalled_run():
+    result = run("import time; print('start'); time.sleep(30)", stall_timeout=0.5, timeout=20)
+    assert result.status == "error"
+    assert result.failure.kind == "stall"
+
+
+def test_watch_timeout():
+    result = run("import time\nwhile True:\n    print('tick'); time.sleep(0.1)", timeout=0.5)
+    assert result.status == "timeout"
@@ -0,0 +1,106 @@
+import logging
+
+import pytest
+
+import nodes.generate_crawlee_code_node as node_module
+from nodes.generate_crawlee_code_node import GenerateCodeNode
+from src.execution_pool import ExecutionPool, run_candidate, shared_pool
+
+
+@pytest.fixture
+def pool():
+    pool = ExecutionPool(size=2, shared_browser=False)
+    yield pool
+    pool.close()
+
+
+def script(tmp_path, code, name="candidate.py"):
+    path = tmp_path / name
+    path.write_text(code)
+    return str(path)
+
+
+def finish(proc):
+    output = proc.stdout.read()
+    proc.wait(timeout=30)
+    proc.results.close()
+    return output
+
+
+def test_pool_keeps_size_idle_workers(pool):
+    pool.start()
+    assert len(pool._idle) == 2
+    assert all(worker.poll() is None for worker in pool._idle)
+
+
+def test_script_runs_in_a_warm_worker_which_is_replaced(pool, tmp_path):
+    pool.start()
+    warm = {worker.pid for worker in pool._idle}
+    path = script(tmp_path, "import os\nprint(os.getpid())\n")
+
+    first = pool.run(path)
+    assert first.pid in warm
+    assert finish(first).strip() == str(first.pid)
+    assert len(pool._idle) == 2
+
+    # Every worker runs a single script: the next run gets another interpreter.
+    second = pool.run(path)
+    assert second.pid != first.pid
+    finish(second)
+
+
+def test_each_run_gets_its_own_environment_and_cwd(pool, tmp_path):
+    path = script(tmp_path, "import os, sys\nprint(os.environ['RUN'], os.getcwd(), sys.argv[0])\n")
+    proc = pool.run(path, env={"RUN": "first"}, cwd=str(tmp_path))
+    assert finish(proc).split() == ["first", str(tmp_path), path]
+    proc = pool.run(path, env={"RUN": "second"}, cwd=str(tmp_path))
+    assert finish(proc).split()[0] == "second"
+
+
+def test_crashed_idle_worker_is_replaced(pool, tmp_path):
+    pool.start()
+    crashed = pool._idle[0]
+    crashed.kill()
+    crashed.wait()
+
+    proc = pool.run(script(tmp_path, "print('done')\n"))
+
+    assert proc is not crashed
+    assert finish(proc).strip() == "done"
+    assert crashed not in pool._idle
+    assert len(pool._idle) == 2
+    assert all(worker.poll() is None for worker in pool._idle)
+
+
+def test_errors_are_reported_like_a_plain_interpreter(pool, tmp_path):
+    path = script(tmp_path, "def scrape():\n    raise KeyError('price')\n\nscrape()\n")
+    proc = pool.run(path)
+    output = finish(proc)
+    assert proc.returncode == 1
+    assert "KeyError: 'price'" in output
+    assert "candidate_runtime.py" not in output
+    assert f'File "{path}", line 4' in output
+
+
+def test_disabled_pool_falls_back_to_a_fresh_worker(monkeypatch, tmp_path):
+    assert shared_pool({"enabled": False}) is None
+    assert shared_pool({"size": 1}) is shared_pool({"size": 1})
+
+    node = GenerateCodeNode.__new__(GenerateCodeNode)
+    node.logger = logging.getLogger("test")
+    node.execution_pool = None
+    node.page_fixtures = None
+    node.run_storage = {"persist": False}
+    started = []
+
+    def run_and_track(path, env=None, cwd=None):
+        started.append(path)
+        return run_candidate(path, env, cwd)
+
+    monkeypatch.setattr(node_module, "run_candidate", run_and_track)
+    path = script(tmp_path, "import os\nprint(os.environ['CRAWLEE_STORAGE_DIR'])\n")
+    proc = node.start_candidate(path, str(tmp_path / "storage"))
+
+    assert started == [path]
+    assert finish(proc).strip() == str(tmp_path / "storage")
+    assert proc.returncode == 0
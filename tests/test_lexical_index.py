@@ -0,0 +1,58 @@
+from src.lexical_index import LexicalIndex, extract_symbols, reciprocal_rank_fusion, tokenize
+
+CHUNKS = [
+    ("dataset", "Dataset stores results. Call context.push_data(item) to append an item to the default Dataset."),
+    ("enqueue", "enqueue_links finds links on the page and adds them to the RequestQueue."),
+    ("playwright", "PlaywrightCrawler renders pages in a browser; the handler gets a PlaywrightCrawlingContext."),
+    ("beautifulsoup", "BeautifulSoupCrawler parses HTML with BeautifulSoup and does not render JavaScript."),
+]
+
+
+def test_tokenize_keeps_identifiers_and_their_parts():
+    assert tokenize("await context.enqueue_links()") == ["await", "context", "enqueue_links", "enqueue", "links"]
+    assert tokenize("PlaywrightCrawler") == ["playwrightcrawler", "playwright", "crawler"]
+    assert tokenize("the use of a Dataset") == ["dataset"]
+
+
+def test_extract_symbols_finds_api_names_once_in_order():
+    text = "AttributeError: 'PlaywrightCrawlingContext' has no attribute 'enqueue_link'; see enqueue_links, PlaywrightCrawlingContext"
+    assert extract_symbols(text) == ["AttributeError", "PlaywrightCrawlingContext", "enqueue_link", "enqueue_links"]
+    assert extract_symbols(None) == []
+
+
+def test_bm25_ranks_the_chunk_with_the_query_terms_first():
+    index = LexicalIndex(CHUNKS)
+    assert len(index) == 4
+    assert index.search("how to push_data into a dataset")[0][0] == "dataset"
+    assert index.search("enqueue links")[0][0] == "enqueue"
+    assert index.search("unrelated words") == []
+
+
+def test_bm25_matches_camel_case_parts():
+    index = LexicalIndex(CHUNKS)
+    ids = [doc_id for doc_id, _ in index.search("playwright crawler", limit=2)]
+    assert ids[0] == "playwright"
+
+
+def test_symbol_lookup_prefers_chunks_with_more_and_rarer_symbols():
+    index = LexicalIndex(CHUNKS + [("other", "PlaywrightCrawler is also mentioned here.")])
+    hits = index.lookup_symbols(["PlaywrightCrawler", "PlaywrightCrawlingContext", "missing_symbol"])
+    assert hits[0][0] == "playwright"
+    assert {doc_id for doc_id, _ in hits} == {"playwright", "other"}
+
+
+def test_empty_index():
+    index = LexicalIndex([])
+    assert index.search("dataset") == []
+    assert index.lookup_symbols(["Dataset"]) == []
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c"]], k=60)
+    assert [doc_id for doc_id, _ in fused] == ["b", "c", "a"]
+    assert fused[0][1] == 1 / 62 + 1 / 61
+
+
+def test_reciprocal_rank_fusion_weights():
+    fused = reciprocal_rank_fusion([["a"], ["b"]], weights=[1.0, 2.0])
+    assert [doc_id for doc_id, _ in fused] == ["b", "a"]
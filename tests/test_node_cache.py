@@ -0,0 +1,162 @@
+import threading
+
+from langchain_core.documents import Document
+from pydantic import BaseModel
+
+from src.blob_store import BlobStore
+from src.node_cache import NodeCache, create_node_cache, fingerprint, input_keys, read_keys
+
+
+class Node:
+    def __init__(self, input="user_prompt & (parsed_doc | doc)", output=("code",), **config):
+        self.input = input
+        self.output = list(output)
+        self.node_config = config
+
+
+class OtherNode(Node):
+    pass
+
+
+class FetchNode(Node):
+    pass
+
+
+class Model:
+    """Stands in for a LangChain model, which describes itself with _identifying_params."""
+
+    def __init__(self, **params):
+        self._identifying_params = params
+
+
+class Item(BaseModel):
+    title: str
+
+
+class PricedItem(BaseModel):
+    title: str
+    price: float
+
+
+STATE = {"user_prompt": "titles", "doc": ["<html>"], "url": "https://example.com"}
+
+
+def cache(tmp_path, **kwargs):
+    return NodeCache(BlobStore(str(tmp_path)), **kwargs)
+
+
+def test_input_keys_and_read_keys():
+    node = Node()
+    assert input_keys(node) == ["user_prompt", "parsed_doc", "doc"]
+    assert read_keys(node, STATE) == ["user_prompt", "doc"]
+    assert read_keys(Node(input=""), STATE) == []
+
+
+def test_same_inputs_same_key(tmp_path):
+    node_cache = cache(tmp_path)
+    assert node_cache.key(Node(), STATE) == node_cache.key(Node(), dict(STATE))
+
+
+def test_key_ignores_the_keys_a_node_does_not_read(tmp_path):
+    node_cache = cache(tmp_path)
+    assert node_cache.key(Node(), STATE) == node_cache.key(Node(), {**STATE, "url": "https://other.com"})
+
+
+def test_key_changes_with_the_inputs_read(tmp_path):
+    node_cache = cache(tmp_path)
+    key = node_cache.key(Node(), STATE)
+    assert node_cache.key(Node(), {**STATE, "user_prompt": "prices"}) != key
+    assert node_cache.key(Node(), {**STATE, "doc": ["<html></html>"]}) != key
+    assert node_cache.key(Node(), {**STATE, "doc": [Document(page_content="<html>")]}) != key
+
+
+def test_key_changes_with_the_node_type_and_outputs(tmp_path):
+    node_cache = cache(tmp_path)
+    key = node_cache.key(Node(), STATE)
+    assert node_cache.key(OtherNode(), STATE) != key
+    assert node_cache.key(Node(output=["answer"]), STATE) != key
+
+
+def test_key_changes_with_the_schema(tmp_path):
+    node_cache = cache(tmp_path)
+    assert node_cache.key(Node(schema=Item), STATE) == node_cache.key(Node(schema=Item), STATE)
+    assert node_cache.key(Node(schema=Item), STATE) != node_cache.key(Node(schema=PricedItem), STATE)
+
+
+def test_key_changes_with_the_model_parameters(tmp_path):
+    node_cache = cache(tmp_path)
+    key = node_cache.key(Node(llm_model=Model(model_name="gpt-4o-mini", temperature=0)), STATE)
+    assert node_cache.key(Node(llm_model=Model(model_name="gpt-4o-mini", temperature=0)), STATE) == key
+    assert node_cache.key(Node(llm_model=Model(model_name="gpt-4o-mini", temperature=1)), STATE) != key
+    assert node_cache.key(Node(llm_model=Model(model_name="gpt-4o", temperature=0)), STATE) != key
+
+
+def test_key_ignores_verbose_and_force(tmp_path):
+    node_cache = cache(tmp_path)
+    assert node_cache.key(Node(verbose=True, force=True), STATE) == node_cache.key(Node(), STATE)
+    assert node_cache.key(Node(headless=False), STATE) != node_cache.key(Node(), STATE)
+
+
+def test_key_does_not_depend_on_config_order(tmp_path):
+    node_cache = cache(tmp_path)
+    assert node_cache.key(Node(a=1, b={"x": 1, "y": 2}), STATE) == node_cache.key(Node(b={"y": 2, "x": 1}, a=1), STATE)
+
+
+def test_unserializable_input_is_not_cached(tmp_path):
+    assert cache(tmp_path).key(Node(), {**STATE, "doc": threading.Lock()}) is None
+
+
+def test_fingerprint():
+    assert fingerprint({"b": {1, 2}, "a": (1, None)}) == {"a": [1, None], "b": ["1", "2"]}
+    assert fingerprint(Model(model_name="m")) == {"__type__": "Model", "model_name": "m"}
+    assert fingerprint(threading.Lock()) == "lock"
+    assert fingerprint(Item)["properties"] == {"title": {"title": "Title", "type": "string"}}
+
+
+def test_round_trip_with_documents(tmp_path):
+    node_cache = cache(tmp_path)
+    node = Node()
+    key = node_cache.key(node, STATE)
+    assert node_cache.get(node, key) is None
+    changes = {"code": "print(1)", "doc": [Document(page_content="<p>" * 600, metadata={"source": "u"})]}
+    node_cache.set(node, key, changes)
+    assert node_cache.get(node, key) == changes
+    assert (node_cache.hits, node_cache.misses) == (1, 1)
+
+
+def test_unserializable_output_is_not_stored(tmp_path):
+    node_cache = cache(tmp_path)
+    node = Node()
+    key = node_cache.key(node, STATE)
+    node_cache.set(node, key, {"client": threading.Lock()})
+    assert node_cache.get(node, key) is None
+
+
+def test_ttl_by_node_type(tmp_path, monkeypatch):
+    import src.node_cache as node_cache_module
+
+    now = [1000.0]
+    monkeypatch.setattr(node_cache_module.time, "time", lambda: now[0])
+    node_cache = cache(tmp_path, ttl={"FetchNode": 60})
+    fetch, other = FetchNode(input="url", output=["doc"]), Node()
+    fetch_key, other_key = node_cache.key(fetch, STATE), node_cache.key(other, STATE)
+    node_cache.set(fetch, fetch_key, {"doc": ["<html>"]})
+    node_cache.set(other, other_key, {"code": "x"})
+    now[0] += 61
+    assert node_cache.get(fetch, fetch_key) is None
+    assert node_cache.get(other, other_key) == {"code": "x"}
+
+
+def test_refresh_writes_without_reading(tmp_path):
+    node = Node()
+    writer = cache(tmp_path, refresh=True)
+    key = writer.key(node, STATE)
+    writer.set(node, key, {"code": "x"})
+    assert writer.get(node, key) is None
+    assert cache(tmp_path).get(node, key) == {"code": "x"}
+
+
+def test_create_node_cache(tmp_path):
+    assert create_node_cache({"enabled": False}) is None
+    node_cache = create_node_cache({"dir": str(tmp_path)}, refresh=True)
+    assert node_cache.refresh and node_cache.ttl == {"FetchNode": 24 * 60 * 60}
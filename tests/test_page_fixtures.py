@@ -0,0 +1,139 @@
+import asyncio
+import base64
+import json
+import os
+import time
+
+from src.candidate_runtime import har_entry
+from src.page_fixtures import HAR_DIR_ENV, HAR_MODE_ENV, PageFixtures
+
+
+class FakeRequest:
+    method = "GET"
+    url = "https://example.com/"
+    post_data_buffer = None
+
+    async def headers_array(self):
+        return [{"name": "accept", "value": "text/html"}]
+
+
+class FakeResponse:
+    request = FakeRequest()
+    status = 200
+    status_text = "OK"
+
+    async def body(self):
+        return b"<html>hi</html>"
+
+    async def headers_array(self):
+        return [{"name": "Content-Type", "value": "text/html"}]
+
+
+class FakeRedirect(FakeResponse):
+    status = 302
+    status_text = "Found"
+
+    async def body(self):
+        raise RuntimeError("Response body is unavailable for redirect responses")
+
+    async def headers_array(self):
+        return [{"name": "Location", "value": "/home"}]
+
+
+def test_har_entry_embeds_the_body():
+    entry = asyncio.run(har_entry(FakeResponse()))
+    assert entry["request"]["url"] == "https://example.com/"
+    assert entry["request"]["headers"] == [{"name": "accept", "value": "text/html"}]
+    content = entry["response"]["content"]
+    assert base64.b64decode(content["text"]) == b"<html>hi</html>"
+    assert content["mimeType"] == "text/html"
+
+
+def test_har_entry_of_a_redirect_keeps_its_location():
+    entry = asyncio.run(har_entry(FakeRedirect()))
+    assert entry["response"]["status"] == 302
+    assert entry["response"]["redirectURL"] == "/home"
+    assert entry["response"]["content"]["size"] == 0
+
+
+def test_records_until_an_archive_exists_then_replays(tmp_path):
+    fixtures = PageFixtures(str(tmp_path))
+    assert fixtures.env() == {HAR_MODE_ENV: "record", HAR_DIR_ENV: str(tmp_path)}
+
+    entry = asyncio.run(har_entry(FakeResponse()))
+    with open(tmp_path / "record-1-0.jsonl", "w") as f:
+        f.write(json.dumps(entry) + "\n")
+        # A run killed while writing leaves a truncated last line.
+        f.write(json.dumps(entry)[:40])
+    with open(tmp_path / "record-2-0.jsonl", "w") as f:
+        f.write(json.dumps(entry) + "\n")
+
+    assert fixtures.collect() == 2
+    assert fixtures.env()[HAR_MODE_ENV] == "replay"
+    with open(fixtures.archive_path) as f:
+        archive = json.load(f)
+    assert archive["log"]["entries"] == [entry, entry]
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("record-")]
+
+
+def test_nothing_recorded(tmp_path):
+    fixtures = PageFixtures(str(tmp_path))
+    (tmp_path / "record-1-0.jsonl").write_text("")
+    assert fixtures.collect() == 0
+    assert not fixtures.has_archive()
+
+
+def test_temporary_directory_is_removed_on_close():
+    fixtures = PageFixtures()
+    assert os.path.isdir(fixtures.directory)
+    fixtures.close()
+    assert not os.path.exists(fixtures.directory)
+
+
+def record(directory, name, entries):
+    with open(os.path.join(directory, name), "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+def test_late_recordings_are_merged_into_the_archive(tmp_path):
+    fixtures = PageFixtures(str(tmp_path))
+    first = asyncio.run(har_entry(FakeResponse()))
+    late = {**first, "request": {**first["request"], "url": "https://example.com/next"}}
+    record(tmp_path, "record-1-0.jsonl", [first])
+    assert fixtures.collect() == 1
+
+    # A speculative candidate still running when the archive was written.
+    record(tmp_path, "record-2-0.jsonl", [late])
+    assert fixtures.collect() == 1
+
+    with open(fixtures.archive_path) as f:
+        assert json.load(f)["log"]["entries"] == [first, late]
+
+
+def test_kept_archives_are_keyed_by_source(tmp_path):
+    shop = PageFixtures(str(tmp_path), "https://shop.example.com/products")
+    blog = PageFixtures(str(tmp_path), "https://blog.example.com/")
+    assert shop.directory != blog.directory
+    assert os.path.dirname(shop.directory) == str(tmp_path)
+    assert os.path.basename(shop.directory).startswith("shop.example.com-")
+
+    record(shop.directory, "record-1-0.jsonl", [asyncio.run(har_entry(FakeResponse()))])
+    shop.collect()
+    assert PageFixtures(str(tmp_path), "https://shop.example.com/products").env()[HAR_MODE_ENV] == "replay"
+    assert blog.env()[HAR_MODE_ENV] == "record"
+    shop.close()
+    assert os.path.isdir(shop.directory)
+
+
+def test_kept_archive_expires_after_its_ttl(tmp_path):
+    source = "https://shop.example.com/products"
+    fixtures = PageFixtures(str(tmp_path), source, ttl=60)
+    record(fixtures.directory, "record-1-0.jsonl", [asyncio.run(har_entry(FakeResponse()))])
+    fixtures.collect()
+
+    assert PageFixtures(str(tmp_path), source, ttl=60).has_archive()
+    hour_ago = time.time() - 3600
+    os.utime(fixtures.archive_path, (hour_ago, hour_ago))
+    assert PageFixtures(str(tmp_path), source).has_archive()
+    assert not PageFixtures(str(tmp_path), source, ttl=60).has_archive()
@@ -0,0 +1,133 @@
+import pytest
+
+import src.chunking as chunking
+import src.prompt_budget as prompt_budget
+from src.prompt_budget import (
+    PromptBudgeter,
+    Section,
+    collapse_html_siblings,
+    create_budgeter,
+    drop_repeated_paragraphs,
+    truncate_tokens,
+)
+
+
+class CharEncoding:
+    """One token per character, so that budgets are easy to reason about."""
+
+    def encode(self, text, disallowed_special=()):
+        return list(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def char_tokens(monkeypatch):
+    monkeypatch.setattr(chunking, "_encoding", lambda encoding_name: CharEncoding())
+    monkeypatch.setattr(prompt_budget, "_encoding", lambda encoding_name: CharEncoding())
+    prompt_budget.cached_count.cache_clear()
+    yield
+    prompt_budget.cached_count.cache_clear()
+
+
+def test_collapse_keeps_the_first_siblings_of_a_run():
+    html = "<ul>" + "".join(f"<li class='card item'>{i}</li>" for i in range(5)) + "</ul>"
+    assert collapse_html_siblings(html) == (
+        '<ul><li class="card item">0</li><li class="card item">1</li>'
+        "<!-- 3 more similar <li class='card item'> elements --></ul>"
+    )
+
+
+def test_collapse_only_joins_adjacent_siblings():
+    html = "<div><p>a</p><p>b</p><h2>title</h2><p>c</p><p>d</p><h2>title</h2><p>e</p></div>"
+    assert collapse_html_siblings(html, keep=2) == html
+
+
+def test_collapse_runs_separately():
+    html = "<div>" + "<p>a</p>" * 3 + "<h2>t</h2>" + "<p>b</p>" * 4 + "</div>"
+    assert collapse_html_siblings(html, keep=1) == (
+        "<div><p>a</p><!-- 2 more similar <p> elements --><h2>t</h2>"
+        "<p>b</p><!-- 3 more similar <p> elements --></div>"
+    )
+
+
+def test_collapse_ignores_whitespace_but_not_text_between_siblings():
+    assert "more similar" in collapse_html_siblings("<div><b>1</b>\n  <b>2</b>\n<b>3</b></div>", keep=1)
+    html = "<div><b>1</b> and <b>2</b> and <b>3</b></div>"
+    assert collapse_html_siblings(html, keep=1) == html
+
+
+def test_collapse_compares_classes():
+    html = "<ul><li class='a'>1</li><li class='b'>2</li><li class='a'>3</li><li>4</li></ul>"
+    assert collapse_html_siblings(html, keep=1) == html.replace("'", '"')
+
+
+def test_collapse_nested_runs():
+    html = "<div>" + ("<section>" + "<i>x</i>" * 3 + "</section>") * 3 + "</div>"
+    assert collapse_html_siblings(html, keep=1) == (
+        "<div><section><i>x</i><!-- 2 more similar <i> elements --></section>"
+        "<!-- 2 more similar <section> elements --></div>"
+    )
+
+
+def test_drop_repeated_paragraphs():
+    text = "Intro\n\nSame  text\n\nOther\n\nsame text\n\nIntro"
+    assert drop_repeated_paragraphs(text) == "Intro\n\nSame  text\n\nOther"
+
+
+def test_truncate_tokens_counts_the_note():
+    assert truncate_tokens("abcdef", 10) == "abcdef"
+    text = truncate_tokens("a" * 100, 40)
+    assert text == "a" * 11 + "\n[... 89 tokens omitted ...]"
+    assert len(text) <= 40
+
+
+def test_fit_leaves_a_prompt_under_budget_alone():
+    budgeter = PromptBudgeter(100, min_section_tokens=5)
+    assert budgeter.fit("tmpl", [Section("html", "a" * 50, 2)]) == {"html": "a" * 50}
+
+
+def test_fit_reduces_the_lowest_priority_sections_first():
+    budgeter = PromptBudgeter(200, min_section_tokens=10)
+    texts = budgeter.fit("0123456789", [
+        Section("request", "r" * 40, 0, fixed=True),
+        Section("docs", "d" * 80, 1),
+        Section("html", "h" * 150, 2),
+    ])
+    assert texts["request"] == "r" * 40
+    assert texts["docs"] == "d" * 80
+    assert texts["html"] == "h" * 41 + "\n[... 109 tokens omitted ...]"
+
+
+def test_fit_keeps_min_section_tokens_and_moves_on():
+    budgeter = PromptBudgeter(80, min_section_tokens=30)
+    texts = budgeter.fit("", [Section("docs", "d" * 60, 1), Section("html", "h" * 60, 2)])
+    assert len(texts["html"]) == 30
+    assert len(texts["docs"]) == 50
+
+
+def test_fit_tries_the_reducers_before_cutting():
+    calls = []
+
+    def halve(text, target):
+        calls.append(target)
+        return text[: len(text) // 2]
+
+    budgeter = PromptBudgeter(30, min_section_tokens=5)
+    texts = budgeter.fit("", [Section("html", "h" * 40, 1, reducers=(halve, halve))])
+    assert texts["html"] == "h" * 20
+    assert calls == [30]
+
+
+def test_fit_with_the_html_reducer():
+    html = "<ul>" + "<li>item</li>" * 50 + "</ul>"
+    budgeter = PromptBudgeter(100, min_section_tokens=10)
+    section = Section("html", html, 1, reducers=(lambda text, target: collapse_html_siblings(text),))
+    assert budgeter.fit("", [section])["html"] == collapse_html_siblings(html)
+
+
+def test_create_budgeter():
+    assert create_budgeter({"enabled": False}) is None
+    budgeter = create_budgeter({"max_tokens": 500})
+    assert (budgeter.max_tokens, budgeter.encoding_name) == (500, "cl100k_base")
@@ -0,0 +1,166 @@
+import numpy as np
+import pytest
+
+from src.quantization import (
+    binary_scores,
+    compact_size,
+    fit_reduction,
+    int8_scores,
+    normalize,
+    quantize_binary,
+    quantize_int8,
+    reduce,
+    top_k,
+)
+from src.retrieval_service import service_options
+from src.vector_index import NumpyVectorIndex, create_client
+
+DIM = 64
+SPECTRUM = np.arange(1, DIM + 1) ** -0.25
+
+
+class Size:
+    size = DIM
+
+
+def embeddings(count, seed=0):
+    """Unit vectors with a decaying spectrum, as embeddings have."""
+    rng = np.random.default_rng(seed)
+    return normalize(rng.normal(size=(count, DIM)) * SPECTRUM)
+
+
+def topics(seed=0):
+    """Doc chunks about 30 topics, 20 each, and queries about the first 10 topics."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(30, DIM)) * SPECTRUM
+    docs = normalize(np.repeat(centers, 20, axis=0) + rng.normal(size=(600, DIM)) * SPECTRUM * 0.5)
+    queries = normalize(centers[:10] + rng.normal(size=(10, DIM)) * SPECTRUM * 0.5)
+    return docs, queries
+
+
+def exact_top(vectors, query, k):
+    return top_k(vectors @ query, k)
+
+
+def recall(index, vectors, queries, k=10):
+    found = 0
+    for query in queries:
+        expected = {int(i) for i in exact_top(vectors, query, k)}
+        found += len(expected & {hit.id for hit in index.search("docs", query.tolist(), limit=k)})
+    return found / (k * len(queries))
+
+
+def build(path, vectors, **options):
+    index = NumpyVectorIndex(str(path), **options)
+    index.create_collection("docs", Size())
+    index.upsert("docs", [{"id": i, "vector": vector.tolist(), "payload": {"row": i}} for i, vector in enumerate(vectors)])
+    return index
+
+
+def test_int8_round_trip():
+    vectors = embeddings(200)
+    codes, scale = quantize_int8(vectors)
+    assert codes.dtype == np.int8 and codes.shape == vectors.shape
+    assert np.abs(codes.astype(np.float32) * scale - vectors).max() <= scale.max() / 2 + 1e-6
+    query = vectors[0]
+    assert np.allclose(int8_scores(codes, scale, query, block=7), vectors @ query, atol=0.05)
+
+
+def test_binary_codes_keep_the_signs():
+    vectors = embeddings(50)
+    bits = quantize_binary(vectors)
+    assert bits.shape == (50, DIM // 8)
+    assert np.array_equal(np.unpackbits(bits, axis=1)[:, :DIM].astype(bool), vectors > 0)
+    scores = binary_scores(bits, vectors[3])
+    assert scores[3] == 0 and (scores <= 0).all()
+
+
+def test_truncation_keeps_the_first_dimensions():
+    vectors = embeddings(20)
+    mean, projection = fit_reduction(vectors, 16, "truncate")
+    assert np.array_equal(reduce(vectors, mean, projection), normalize(vectors[:, :16]))
+
+
+def test_pca_keeps_the_main_directions():
+    # The main directions of rotated embeddings are not their first dimensions.
+    rotation, _ = np.linalg.qr(np.random.default_rng(3).normal(size=(DIM, DIM)))
+    vectors = embeddings(300) @ rotation.astype(np.float32)
+    mean, projection = fit_reduction(vectors, 8, "pca")
+    assert np.allclose(projection.T @ projection, np.eye(8), atol=1e-4)
+
+    def kept(mean, projection):
+        centered = vectors - mean
+        return np.linalg.norm(centered @ projection) ** 2 / np.linalg.norm(centered) ** 2
+
+    assert kept(mean, projection) > 1.5 * kept(*fit_reduction(vectors, 8, "truncate"))
+
+
+def test_reduction_to_more_dimensions_than_available():
+    vectors = embeddings(3)
+    mean, projection = fit_reduction(vectors, DIM * 2, "pca")
+    assert projection.shape == (DIM, DIM)
+
+
+def test_unknown_options_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        fit_reduction(embeddings(3), 2, "random")
+    with pytest.raises(ValueError):
+        NumpyVectorIndex(str(tmp_path), quantization="int4")
+    with pytest.raises(ValueError):
+        NumpyVectorIndex(str(tmp_path), reduction=2)
+
+
+def test_compact_size():
+    assert compact_size(10, 64, None) == 2560
+    assert compact_size(10, 64, "int8") == 640
+    assert compact_size(10, 65, "binary") == 90
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"quantization": "int8"},
+        {"quantization": "binary"},
+        {"dimensions": 16, "reduction": "truncate"},
+        {"dimensions": 16, "reduction": "pca"},
+        {"quantization": "int8", "dimensions": 16, "reduction": "pca"},
+        {"quantization": "binary", "dimensions": 32, "reduction": "pca"},
+    ],
+)
+def test_recall_with_reranking(tmp_path, options):
+    docs, queries = topics()
+    index = build(tmp_path, docs, **options)
+    assert recall(index, docs, queries) >= 0.95
+
+
+def test_reranking_improves_the_approximate_ranking(tmp_path):
+    docs, queries = topics()
+    build(tmp_path, docs, quantization="binary")
+    approximate = NumpyVectorIndex(str(tmp_path), rerank_factor=0)
+    reranked = NumpyVectorIndex(str(tmp_path), rerank_factor=4)
+    assert recall(approximate, docs, queries) < 0.9 <= recall(reranked, docs, queries)
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+@pytest.mark.parametrize("reduction", ["truncate", "pca"])
+def test_codes_are_read_back_by_another_reader(tmp_path, quantization, reduction):
+    vectors = embeddings(100)
+    writer = build(tmp_path, vectors, quantization=quantization, dimensions=24, reduction=reduction)
+    # A reader opened with other settings uses the ones the version was written with.
+    reader = NumpyVectorIndex(str(tmp_path))
+    query = embeddings(1, seed=2)[0].tolist()
+    expected = [(hit.id, hit.payload) for hit in writer.search("docs", query, limit=5)]
+    assert [(hit.id, hit.payload) for hit in reader.search("docs", query, limit=5)] == expected
+    # Reranked scores are the full-precision ones.
+    for hit in writer.search("docs", query, limit=5):
+        assert hit.score == pytest.approx(float(vectors[hit.id] @ np.array(query, dtype=np.float32)), abs=1e-5)
+
+
+def test_graph_reduction_key_does_not_reach_the_index(tmp_path):
+    # "reduction" is HtmlAnalyzerNode's integer setting in the graph config.
+    config = {"reduction": 2, "vector_reduction": "pca", "dimensions": 16}
+    index = create_client("numpy", str(tmp_path), config)
+    assert (index.reduction, index.dimensions) == ("pca", 16)
+    assert service_options("numpy", config)["vector_reduction"] == "pca"
+    assert create_client("numpy", str(tmp_path), {"reduction": 2}).reduction == "truncate"
@@ -0,0 +1,70 @@
+from src.query_builder import build_query, crawlee_symbols, parse_exception, schema_fields
+
+TRACEBACK = """Traceback (most recent call last):
+  File "/tmp/tmpab12.py", line 14, in main
+    await crawler.run(["https://example.com"])
+  File "/venv/lib/python3.11/site-packages/crawlee/crawlers/_basic/_basic_crawler.py", line 512, in run
+    await self._run_crawler()
+  File "/venv/lib/python3.11/site-packages/crawlee/crawlers/_basic/_basic_crawler.py", line 601, in enqueue_links
+    raise error
+AttributeError: 'PlaywrightCrawlingContext' object has no attribute 'enqueue_link'
+"""
+
+CODE = """from crawlee.crawlers import PlaywrightCrawler, PlaywrightCrawlingContext
+from crawlee import (Request,
+    ConcurrencySettings)
+
+async def handler(context: PlaywrightCrawlingContext) -> None:
+    await context.enqueue_link()
+    await context.push_data({"title": await context.page.title()})
+"""
+
+
+def test_parse_exception_returns_the_last_exception():
+    assert parse_exception(TRACEBACK) == (
+        "AttributeError", "'PlaywrightCrawlingContext' object has no attribute 'enqueue_link'"
+    )
+    assert parse_exception("ValueError: first\nplaywright._impl._errors.TimeoutError: Timeout 30000ms exceeded.") == (
+        "TimeoutError", "Timeout 30000ms exceeded."
+    )
+    assert parse_exception("KeyboardInterrupt") == ("KeyboardInterrupt", None)
+    assert parse_exception("all good") == (None, None)
+    assert parse_exception(None) == (None, None)
+
+
+def test_crawlee_symbols_from_error_and_code():
+    symbols = crawlee_symbols(TRACEBACK, CODE, limit=20)
+    assert symbols[:3] == ["PlaywrightCrawlingContext", "enqueue_link", "run"]
+    assert "_run_crawler" not in symbols
+    assert {"enqueue_links", "push_data", "page", "PlaywrightCrawler", "Request", "ConcurrencySettings"} <= set(symbols)
+    assert len(symbols) == len(set(symbols))
+    assert len(crawlee_symbols(TRACEBACK, CODE)) == 8
+
+
+def test_schema_fields_include_nested_models():
+    schema = {
+        "properties": {"title": {}, "author": {"$ref": "#/$defs/Author"}},
+        "$defs": {"Author": {"properties": {"name": {}, "title": {}}}},
+    }
+    assert schema_fields(schema) == ["title", "author", "name"]
+    assert schema_fields(None) == []
+
+
+def test_query_for_an_error_is_anchored_on_the_exception_and_symbols():
+    query = build_query("Scrape the titles", ["title"], TRACEBACK, CODE)
+    assert query.anchored
+    assert query.text.startswith("AttributeError: 'PlaywrightCrawlingContext' object has no attribute 'enqueue_link'")
+    assert "Crawlee for Python PlaywrightCrawlingContext enqueue_link" in query.text
+    assert "extract title and store them with push_data" in query.text
+    assert "Scrape the titles" not in query.text
+
+
+def test_query_without_error_uses_the_prompt():
+    query = build_query("Scrape   the\ntitles", ["title", "url"])
+    assert not query.anchored
+    assert query.text == "extract title, url and store them with push_data. Scrape the titles"
+
+
+def test_unrecognized_error_is_kept_but_not_anchored():
+    query = build_query(error="something   went\nwrong")
+    assert query == ("something went wrong", False)
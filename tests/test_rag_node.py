@@ -0,0 +1,101 @@
+import hashlib
+import time
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+import src.chunking as chunking
+from nodes.crawlee_rag_node import keep_index_current
+from src.docs_index import load_manifest
+from src.retrieval_service import RetrievalService
+
+
+class FakeEmbeddings(Embeddings):
+    model = "fake-embedding"
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        digest = hashlib.sha256(text.encode()).digest()
+        return [byte / 255 + 0.01 for byte in digest[:16]]
+
+
+class CharEncoding:
+    def encode(self, text, disallowed_special=()):
+        return list(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def char_tokens(monkeypatch):
+    monkeypatch.setattr(chunking, "_encoding", lambda encoding_name: CharEncoding())
+
+
+def write_snapshot(root, pages):
+    for name, text in pages.items():
+        page = root / "api" / name
+        page.parent.mkdir(parents=True, exist_ok=True)
+        page.write_text(text)
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    root = tmp_path / "docs"
+    write_snapshot(root, {"a.md": "PlaywrightCrawler crawls pages.", "b.md": "Dataset stores items."})
+    return root
+
+
+def config(path, snapshot, embedder):
+    return {
+        "llm_model": None,
+        "embedder_model": embedder,
+        "client_type": "numpy",
+        "numpy_path": path,
+        "crawlee_version": "0.6.8",
+        "docs_source": str(snapshot),
+    }
+
+
+def test_builds_a_missing_index(tmp_path, snapshot):
+    path = str(tmp_path / "index")
+    service = RetrievalService("numpy", path)
+
+    node = keep_index_current(service, config(path, snapshot, FakeEmbeddings()))
+
+    assert service.collection_exists(node.collection_name)
+    assert sorted(load_manifest(path)["pages"]) == ["api/a.md", "api/b.md"]
+
+
+def test_missing_index_that_cannot_be_built_fails(tmp_path, snapshot):
+    path = str(tmp_path / "index")
+    service = RetrievalService("numpy", path)
+
+    with pytest.raises(RuntimeError, match="could not be built"):
+        keep_index_current(service, config(path, snapshot, None))
+
+
+def test_existing_index_is_served_when_the_sync_fails(tmp_path, snapshot):
+    path = str(tmp_path / "index")
+    service = RetrievalService("numpy", path)
+    keep_index_current(service, config(path, snapshot, FakeEmbeddings()))
+    write_snapshot(snapshot, {"c.md": "RequestQueue holds requests."})
+
+    node = keep_index_current(service, config(path, snapshot, None))
+
+    assert service.collection_exists(node.collection_name)
+    assert "api/c.md" not in load_manifest(path)["pages"]
+
+
+def test_index_is_synced_again_every_interval(tmp_path, snapshot):
+    path = str(tmp_path / "index")
+    service = RetrievalService("numpy", path)
+    keep_index_current(service, config(path, snapshot, FakeEmbeddings()), interval=0.05)
+    write_snapshot(snapshot, {"c.md": "RequestQueue holds requests."})
+
+    deadline = time.monotonic() + 5
+    while "api/c.md" not in load_manifest(path)["pages"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert "api/c.md" in load_manifest(path)["pages"]
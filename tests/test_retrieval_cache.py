@@ -0,0 +1,50 @@
+import time
+
+from src.retrieval_cache import RetrievalCache, cache_key, create_retrieval_cache, normalize_text
+
+
+def test_normalize_text_merges_near_identical_errors():
+    first = normalize_text('File "/tmp/tmpab12.py", line 14\n  KeyError:  3 at 0x7f3a2c')
+    second = normalize_text('File "/tmp/tmpzz99.py", line 27\n  KeyError: 5 at 0x7f00ff')
+    assert first == second == 'file "/tmp/tmp.py", line 0 keyerror: 0 at 0x'
+    assert normalize_text(None) == ""
+
+
+def test_cache_key_depends_on_every_part():
+    assert cache_key("query", 5, {"b": 1, "a": 2}) == cache_key("query", 5, {"a": 2, "b": 1})
+    assert cache_key("query", 5) != cache_key("query", 6)
+
+
+def test_hits_misses_and_clear():
+    cache = RetrievalCache(max_entries=10, ttl=60)
+    assert cache.get("k") is None
+    cache.set("k", [{"text": "a"}])
+    assert cache.get("k") == [{"text": "a"}]
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+    cache.clear()
+    assert cache.get("k") is None
+
+
+def test_entries_expire_after_the_ttl():
+    cache = RetrievalCache(max_entries=10, ttl=0.05)
+    cache.set("k", ["hit"])
+    assert cache.get("k") == ["hit"]
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RetrievalCache(max_entries=2, ttl=60)
+    cache.set("a", [1])
+    cache.set("b", [2])
+    cache.get("a")
+    cache.set("c", [3])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1]
+    assert cache.get("c") == [3]
+
+
+def test_disabled_cache():
+    assert create_retrieval_cache({"enabled": False}) is None
+    assert isinstance(create_retrieval_cache(), RetrievalCache)
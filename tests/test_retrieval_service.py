@@ -0,0 +1,77 @@
+import os
+import stat
+
+import pytest
+
+import src.retrieval_service as retrieval_service
+from src.retrieval_service import RetrievalService, open_service, serve, shared_service
+
+
+class Size:
+    size = 2
+
+
+@pytest.fixture
+def served(tmp_path):
+    def start(allow_writes):
+        service = RetrievalService("numpy", str(tmp_path / "index"))
+        service.create_collection("docs", Size())
+        service.upsert("docs", [{"id": "a", "vector": [1.0, 0.0], "payload": {"text": "a"}}])
+        socket_path = str(tmp_path / f"retrieval-{allow_writes}.sock")
+        server = serve(service, socket_path, allow_writes)
+        servers.append(server)
+        return socket_path
+
+    servers = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_shared_services(monkeypatch):
+    monkeypatch.setattr(retrieval_service, "_services", {})
+    monkeypatch.delenv(retrieval_service.SOCKET_ENV, raising=False)
+
+
+def test_socket_is_private_to_its_user(served):
+    socket_path = served(False)
+    assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+
+
+def test_socket_is_read_only_by_default(served, tmp_path):
+    socket_path = served(False)
+    remote = open_service("numpy", str(tmp_path / "index"), {"retrieval_socket": socket_path})
+    assert not remote.writable
+    assert [hit.id for hit in remote.search("docs", [1.0, 0.0], limit=1)] == ["a"]
+    with pytest.raises(RuntimeError, match="read-only"):
+        remote.upsert("docs", [{"id": "b", "vector": [0.0, 1.0], "payload": {}}])
+    with pytest.raises(RuntimeError, match="read-only"):
+        remote.delete_collection("docs")
+    assert remote.count("docs") == 1
+    remote.close()
+
+
+def test_writes_when_allowed(served, tmp_path):
+    socket_path = served(True)
+    remote = open_service("numpy", str(tmp_path / "index"), {"retrieval_socket": socket_path})
+    assert remote.writable
+    remote.upsert("docs", [{"id": "b", "vector": [0.0, 1.0], "payload": {}}])
+    assert remote.count("docs") == 2
+    remote.close()
+
+
+def test_shared_service_rejects_other_options(tmp_path):
+    path = str(tmp_path / "index")
+    service = shared_service("numpy", path, {"rerank_factor": 4})
+    assert shared_service("numpy", path, {}) is service
+    with pytest.raises(ValueError, match="already open"):
+        shared_service("numpy", path, {"rerank_factor": 8})
+
+
+def test_socket_serving_other_options_is_not_used(served, tmp_path):
+    socket_path = served(False)
+    service = open_service("numpy", str(tmp_path / "index"), {"retrieval_socket": socket_path, "quantization": "int8"})
+    assert isinstance(service, RetrievalService)
+    service.close()
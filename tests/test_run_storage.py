@@ -0,0 +1,83 @@
+import json
+import logging
+import os
+import tempfile
+
+import pytest
+
+from nodes.generate_crawlee_code_node import GenerateCodeNode
+from src.execution_monitor import ExecutionMonitor
+from src.schema_validation import SchemaValidator
+
+SCHEMA = {"type": "object", "properties": {"price": {"type": "number"}}, "required": ["price"]}
+
+# Pushes three items, one of them invalid, and reports its storage settings.
+SCRIPT = """\
+import asyncio, json, os
+from crawlee.storages import Dataset
+
+async def main():
+    dataset = await Dataset.open()
+    await dataset.push_data([{"price": 1}, {"price": "2"}])
+    await dataset.push_data({"price": 3})
+    print(json.dumps({
+        "storage_dir": os.environ["CRAWLEE_STORAGE_DIR"],
+        "persist": os.environ["CRAWLEE_PERSIST_STORAGE"],
+    }))
+
+asyncio.run(main())
+"""
+
+
+def make_node(persist=False):
+    node = GenerateCodeNode.__new__(GenerateCodeNode)
+    node.logger = logging.getLogger("test")
+    node.execution_pool = None
+    node.page_fixtures = None
+    node.run_storage = {"persist": persist}
+    node.execution_monitor = ExecutionMonitor(timeout=60, stall_timeout=60)
+    node.schema_validator = SchemaValidator(SCHEMA)
+    return node
+
+
+def settings(result):
+    line = next(line for line in result.output.splitlines() if line.startswith("{"))
+    return json.loads(line)
+
+
+@pytest.mark.parametrize("persist", [False, True])
+def test_each_run_gets_a_storage_removed_afterwards(persist):
+    node = make_node(persist)
+
+    first, second = node.run_code(SCRIPT), node.run_code(SCRIPT)
+
+    assert first.status == second.status == "ok"
+    assert settings(first)["persist"] == ("true" if persist else "false")
+    assert settings(first)["storage_dir"] != settings(second)["storage_dir"]
+    assert not os.path.exists(settings(first)["storage_dir"])
+    assert not os.path.exists(settings(second)["storage_dir"])
+
+
+def test_pushed_items_are_streamed_back_and_validated():
+    result = make_node().run_code(SCRIPT)
+
+    assert result.items == [{"price": 1}, {"price": "2"}, {"price": 3}]
+    assert result.validation.total == 3
+    assert not result.validation.valid
+    assert result.validation.describe()[1].startswith("$.price: '2' is not of type 'number'")
+
+
+def test_storage_is_removed_when_the_run_fails(monkeypatch):
+    created = []
+    mkdtemp = tempfile.mkdtemp
+
+    def track(*args, **kwargs):
+        created.append(mkdtemp(*args, **kwargs))
+        return created[-1]
+
+    monkeypatch.setattr(tempfile, "mkdtemp", track)
+    result = make_node().run_code("raise ValueError('boom')\n")
+
+    assert result.status == "error"
+    assert result.items == []
+    assert len(created) == 1 and not os.path.exists(created[0])
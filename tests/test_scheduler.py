@@ -0,0 +1,163 @@
+import threading
+import time
+
+import pytest
+
+from src.blob_store import BlobStore
+from src.node_cache import NodeCache
+from src.scheduler import GraphScheduler
+
+
+class Node:
+    """A graph node reading the keys of `input`, setting `output` to `value` after `sleep` seconds."""
+
+    def __init__(self, name, input, output, value=None, sleep=0.0, action=None, extra=None):
+        self.node_name = name
+        self.input = input
+        self.output = output
+        self.node_config = {}
+        self.value = value if value is not None else name
+        self.sleep = sleep
+        self.action = action
+        self.extra = extra or {}
+        self.seen = None
+        self.calls = 0
+
+    def execute(self, state):
+        self.calls += 1
+        self.seen = dict(state)
+        if self.action is not None:
+            self.action()
+        time.sleep(self.sleep)
+        state.update({key: self.value for key in self.output}, **self.extra)
+        return state
+
+
+class Fetch(Node):
+    pass
+
+
+def test_dependencies_follow_the_inputs():
+    nodes = [
+        Node("fetch", "url", ["doc"]),
+        Node("refine", "user_prompt", ["refined_prompt"]),
+        Node("parse", "doc", ["parsed_doc"]),
+        Node("generate", "user_prompt & (refined_prompt | parsed_doc)", ["code"]),
+    ]
+    dependencies = GraphScheduler(nodes).dependencies(["url", "user_prompt"])
+    assert dependencies == [set(), set(), {0}, {1, 2}]
+
+
+def test_undeclared_key_waits_for_every_earlier_node():
+    nodes = [Node("fetch", "url", ["doc"]), Node("rag", "", ["client"]), Node("parse", "original_html", ["parsed"])]
+    assert GraphScheduler(nodes).dependencies(["url"])[2] == {0, 1}
+
+
+def test_side_outputs_are_dependencies():
+    nodes = [Fetch("fetch", "url", ["doc"]), Node("rag", "", ["client"]), Node("parse", "original_html", ["parsed"])]
+    scheduler = GraphScheduler(nodes, side_outputs={"original_html": Fetch})
+    assert scheduler.dependencies(["url"])[2] == {0}
+
+
+def test_independent_nodes_run_concurrently_and_dependents_after_them():
+    barrier = threading.Barrier(2, timeout=5)
+    fetch = Node("fetch", "url", ["doc"], action=barrier.wait, sleep=0.05)
+    refine = Node("refine", "user_prompt", ["refined"], action=barrier.wait)
+    generate = Node("generate", "doc & refined", ["code"])
+    state, report = GraphScheduler([fetch, refine, generate]).run({"url": "u", "user_prompt": "p"})
+
+    assert state == {"url": "u", "user_prompt": "p", "doc": "fetch", "refined": "refine", "code": "generate"}
+    assert generate.seen["doc"] == "fetch" and generate.seen["refined"] == "refine"
+    runs = {run.name: run for run in report.runs}
+    assert runs["generate"].start >= max(runs["fetch"].end, runs["refine"].end)
+    assert runs["generate"].dependencies == ("fetch", "refine")
+    assert [run.name for run in report.runs] == ["fetch", "refine", "generate"]
+
+
+def test_one_worker_runs_the_nodes_in_graph_order():
+    order = []
+    nodes = [Node(name, "", [name], action=lambda name=name: order.append(name)) for name in "abcd"]
+    GraphScheduler(nodes, max_workers=1).run({})
+    assert order == list("abcd")
+
+
+def test_node_sees_the_state_of_its_dependencies_only():
+    slow = Node("slow", "", ["late"], sleep=0.2)
+    fast = Node("fast", "url", ["early"])
+    GraphScheduler([slow, fast]).run({"url": "u"})
+    assert "late" not in fast.seen
+
+
+def test_side_outputs_are_merged():
+    fetch = Fetch("fetch", "url", ["doc"], extra={"original_html": "<html>"})
+    parse = Node("parse", "original_html", ["parsed"])
+    scheduler = GraphScheduler([fetch, Node("rag", "", ["client"], sleep=0.1), parse], side_outputs={"original_html": Fetch})
+    state, _ = scheduler.run({"url": "u"})
+    assert state["original_html"] == "<html>"
+    assert parse.seen["original_html"] == "<html>"
+
+
+def test_failure_stops_the_schedule():
+    def fail():
+        raise ValueError("no page")
+
+    fetch = Node("fetch", "url", ["doc"], action=fail)
+    parse = Node("parse", "doc", ["parsed"])
+    with pytest.raises(ValueError, match="no page"):
+        GraphScheduler([fetch, parse]).run({"url": "u"})
+    assert parse.calls == 0
+
+
+def test_throttle_bounds_the_nodes_of_a_type():
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def enter():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    nodes = [Fetch(f"fetch{i}", "url", [f"doc{i}"], action=enter) for i in range(4)]
+    nodes.append(Node("rag", "", ["client"], action=enter))
+    throttle = threading.BoundedSemaphore(2)
+    GraphScheduler(nodes, max_workers=5, throttles={Fetch: throttle}).run({"url": "u"})
+    assert peak[0] == 3  # two fetches and the unthrottled node
+
+
+def test_cache_hits_skip_the_node_and_its_throttle(tmp_path):
+    cache = NodeCache(BlobStore(str(tmp_path)))
+    throttle = threading.BoundedSemaphore(1)
+    fetch = Fetch("fetch", "url", ["doc"])
+    parse = Node("parse", "doc", ["parsed"])
+    scheduler = GraphScheduler([fetch, parse], cache=cache, throttles={Fetch: throttle})
+    first, _ = scheduler.run({"url": "u"})
+
+    throttle.acquire()  # held elsewhere: a cache hit must not wait for it
+    second, report = scheduler.run({"url": "u"})
+    assert second == first
+    assert (fetch.calls, parse.calls) == (1, 1)
+    assert all(run.cached for run in report.runs)
+    assert "cached: fetch, parse" in report.describe()
+
+
+def test_critical_path_is_the_longest_chain():
+    nodes = [
+        Node("fetch", "url", ["doc"], sleep=0.3),
+        Node("refine", "user_prompt", ["refined"], sleep=0.2),
+        Node("parse", "doc", ["parsed"], sleep=0.05),
+        Node("generate", "parsed & refined", ["code"]),
+    ]
+    _, report = GraphScheduler(nodes).run({"url": "u", "user_prompt": "p"})
+    assert report.critical_path == ["fetch", "parse", "generate"]
+    assert report.wall_time < sum(run.duration for run in report.runs) - 0.1
+    assert report.describe().startswith("Graph nodes ran in")
+
+
+def test_from_config():
+    assert GraphScheduler.from_config([]).max_workers == 4
+    assert GraphScheduler.from_config([], {"max_workers": 0}).max_workers == 1
+    _, report = GraphScheduler([]).run({})
+    assert report.runs == [] and report.critical_path == []
@@ -0,0 +1,97 @@
+from src.schema_validation import SchemaValidator
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "price": {"type": "number"},
+        "offers": {"type": "array", "items": {"type": "object", "properties": {"price": {"type": "number"}}}},
+    },
+    "required": ["title", "price"],
+}
+
+
+def test_valid_items():
+    report = SchemaValidator(SCHEMA).validate([{"title": "a", "price": 1}, {"title": "b", "price": 2.5}])
+    assert report.valid
+    assert (report.total, report.checked, report.invalid) == (2, 2, 0)
+
+
+def test_no_items_is_not_valid():
+    report = SchemaValidator(SCHEMA).validate([])
+    assert not report.valid
+    assert report.describe() == ["No items were pushed to the dataset"]
+
+
+def test_violations_are_aggregated_by_path():
+    items = [
+        {"title": "a", "price": "1", "offers": [{"price": 1}, {"price": "2"}]},
+        {"title": "b", "price": "3", "offers": [{"price": "4"}]},
+        {"price": 5},
+        {"title": "c", "price": 6},
+    ]
+    report = SchemaValidator(SCHEMA).validate(items)
+    assert report.invalid == 3
+    assert [(v.path, v.keyword, v.count, v.samples) for v in report.violations] == [
+        ("$.offers[*].price", "type", 2, [0, 1]),
+        ("$.price", "type", 2, [0, 1]),
+        ("$.title", "required", 1, [2]),
+    ]
+    lines = report.describe()
+    assert lines[0] == "3 of 4 checked items do not match the output schema:"
+    assert lines[1].startswith("$.offers[*].price: '2' is not of type 'number' [type] in 2 item(s), e.g. item 0, 1")
+
+
+def test_examples_are_capped():
+    items = [{"title": str(i)} for i in range(10)]
+    violation, = SchemaValidator(SCHEMA, examples=2).validate(items).violations
+    assert (violation.path, violation.count, violation.samples) == ("$.price", 10, [0, 1])
+
+
+def test_describe_caps_the_violations():
+    schema = {"type": "object", "required": [f"field{i}" for i in range(5)]}
+    lines = SchemaValidator(schema).validate([{}]).describe(max_violations=2)
+    assert len(lines) == 4
+    assert lines[-1] == "... and 3 more violations"
+
+
+def test_sampling_checks_the_first_items_then_a_sample():
+    validator = SchemaValidator(SCHEMA, sample_size=100)
+    report = validator.validate([{"title": "a"}] * 5000)
+    assert report.total == 5000
+    # About 100 * (1 + ln(5000 / 100)) ~= 491 items are checked by the thinning.
+    assert 350 < report.checked < 650
+    assert report.invalid == report.checked
+    assert report.describe()[0].startswith(f"{report.checked} of {report.checked} sampled items (of 5000)")
+
+
+def test_sampling_is_deterministic():
+    items = [{"title": "a", "price": i} if i % 7 else {"title": "a"} for i in range(3000)]
+    first = SchemaValidator(SCHEMA, sample_size=50).validate(items)
+    second = SchemaValidator(SCHEMA, sample_size=50).validate(items)
+    assert first == second
+
+
+def test_small_outputs_are_fully_checked():
+    report = SchemaValidator(SCHEMA, sample_size=100).validate([{"title": "a", "price": 1}] * 100)
+    assert report.checked == 100
+
+
+def test_stream_matches_validate():
+    items = [{"title": "a", "price": 1}, {"title": 2, "price": 1}]
+    stream = SchemaValidator(SCHEMA).stream()
+    for item in items:
+        stream.feed(item)
+    assert stream.report() == SchemaValidator(SCHEMA).validate(items)
+
+
+def test_array_schema_validates_the_whole_output():
+    schema = {"type": "array", "items": SCHEMA, "minItems": 3}
+    report = SchemaValidator(schema).validate([{"title": "a", "price": 1}, {"title": "b"}])
+    assert report.total == report.checked == report.invalid == 2
+    assert {(v.path, v.keyword) for v in report.violations} == {("$", "minItems"), ("$[*].price", "required")}
+
+
+def test_from_config_uses_the_defaults():
+    validator = SchemaValidator.from_config(SCHEMA, {"examples": 1})
+    assert (validator.sample_size, validator.examples) == (1000, 1)
@@ -0,0 +1,148 @@
+import logging
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+import nodes.generate_crawlee_code_node as module
+from nodes.generate_crawlee_code_node import GenerateCodeNode
+from src.execution_monitor import ExecutionFailure, ExecutionResult
+
+ERROR = ExecutionFailure("exception", "KeyError", "'price'", None, None, "", "")
+TIMEOUT = ExecutionFailure("timeout", None, "Execution timed out.", None, None, "", "")
+RESULTS = {
+    "ok": ExecutionResult("ok", "", None, [{"price": 1}]),
+    "error": ExecutionResult("error", "", ERROR),
+    "timeout": ExecutionResult("timeout", "", TIMEOUT),
+}
+
+
+def make_node(monkeypatch, codes, run):
+    """
+    A node whose candidate `index` writes `codes[index]` and whose runs are done by `run(code, on_start)`.
+    """
+    node = GenerateCodeNode.__new__(GenerateCodeNode)
+    node.logger = logging.getLogger("test")
+    node.llm_model = None
+    node.speculative = {"enabled": True, "candidates": len(codes), "temperatures": [0.2]}
+    node.api_check = {"enabled": False}
+    node.page_fixtures = None
+    node.max_iterations = {"execution": 2}
+    node.execution_k = 1
+    node.executed = []
+    repairs = iter(range(1, 10))
+
+    def run_code(code, on_start=None):
+        node.executed.append(code)
+        return run(code, on_start)
+
+    monkeypatch.setattr(node, "run_code", run_code, raising=False)
+    monkeypatch.setattr(node, "initial_code_prompt", lambda state: RunnableLambda(lambda _: ""), raising=False)
+    monkeypatch.setattr(
+        node, "candidate_model", lambda index: RunnableLambda(lambda _: codes[index]), raising=False
+    )
+    monkeypatch.setattr(node, "search_query", lambda *args, **kwargs: "query", raising=False)
+    monkeypatch.setattr(node, "retrieve_snippets", lambda *args, **kwargs: "docs", raising=False)
+    monkeypatch.setattr(node, "error_query_prompt", lambda *args: None, raising=False)
+    monkeypatch.setattr(module, "execution_focused_analysis", lambda state, llm: "analysis")
+    monkeypatch.setattr(module, "execution_focused_code_generation", lambda *args: f"fix_{next(repairs)}")
+    monkeypatch.setattr(module, "extract_code", lambda code: code)
+    return node
+
+
+def new_state():
+    return {
+        "generated_code": "",
+        "execution_result": None,
+        "execution_failure": None,
+        "recorded_execution": None,
+        "execution_items": [],
+        "validation_report": None,
+        "errors": {"syntax": [], "execution": [], "validation": [], "semantic": []},
+    }
+
+
+def test_first_successful_candidate_wins_and_the_others_are_killed(monkeypatch):
+    started = threading.Semaphore(0)
+    processes = []
+
+    def run(code, on_start):
+        if code == "ok":
+            # Succeeds only once both other candidates are running.
+            assert started.acquire(timeout=10) and started.acquire(timeout=10)
+            return RESULTS["ok"]
+        proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+        processes.append(proc)
+        on_start(proc)
+        started.release()
+        proc.wait()
+        return RESULTS["error"]
+
+    node = make_node(monkeypatch, ["slow_1", "ok", "slow_2"], run)
+    state = node.speculative_generation(new_state())
+
+    assert state["generated_code"] == "ok"
+    assert state["execution_items"] == [{"price": 1}]
+    assert state["errors"]["execution"] == []
+    assert state["recorded_execution"] is None
+    assert len(processes) == 2
+    for proc in processes:
+        assert proc.wait(timeout=5) is not None
+
+
+@pytest.mark.parametrize(
+    "statuses, expected",
+    [
+        (["syntax", "timeout", "error", "ok"], "ok"),
+        (["syntax", "timeout", "error"], "error"),
+        (["syntax", "timeout"], "timeout"),
+        (["syntax"], "syntax"),
+    ],
+)
+def test_fallback_prefers_the_candidate_that_got_furthest(monkeypatch, statuses, expected):
+    # The best candidate finishes last, so that the choice does not depend on the completion order.
+    codes = ["def (" if status == "syntax" else status for status in statuses]
+
+    def run(code, on_start):
+        time.sleep(0.05 * statuses.index(code))
+        return RESULTS[code]
+
+    node = make_node(monkeypatch, codes, run)
+    state = node.speculative_generation(new_state())
+
+    assert state["generated_code"] == codes[statuses.index(expected)]
+    if expected == "syntax":
+        assert state["errors"]["syntax"][0].startswith("Syntax error")
+        assert state["errors"]["execution"] == []
+    elif expected == "ok":
+        assert state["errors"]["execution"] == []
+    else:
+        assert state["errors"]["execution"] == [RESULTS[expected].failure.describe()]
+        assert state["recorded_execution"] == (expected, RESULTS[expected])
+
+
+@pytest.mark.parametrize("status", ["error", "timeout"])
+def test_execution_loop_starts_from_the_recorded_candidate(monkeypatch, status):
+    node = make_node(monkeypatch, [status], lambda code, on_start: RESULTS["ok" if code != status else status])
+    state = node.speculative_generation(new_state())
+    assert node.executed == [status]
+
+    state = node.execution_reasoning_loop(state)
+
+    assert node.executed == [status, "fix_1"]
+    assert state["generated_code"] == "fix_1"
+    assert state["errors"]["execution"] == []
+
+
+def test_timeout_of_a_new_run_is_run_again(monkeypatch):
+    node = make_node(monkeypatch, [], lambda code, on_start: RESULTS["timeout"])
+    state = new_state()
+    state["generated_code"] = "slow"
+
+    state = node.execution_reasoning_loop(state)
+
+    assert node.executed == ["slow", "slow"]
+    assert state["errors"]["execution"] == [TIMEOUT.describe()]
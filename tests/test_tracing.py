@@ -0,0 +1,193 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from src.tracing import LLMTracingHandler, Tracer, create_tracer, current_tracer, in_context, span, trace_llm
+
+
+def by_name(tracer):
+    return {s.name: s for s in tracer.spans}
+
+
+def test_no_tracer_is_a_no_op():
+    assert current_tracer() is None
+    with span("work", "node") as current:
+        current.set(items=3)
+    with pytest.raises(ValueError):
+        with span("work"):
+            raise ValueError("boom")
+
+
+def test_spans_nest_under_the_current_span():
+    tracer = Tracer()
+    with tracer.activate():
+        assert current_tracer() is tracer
+        with span("graph", "graph"):
+            with span("fetch", "node") as fetch:
+                fetch.set(status=200)
+            with span("generate", "node"):
+                with span("iteration 1", "iteration"):
+                    pass
+        with span("after", "node"):
+            pass
+    assert current_tracer() is None
+
+    spans = by_name(tracer)
+    assert spans["graph"].parent_id is None
+    assert spans["fetch"].parent_id == spans["graph"].span_id
+    assert spans["generate"].parent_id == spans["graph"].span_id
+    assert spans["iteration 1"].parent_id == spans["generate"].span_id
+    assert spans["after"].parent_id is None
+    assert spans["fetch"].attributes == {"status": 200}
+    assert all(s.trace_id == tracer.trace_id and s.end is not None for s in tracer.spans)
+
+
+def test_error_ends_the_span():
+    tracer = Tracer()
+    with tracer.activate():
+        with pytest.raises(KeyError):
+            with span("parse", "node"):
+                raise KeyError("title")
+    parse = by_name(tracer)["parse"]
+    assert (parse.status, parse.error) == ("error", "KeyError: 'title'")
+    assert parse.duration >= 0
+
+
+def test_threads_keep_the_parent_through_in_context():
+    tracer = Tracer()
+    with tracer.activate():
+        with span("graph", "graph"):
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                futures = [pool.submit(in_context(worker), f"node {i}") for i in range(3)]
+                [future.result() for future in futures]
+            plain = threading.Thread(target=worker, args=("unbound",))
+            plain.start()
+            plain.join()
+
+    spans = by_name(tracer)
+    for i in range(3):
+        assert spans[f"node {i}"].parent_id == spans["graph"].span_id
+        assert spans[f"llm {i}"].parent_id == spans[f"node {i}"].span_id
+    # A thread started without the context records nothing.
+    assert "unbound" not in spans
+
+
+def worker(name):
+    with span(name, "node"):
+        with span(name.replace("node", "llm"), "llm"):
+            pass
+
+
+def test_to_thread_keeps_the_parent():
+    tracer = Tracer()
+
+    async def main():
+        with span("graph", "graph"):
+            await asyncio.gather(asyncio.to_thread(worker, "node a"), asyncio.to_thread(worker, "node b"))
+
+    with tracer.activate():
+        asyncio.run(main())
+    spans = by_name(tracer)
+    assert spans["node a"].parent_id == spans["node b"].parent_id == spans["graph"].span_id
+
+
+def test_summary_and_export(tmp_path):
+    tracer = Tracer("trace1")
+    with tracer.activate():
+        with span("graph", "graph"):
+            for tokens in (10, 20):
+                with span("gpt", "llm") as llm:
+                    llm.set(prompt_tokens=tokens, completion_tokens=1)
+            with span("search", "search"):
+                pass
+    open_span = tracer.start_span("running", "execution")
+
+    summary = tracer.summary()
+    assert summary["llm"]["count"] == 2
+    assert (summary["llm"]["prompt_tokens"], summary["llm"]["completion_tokens"]) == (30, 2)
+    assert summary["search"]["count"] == 1 and "prompt_tokens" not in summary["search"]
+    assert "execution" not in summary
+    assert "llm 2x" in tracer.describe() and "30+2 tokens" in tracer.describe()
+
+    path = tracer.export(str(tmp_path / "traces" / "{trace_id}.jsonl"))
+    assert path == str(tmp_path / "traces" / "trace1.jsonl")
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["name"] for line in lines] == ["graph", "gpt", "gpt", "search", "running"]
+    assert lines[-1]["end"] is None and lines[-1]["parent_id"] is None
+    open_span.finish()
+
+
+def test_llm_handler_records_calls_under_the_current_span():
+    handler = LLMTracingHandler()
+    tracer = Tracer()
+    run_id, failed_id = uuid4(), uuid4()
+    with tracer.activate():
+        with span("generate", "node"):
+            handler.on_chat_model_start(
+                {"id": ["ChatOpenAI"]}, [[AIMessage(content="hello")]],
+                run_id=run_id, invocation_params={"model": "gpt-4o-mini", "temperature": 0},
+            )
+            message = AIMessage(content="code", usage_metadata={"input_tokens": 7, "output_tokens": 3, "total_tokens": 10})
+            handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id)
+            handler.on_llm_start({"id": ["OpenAI"]}, ["prompt"], run_id=failed_id)
+            handler.on_llm_error(TimeoutError("slow"), run_id=failed_id)
+
+    spans = by_name(tracer)
+    call = spans["gpt-4o-mini"]
+    assert call.parent_id == spans["generate"].span_id
+    assert (call.attributes["prompt_tokens"], call.attributes["completion_tokens"]) == (7, 3)
+    assert call.attributes["prompt_chars"] == 5 and call.attributes["temperature"] == 0
+    assert (spans["OpenAI"].status, spans["OpenAI"].error) == ("error", "TimeoutError: slow")
+
+
+def test_llm_handler_without_tracer():
+    handler = LLMTracingHandler()
+    handler.on_llm_start({}, ["prompt"], run_id=uuid4())
+    handler.on_llm_end(LLMResult(generations=[]), run_id=uuid4())
+
+
+def test_trace_llm_adds_the_handler_once():
+    class Model:
+        callbacks = None
+
+    model = Model()
+    trace_llm(trace_llm(model))
+    assert len(model.callbacks) == 1
+    assert trace_llm(object()) is not None
+
+
+def test_create_tracer():
+    assert create_tracer({"enabled": False}) is None
+    assert isinstance(create_tracer({"enabled": True}), Tracer)
+
+
+def test_scheduled_nodes_nest_under_the_graph_span():
+    from src.scheduler import GraphScheduler
+
+    class Node:
+        def __init__(self, name, input, output):
+            self.node_name, self.input, self.output = name, input, output
+
+        def execute(self, state):
+            with span(f"{self.node_name} call", "llm"):
+                state[self.output[0]] = self.node_name
+            return state
+
+    tracer = Tracer()
+    nodes = [Node("fetch", "url", ["doc"]), Node("refine", "url", ["prompt"]), Node("generate", "doc & prompt", ["code"])]
+    with tracer.activate():
+        with span("graph", "graph"):
+            GraphScheduler(nodes).run({"url": "u"})
+
+    spans = by_name(tracer)
+    for node in ("fetch", "refine", "generate"):
+        assert spans[node].kind == "node"
+        assert spans[node].parent_id == spans["graph"].span_id
+        assert spans[f"{node} call"].parent_id == spans[node].span_id
@@ -0,0 +1,86 @@
+import logging
+
+import nodes.generate_crawlee_code_node as module
+from nodes.generate_crawlee_code_node import GenerateCodeNode
+from src.execution_monitor import ExecutionFailure, ExecutionResult
+from src.schema_validation import SchemaValidator
+
+SCHEMA = {"type": "object", "properties": {"price": {"type": "number"}}, "required": ["price"]}
+
+
+def make_node(monkeypatch, runs):
+    """
+    A node whose repairs return "fix-1", "fix-2", ... and whose runs of a script return `runs[script]`.
+    """
+    node = GenerateCodeNode.__new__(GenerateCodeNode)
+    node.logger = logging.getLogger("test")
+    node.llm_model = None
+    node.max_iterations = {"validation": 3}
+    node.validation_k = 1
+    node.schema_validator = SchemaValidator(SCHEMA)
+    node.executed = []
+    repairs = iter(range(1, 10))
+
+    def run_code(code):
+        node.executed.append(code)
+        return runs[code]
+
+    monkeypatch.setattr(node, "run_code", run_code, raising=False)
+    monkeypatch.setattr(node, "collect_page_fixtures", lambda: None, raising=False)
+    monkeypatch.setattr(node, "search_query", lambda *args, **kwargs: "query", raising=False)
+    monkeypatch.setattr(node, "retrieve_snippets", lambda *args, **kwargs: "docs", raising=False)
+    monkeypatch.setattr(node, "error_query_prompt", lambda *args: None, raising=False)
+    monkeypatch.setattr(module, "validation_focused_analysis", lambda state, llm: "analysis")
+    monkeypatch.setattr(module, "validation_focused_code_generation", lambda *args: f"fix-{next(repairs)}")
+    monkeypatch.setattr(module, "extract_code", lambda code: code)
+    return node
+
+
+def ok(items):
+    return ExecutionResult("ok", "", None, items, SchemaValidator(SCHEMA).validate(items))
+
+
+def state_after(node, items):
+    state = {"generated_code": "first", "errors": {"execution": [], "validation": []}}
+    return node.record_execution(state, ok(items))
+
+
+def test_valid_output_is_not_repaired(monkeypatch):
+    node = make_node(monkeypatch, {})
+    state = node.validation_reasoning_loop(state_after(node, [{"price": 1}]))
+    assert state["errors"]["validation"] == []
+    assert state["execution_result"] == {"price": 1}
+    assert node.executed == []
+
+
+def test_each_repair_is_run_and_revalidated(monkeypatch):
+    runs = {"fix-1": ok([{"price": "1"}]), "fix-2": ok([{"price": 1}, {"price": 2}])}
+    node = make_node(monkeypatch, runs)
+    state = node.validation_reasoning_loop(state_after(node, [{"name": "a"}]))
+    assert node.executed == ["fix-1", "fix-2"]
+    assert state["errors"]["validation"] == []
+    assert state["generated_code"] == "fix-2"
+    assert state["execution_result"] == [{"price": 1}, {"price": 2}]
+
+
+def test_last_repair_is_validated(monkeypatch):
+    bad = ok([{"price": "1"}])
+    node = make_node(monkeypatch, {"fix-1": bad, "fix-2": bad, "fix-3": bad})
+    state = node.validation_reasoning_loop(state_after(node, [{"name": "a"}]))
+    assert node.executed == ["fix-1", "fix-2", "fix-3"]
+    assert state["errors"]["validation"][1].startswith("$.price: '1' is not of type 'number'")
+
+
+def test_repair_that_breaks_the_script_returns_the_execution_error(monkeypatch):
+    failure = ExecutionFailure("exception", "KeyError", "'price'", None, None, "", "")
+    node = make_node(monkeypatch, {"fix-1": ExecutionResult("error", "", failure)})
+    state = node.validation_reasoning_loop(state_after(node, [{"name": "a"}]))
+    assert node.executed == ["fix-1"]
+    assert state["errors"]["execution"] == [failure.describe()]
+
+
+def test_no_items(monkeypatch):
+    node = make_node(monkeypatch, {})
+    node.max_iterations = {"validation": 0}
+    state = node.validation_reasoning_loop(state_after(node, []))
+    assert state["errors"]["validation"] == ["No items were pushed to the dataset"]
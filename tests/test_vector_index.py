@@ -0,0 +1,76 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from src.vector_index import CURRENT_NAME, NumpyVectorIndex
+
+
+class Size:
+    size = 2
+
+
+def versions(path):
+    collection_dir = os.path.join(path, "docs")
+    return sorted(name for name in os.listdir(collection_dir) if os.path.isdir(os.path.join(collection_dir, name)))
+
+
+def upsert_one(path, point_id):
+    NumpyVectorIndex(path).upsert("docs", [{"id": point_id, "vector": [1.0, float(point_id)], "payload": {}}])
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = NumpyVectorIndex(str(tmp_path), keep_versions=2)
+    index.create_collection("docs", Size())
+    return index
+
+
+def test_upsert_search_and_delete(index):
+    index.upsert("docs", [
+        {"id": "a", "vector": [1.0, 0.0], "payload": {"text": "a"}},
+        {"id": "b", "vector": [0.0, 1.0], "payload": {"text": "b"}},
+    ])
+    assert [hit.id for hit in index.search("docs", [0.9, 0.1], limit=2)] == ["a", "b"]
+    index.delete("docs", ["a"])
+    assert [hit.id for hit in index.search("docs", [0.9, 0.1], limit=2)] == ["b"]
+
+
+def test_replaced_versions_are_kept_until_keep_versions_newer_exist(index, tmp_path):
+    first = index.current_version("docs")
+    index.upsert("docs", [{"id": "a", "vector": [1.0, 0.0], "payload": {}}])
+    assert first in versions(str(tmp_path))
+    index.upsert("docs", [{"id": "b", "vector": [0.0, 1.0], "payload": {}}])
+    assert first not in versions(str(tmp_path))
+    assert len(versions(str(tmp_path))) == 2
+
+
+def test_reader_retries_when_the_version_it_read_is_pruned(index, tmp_path):
+    index.upsert("docs", [{"id": "a", "vector": [1.0, 0.0], "payload": {}}])
+    reader = NumpyVectorIndex(str(tmp_path))
+    stale = index.current_version("docs")
+    index.upsert("docs", [{"id": "b", "vector": [0.0, 1.0], "payload": {}}])
+
+    reads = []
+    real_current = reader._current
+
+    def current(collection_name):
+        # The first read returns a version that has been pruned meanwhile.
+        reads.append(collection_name)
+        return stale if len(reads) == 1 else real_current(collection_name)
+
+    shutil.rmtree(os.path.join(str(tmp_path), "docs", stale))
+    reader._current = current
+    assert reader.count("docs") == 2
+    assert len(reads) == 2
+
+
+def test_concurrent_writers_do_not_lose_points(tmp_path):
+    NumpyVectorIndex(str(tmp_path)).create_collection("docs", Size())
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(upsert_one, [str(tmp_path)] * 12, range(12)))
+    reader = NumpyVectorIndex(str(tmp_path))
+    assert sorted(point_id for point_id, _ in reader.payloads("docs")) == list(range(12))
+    with open(os.path.join(str(tmp_path), "docs", CURRENT_NAME)) as f:
+        assert f.read().strip() in versions(str(tmp_path))